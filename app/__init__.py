@@ -19,6 +19,13 @@ def create_app(config_name='default'):
     # Ensure upload directory exists
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
+    # Persist compiled templates so restarts skip Jinja parsing and compiling
+    if app.config.get('JINJA_BYTECODE_CACHE', True):
+        from jinja2 import FileSystemBytecodeCache
+        cache_dir = os.path.join(app.instance_path, 'jinja_cache')
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_options = {**app.jinja_options, 'bytecode_cache': FileSystemBytecodeCache(cache_dir)}
+    
     # Initialize extensions
     db.init_app(app)
     login_manager.init_app(app)
@@ -27,10 +34,13 @@ def create_app(config_name='default'):
     # Import models to ensure they are registered
     from app.models import User, Collection, CollectionPermission, TextureImage, ImageVersion, CollectionInvitation
     
-    # User loader for Flask-Login
+    # User loader for Flask-Login, served from the process-local user cache
+    from app.utils.user_cache import init_user_cache, load_cached_user
+    init_user_cache(app)
+    
     @login_manager.user_loader
     def load_user(user_id):
-        return User.query.get(int(user_id))
+        return load_cached_user(int(user_id))
     
     # Template context processor
     from app.utils.helpers import has_collection_permission
@@ -38,12 +48,46 @@ def create_app(config_name='default'):
     def utility_processor():
         return dict(has_collection_permission=has_collection_permission)
     
+    # Rendered fragment cache
+    from app.utils.cache import init_fragment_cache
+    init_fragment_cache(app)
+    
+    # Shared payload origin, per-node disk cache and in-memory payload cache
+    from app.utils.blob_store import init_blob_store, init_payload_cache
+    init_blob_store(app)
+    init_payload_cache(app)
+    
+    # Disk cache of images transcoded for browsers
+    from app.utils.transcode import init_transcode_cache
+    init_transcode_cache(app)
+    
+    # Disk cache of deep-zoom tile pyramids
+    from app.utils.tiles import init_tile_cache
+    init_tile_cache(app)
+    
+    # Disk cache of version comparisons
+    from app.utils.version_diff import init_diff_cache
+    init_diff_cache(app)
+    
+    # Disk cache of collection sprite sheets
+    from app.utils.sprites import init_sprite_cache
+    init_sprite_cache(app)
+    
     # Register routes
     from app.routes import register_routes
     register_routes(app)
     
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Request timing and SQL query instrumentation
+    from app.utils.instrumentation import init_instrumentation
+    init_instrumentation(app, db)
+    
+    # N+1 query detection for development and test runs
+    from app.utils.nplusone import init_nplusone
+    init_nplusone(app, db)
+    
+    # Create database tables; production runs init_database.py instead
+    if app.config.get('AUTO_CREATE_TABLES', True):
+        with app.app_context():
+            db.create_all()
     
     return app
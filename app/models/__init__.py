@@ -2,5 +2,8 @@ from .user import User
 from .collection import Collection, CollectionPermission
 from .image import TextureImage, ImageVersion
 from .invitation import CollectionInvitation
+from .storage import StorageUsage, StorageBlobRef
+from .api_token import ApiToken
+from .cache_generation import CacheGeneration
 
-__all__ = ['User', 'Collection', 'CollectionPermission', 'TextureImage', 'ImageVersion', 'CollectionInvitation']
+__all__ = ['User', 'Collection', 'CollectionPermission', 'TextureImage', 'ImageVersion', 'CollectionInvitation', 'StorageUsage', 'StorageBlobRef', 'ApiToken', 'CacheGeneration']
@@ -0,0 +1,28 @@
+import hashlib
+import secrets
+from datetime import datetime
+from .. import db
+
+TOKEN_PREFIX = 'tv_'
+
+class ApiToken(db.Model):
+    """Bearer token for the JSON API; only a hash of the token is stored"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    name = db.Column(db.String(80), nullable=False)
+    token_hash = db.Column(db.String(64), unique=True, nullable=False)
+    hint = db.Column(db.String(12), nullable=False)  # First characters, to tell tokens apart
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime)
+    
+    user = db.relationship('User', backref=db.backref('api_tokens', cascade='all, delete-orphan'))
+    
+    @staticmethod
+    def hash_token(token):
+        return hashlib.sha256(token.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def issue(cls, user_id, name):
+        """Create a token; returns (ApiToken, raw token), and the raw token is never stored"""
+        raw = TOKEN_PREFIX + secrets.token_urlsafe(32)
+        return cls(user_id=user_id, name=name, token_hash=cls.hash_token(raw), hint=raw[:10]), raw
@@ -0,0 +1,16 @@
+from .. import db
+
+# Generation scopes
+COLLECTION_SCOPE = 'collection'
+GLOBAL_SCOPE = 'global'  # Single row with scope_id 0
+
+class CacheGeneration(db.Model):
+    """Counter embedded in fragment cache keys, shared by every process serving the app.
+
+    Writers bump the counter for each collection they change (and the global
+    counter with it), so fragments keyed on the old value are never read again.
+    A missing row counts as generation 0.
+    """
+    scope = db.Column(db.String(16), primary_key=True)  # 'collection' or 'global'
+    scope_id = db.Column(db.Integer, primary_key=True)
+    generation = db.Column(db.Integer, default=0, nullable=False)
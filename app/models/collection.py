@@ -1,23 +1,71 @@
 from datetime import datetime
+from sqlalchemy import event
 from .. import db
 
 class Collection(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     description = db.Column(db.Text)
-    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # Now nullable for unowned collections
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True, index=True)  # Now nullable for unowned collections
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_public = db.Column(db.Boolean, default=False, nullable=False)
+    member_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)  # Maintained by CollectionPermission events
+    storage_quota = db.Column(db.BigInteger)  # Bytes; None falls back to STORAGE_QUOTA_COLLECTION_MB
+    
+    # Version retention; old versions are compacted only when keep_last or keep_days is set
+    retention_keep_last = db.Column(db.Integer)  # Newest N versions of each image
+    retention_keep_days = db.Column(db.Integer)  # Versions uploaded within the last D days
+    retention_keep_published = db.Column(db.Boolean, default=True, server_default='1', nullable=False)
+    
+    # Set when deletion is requested; the rows are purged in the background (see utils/deletion.py)
+    deleted_at = db.Column(db.DateTime, index=True)
     
     # Relationships
     creator = db.relationship('User', backref='created_collections')
     images = db.relationship('TextureImage', backref='collection', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        # Keyset pagination on the discover page (newest / most popular)
+        db.Index('ix_collection_public_created', 'is_public', 'created_at', 'id'),
+        db.Index('ix_collection_public_members', 'is_public', 'member_count', 'id'),
+        # Covers the discover page's public / unowned / owned counts
+        db.Index('ix_collection_public_owner', 'is_public', 'created_by'),
+        # Sortable admin collection table
+        db.Index('ix_collection_created', 'created_at', 'id'),
+        db.Index('ix_collection_name', 'name', 'id'),
+        db.Index('ix_collection_name_lower', db.func.lower(name)),  # Case-insensitive prefix search
+        db.Index('ix_collection_members', 'member_count', 'id'),
+    )
 
 class CollectionPermission(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    collection_id = db.Column(db.Integer, db.ForeignKey('collection.id'), nullable=False)
+    collection_id = db.Column(db.Integer, db.ForeignKey('collection.id'), nullable=False, index=True)
     permission_level = db.Column(db.String(20), nullable=False)  # 'read', 'write', 'admin'
     
     user = db.relationship('User', backref='collection_permissions')
     collection = db.relationship('Collection', backref='permissions')
+    
+    __table_args__ = (
+        # Membership anti-joins look up (user, collection) pairs
+        db.Index('ix_permission_user_collection', 'user_id', 'collection_id'),
+    )
+
+
+def _adjust_member_count(connection, collection_id, delta):
+    collection_table = Collection.__table__
+    connection.execute(
+        collection_table.update()
+        .where(collection_table.c.id == collection_id)
+        .values(member_count=collection_table.c.member_count + delta)
+    )
+
+
+@event.listens_for(CollectionPermission, 'after_insert')
+def _permission_added(mapper, connection, permission):
+    _adjust_member_count(connection, permission.collection_id, 1)
+
+
+@event.listens_for(CollectionPermission, 'after_delete')
+def _permission_removed(mapper, connection, permission):
+    _adjust_member_count(connection, permission.collection_id, -1)
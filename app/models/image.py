@@ -1,4 +1,6 @@
 from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.orm import Session, deferred, with_loader_criteria
 from .. import db
 
 class TextureImage(db.Model):
@@ -10,21 +12,51 @@ class TextureImage(db.Model):
     height = db.Column(db.Integer)
     file_size = db.Column(db.Integer)
     modification_date = db.Column(db.DateTime)
-    collection_id = db.Column(db.Integer, db.ForeignKey('collection.id'), nullable=False)
+    collection_id = db.Column(db.Integer, db.ForeignKey('collection.id'), nullable=False, index=True)
     uploaded_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_published = db.Column(db.Boolean, default=False)
+    copied_from_id = db.Column(db.Integer, db.ForeignKey('texture_image.id', ondelete='SET NULL'))  # Source of a copied image
+    # Set only through utils.versions.set_current_version, which keeps ImageVersion.is_current in step
+    current_version_id = db.Column(db.Integer, db.ForeignKey('image_version.id', use_alter=True, ondelete='SET NULL'),
+                                   index=True)
+    # Set when deletion is requested; hidden from ORM queries and purged in the background (see utils/deletion.py)
+    deleted_at = db.Column(db.DateTime, index=True)
     
     uploader = db.relationship('User', backref='uploaded_images')
-    versions = db.relationship('ImageVersion', backref='image', lazy=True, cascade='all, delete-orphan')
+    versions = db.relationship('ImageVersion', backref='image', lazy=True, cascade='all, delete-orphan',
+                               foreign_keys='ImageVersion.image_id')
+    current_version = db.relationship('ImageVersion', foreign_keys=[current_version_id], post_update=True)
 
 class ImageVersion(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    image_id = db.Column(db.Integer, db.ForeignKey('texture_image.id'), nullable=False)
+    image_id = db.Column(db.Integer, db.ForeignKey('texture_image.id'), nullable=False, index=True)
     version_number = db.Column(db.Integer, nullable=False)
     filepath = db.Column(db.String(500), nullable=False)
     uploaded_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
     is_current = db.Column(db.Boolean, default=False)
-    data = db.Column(db.LargeBinary, nullable=False)
+    data = deferred(db.Column(db.LargeBinary, nullable=False))  # Loaded on first access; listings read metadata only
+    size = db.Column(db.Integer)  # len(data), set on insert; test this rather than data to avoid loading the payload
+    content_hash = db.Column(db.String(64), index=True)  # sha256 of data, set on insert
+    published_at = db.Column(db.DateTime)  # Last time this version was published to the original path
+    # Linked imports keep the payload in the source file (data is empty); see utils.links
+    link_path = db.Column(db.String(1000))
+    link_mtime_ns = db.Column(db.BigInteger)  # Source mtime when size and content_hash were recorded
+    # Duplicate payloads keep data empty and are read from a version storing the same hash; see utils.dedup
+    payload_shared = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    # With the directory blob origin the payload is a file there and data stays empty; see utils.blob_store
+    payload_in_origin = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     uploader = db.relationship('User')
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _hide_deleted_images(state):
+    """Leave tombstoned images out of every ORM query, including get() and relationship loads.
+
+    Set-based Core statements on TextureImage.__table__ are not filtered; pass
+    execution_options(include_deleted_images=True) to see tombstones through the ORM.
+    """
+    if state.is_select and not state.is_column_load and not state.execution_options.get('include_deleted_images'):
+        state.statement = state.statement.options(
+            with_loader_criteria(TextureImage, lambda cls: cls.deleted_at.is_(None), include_aliases=True))
@@ -0,0 +1,236 @@
+import hashlib
+from sqlalchemy import event, select, func, literal, tuple_, bindparam, inspect
+from sqlalchemy.orm import Session, object_session
+from .. import db
+from .image import TextureImage, ImageVersion
+
+# Ledger scopes
+COLLECTION_SCOPE = 'collection'
+USER_SCOPE = 'user'
+
+class StorageUsage(db.Model):
+    """Storage used by one collection or uploader, maintained by ImageVersion events.
+
+    logical_bytes counts every version's payload; physical_bytes counts each
+    distinct payload (by content hash) once within the scope.
+    """
+    scope = db.Column(db.String(16), primary_key=True)  # 'collection' or 'user'
+    scope_id = db.Column(db.Integer, primary_key=True)
+    logical_bytes = db.Column(db.BigInteger, default=0, nullable=False)
+    physical_bytes = db.Column(db.BigInteger, default=0, nullable=False)
+    version_count = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        # Largest consumers first on the admin storage page
+        db.Index('ix_storage_usage_physical', 'scope', 'physical_bytes'),
+    )
+
+class StorageBlobRef(db.Model):
+    """How many versions within a scope share one payload"""
+    scope = db.Column(db.String(16), primary_key=True)
+    scope_id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), primary_key=True)
+    ref_count = db.Column(db.Integer, default=0, nullable=False)
+    size = db.Column(db.BigInteger, default=0, nullable=False)
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def stores_payload(versions):
+    """Condition on the image_version table: rows whose payload bytes are in their own data column"""
+    return (versions.c.payload_shared.is_(False) & versions.c.payload_in_origin.is_(False)
+            & versions.c.link_path.is_(None) & versions.c.content_hash.isnot(None))
+
+
+def _chunks(items, size=300):
+    items = list(items)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def apply_storage_deltas(connection, deltas):
+    """Apply net version changes to the ledger with a handful of batched statements.
+
+    deltas maps (scope, scope_id, content_hash) to [version_count_delta, size].
+    """
+    refs = StorageBlobRef.__table__
+    usage = StorageUsage.__table__
+    deltas = {key: value for key, value in deltas.items() if value[0] and key[1] is not None}
+    if not deltas:
+        return
+
+    ref_key = tuple_(refs.c.scope, refs.c.scope_id, refs.c.content_hash)
+    existing = {}
+    for chunk in _chunks(deltas):
+        existing.update(((scope, scope_id, digest), count) for scope, scope_id, digest, count in connection.execute(
+            select(refs.c.scope, refs.c.scope_id, refs.c.content_hash, refs.c.ref_count).where(ref_key.in_(chunk))))
+
+    inserts, updates, deletes = [], [], []
+    scope_totals = {}
+    for (scope, scope_id, digest), (count_delta, size) in deltas.items():
+        before = existing.get((scope, scope_id, digest), 0)
+        after = before + count_delta
+        key = dict(b_scope=scope, b_scope_id=scope_id, b_hash=digest)
+        if before <= 0 and after > 0:
+            inserts.append(dict(scope=scope, scope_id=scope_id, content_hash=digest, ref_count=after, size=size))
+        elif after > 0:
+            updates.append(dict(key, b_count=after))
+        elif before > 0:
+            deletes.append(key)
+
+        physical = size if before <= 0 < after else -size if after <= 0 < before else 0
+        totals = scope_totals.setdefault((scope, scope_id), [0, 0, 0])
+        totals[0] += count_delta * size
+        totals[1] += physical
+        totals[2] += count_delta
+
+    match = ((refs.c.scope == bindparam('b_scope')) & (refs.c.scope_id == bindparam('b_scope_id'))
+             & (refs.c.content_hash == bindparam('b_hash')))
+    if inserts:
+        connection.execute(refs.insert(), inserts)
+    if updates:
+        connection.execute(refs.update().where(match).values(ref_count=bindparam('b_count')), updates)
+    if deletes:
+        connection.execute(refs.delete().where(match), deletes)
+
+    usage_key = tuple_(usage.c.scope, usage.c.scope_id)
+    present = set()
+    for chunk in _chunks(scope_totals):
+        present.update(tuple(row) for row in connection.execute(
+            select(usage.c.scope, usage.c.scope_id).where(usage_key.in_(chunk))))
+
+    changes = [dict(b_scope=scope, b_scope_id=scope_id, b_logical=logical, b_physical=physical, b_count=count)
+               for (scope, scope_id), (logical, physical, count) in scope_totals.items() if (scope, scope_id) in present]
+    if changes:
+        connection.execute(usage.update()
+                           .where((usage.c.scope == bindparam('b_scope')) & (usage.c.scope_id == bindparam('b_scope_id')))
+                           .values(logical_bytes=usage.c.logical_bytes + bindparam('b_logical'),
+                                   physical_bytes=usage.c.physical_bytes + bindparam('b_physical'),
+                                   version_count=usage.c.version_count + bindparam('b_count')),
+                           changes)
+    new_rows = [dict(scope=scope, scope_id=scope_id, logical_bytes=logical, physical_bytes=physical, version_count=count)
+                for (scope, scope_id), (logical, physical, count) in scope_totals.items()
+                if (scope, scope_id) not in present and count > 0]
+    if new_rows:
+        connection.execute(usage.insert(), new_rows)
+
+
+def _image_collection_id(session, connection, image_id):
+    """collection_id of an image, from the identity map when it is loaded"""
+    image = session.identity_map.get(inspect(TextureImage).identity_key_from_primary_key((image_id,)))
+    if image is not None:
+        return image.collection_id
+    image_table = TextureImage.__table__
+    return connection.execute(
+        select(image_table.c.collection_id).where(image_table.c.id == image_id)
+    ).scalar()
+
+
+def _record_version(connection, version, delta):
+    """Queue a version insert or delete; the ledger is updated once per flush"""
+    if not version.content_hash:
+        return
+    session = object_session(version)
+    pending = session.info.setdefault('storage_deltas', {})
+    collection_id = _image_collection_id(session, connection, version.image_id)
+    size = version.size or 0
+    for scope, scope_id in ((COLLECTION_SCOPE, collection_id), (USER_SCOPE, version.uploaded_by)):
+        entry = pending.setdefault((scope, scope_id, version.content_hash), [0, size])
+        entry[0] += delta
+
+
+@event.listens_for(ImageVersion, 'before_insert')
+def _version_fingerprint(mapper, connection, version):
+    if version.data is not None:
+        if version.size is None:
+            version.size = len(version.data)
+        if version.content_hash is None:
+            version.content_hash = content_hash(version.data)
+    if version.data and not version.link_path:
+        # Bytes already stored by another version are referenced by hash instead of stored again
+        versions = ImageVersion.__table__
+        stored = connection.execute(
+            select(versions.c.id).where(versions.c.content_hash == version.content_hash, stores_payload(versions))
+            .limit(1)
+        ).scalar()
+        if stored is not None:
+            version.data = b''
+            version.payload_shared = True
+
+
+@event.listens_for(ImageVersion, 'after_insert')
+def _version_added(mapper, connection, version):
+    _record_version(connection, version, 1)
+
+
+@event.listens_for(ImageVersion, 'after_delete')
+def _version_removed(mapper, connection, version):
+    _record_version(connection, version, -1)
+
+
+@event.listens_for(Session, 'after_flush')
+def _apply_pending_deltas(session, flush_context):
+    deltas = session.info.pop('storage_deltas', None)
+    if deltas:
+        apply_storage_deltas(session.connection(), deltas)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_deltas(session):
+    session.info.pop('storage_deltas', None)
+
+
+def rebuild_storage_ledger(connection, collection_ids=None, user_ids=None):
+    """Recompute ledger rows from image_version with set-based queries.
+
+    Rebuilds everything when no ids are given; otherwise only the listed
+    collections and uploaders. Used after bulk operations that bypass the ORM
+    events and to repair drift.
+    """
+    refs = StorageBlobRef.__table__
+    usage = StorageUsage.__table__
+    versions = ImageVersion.__table__
+    images = TextureImage.__table__
+
+    scopes = (
+        (COLLECTION_SCOPE, images.c.collection_id, collection_ids),
+        (USER_SCOPE, versions.c.uploaded_by, user_ids),
+    )
+    rebuild_all = collection_ids is None and user_ids is None
+    for scope, key, ids in scopes:
+        if not rebuild_all and not ids:
+            continue
+        ref_filter = refs.c.scope == scope
+        usage_filter = usage.c.scope == scope
+        version_filter = versions.c.content_hash.isnot(None)
+        if not rebuild_all:
+            ids = list(ids)
+            ref_filter &= refs.c.scope_id.in_(ids)
+            usage_filter &= usage.c.scope_id.in_(ids)
+            version_filter &= key.in_(ids)
+        connection.execute(refs.delete().where(ref_filter))
+        connection.execute(usage.delete().where(usage_filter))
+
+        source = versions.join(images, images.c.id == versions.c.image_id)
+        connection.execute(refs.insert().from_select(
+            ['scope', 'scope_id', 'content_hash', 'ref_count', 'size'],
+            select(literal(scope), key, versions.c.content_hash,
+                   func.count(), func.max(versions.c.size))
+            .select_from(source).where(version_filter)
+            .group_by(key, versions.c.content_hash)
+        ))
+
+        logical = (select(key.label('scope_id'),
+                          func.sum(versions.c.size).label('logical_bytes'),
+                          func.count().label('version_count'))
+                   .select_from(source).where(version_filter).group_by(key).subquery())
+        physical = (select(refs.c.scope_id, func.sum(refs.c.size).label('physical_bytes'))
+                    .where(ref_filter).group_by(refs.c.scope_id).subquery())
+        connection.execute(usage.insert().from_select(
+            ['scope', 'scope_id', 'logical_bytes', 'physical_bytes', 'version_count'],
+            select(literal(scope), logical.c.scope_id, logical.c.logical_bytes,
+                   func.coalesce(physical.c.physical_bytes, 0), logical.c.version_count)
+            .select_from(logical.outerjoin(physical, physical.c.scope_id == logical.c.scope_id))
+        ))
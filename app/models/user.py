@@ -10,6 +10,16 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(120), nullable=False)
     is_admin = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    storage_quota = db.Column(db.BigInteger)  # Bytes; None falls back to STORAGE_QUOTA_USER_MB
+    auth_generation = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Bumped by admin/password changes
+    
+    __table_args__ = (
+        # Sortable admin user table
+        db.Index('ix_user_created', 'created_at', 'id'),
+        # Case-insensitive prefix search in the admin user table
+        db.Index('ix_user_username_lower', db.func.lower(username)),
+        db.Index('ix_user_email_lower', db.func.lower(email)),
+    )
     
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
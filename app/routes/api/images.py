@@ -0,0 +1,143 @@
+from flask import request, g, current_app
+from sqlalchemy import bindparam, select
+from ... import db
+from ...models.collection import Collection
+from ...models.image import TextureImage
+from ...utils.api import token_required, json_response, api_error, parse_fields, parse_ids, request_json, is_json_id
+from ...utils.cache import bump_collection_generation
+from ...utils.helpers import get_member_collection_ids, get_collection_permission_levels, permission_at_least
+from ...utils.pagination import keyset_page
+
+IMAGE_FIELDS = ['id', 'filename', 'original_filepath', 'current_filepath', 'width', 'height', 'file_size',
+                'modification_date', 'collection_id', 'uploaded_by', 'created_at', 'is_published']
+EDITABLE_FIELDS = ('filename', 'original_filepath')
+
+
+def _columns(fields):
+    return [getattr(TextureImage, field) for field in fields]
+
+
+def _readable_collection_ids(user):
+    """None means every collection (administrators)"""
+    if user.is_admin:
+        return None
+    return get_member_collection_ids(user)
+
+
+@token_required
+def list_images():
+    """Images the token's user can read, oldest first, in keyset pages"""
+    fields, error = parse_fields(request.args.get('fields'), IMAGE_FIELDS, IMAGE_FIELDS)
+    if error:
+        return api_error(error, 400)
+    try:
+        limit = min(max(int(request.args.get('limit', 100)), 1), current_app.config.get('API_PAGE_LIMIT', 500))
+    except ValueError:
+        return api_error('limit must be an integer', 400)
+    
+    query = db.session.query(*_columns(fields))
+    readable = _readable_collection_ids(g.api_user)
+    if readable is None:
+        # Collections being deleted are hidden from administrators too
+        query = query.filter(TextureImage.collection_id.notin_(
+            select(Collection.id).where(Collection.deleted_at.isnot(None))
+        ))
+    collection_id = request.args.get('collection_id', type=int)
+    if collection_id is not None:
+        if readable is not None and collection_id not in readable:
+            return api_error('You do not have permission to view this collection', 403)
+        query = query.filter(TextureImage.collection_id == collection_id)
+    elif readable is not None:
+        query = query.filter(TextureImage.collection_id.in_(readable))
+    
+    rows, next_cursor = keyset_page(query, [TextureImage.id], request.args.get('cursor'),
+                                    limit=limit, descending=False)
+    return json_response({
+        'items': [dict(zip(fields, row)) for row in rows],
+        'next_cursor': next_cursor,
+    })
+
+
+@token_required
+def get_images():
+    """Metadata for up to API_BATCH_LIMIT images by id (?ids=1,2,3)"""
+    ids = parse_ids(request.args.get('ids', ''))
+    if not ids:
+        return api_error('Pass ids as ?ids=1,2,3 (at most API_BATCH_LIMIT)', 400)
+    fields, error = parse_fields(request.args.get('fields'), IMAGE_FIELDS, IMAGE_FIELDS)
+    if error:
+        return api_error(error, 400)
+    
+    columns = _columns(fields)
+    if 'collection_id' not in fields:
+        columns.append(TextureImage.collection_id)
+    rows = db.session.query(*columns).filter(TextureImage.id.in_(ids)).all()
+    levels = get_collection_permission_levels(g.api_user, {row.collection_id for row in rows})
+    found = {row.id: dict(zip(fields, row)) for row in rows if row.collection_id in levels}
+    return json_response({
+        'items': [found[image_id] for image_id in ids if image_id in found],
+        'not_found': [image_id for image_id in ids if image_id not in found],
+    })
+
+
+@token_required
+def update_images():
+    """Rename images or change their publish path in one batch.
+    
+    Body: {"updates": [{"id": 1, "filename": "...", "original_filepath": "..."}, ...]}.
+    Nothing is changed unless every update is valid and allowed.
+    """
+    payload = request_json()
+    updates = payload.get('updates') if payload else None
+    if not isinstance(updates, list) or not updates:
+        return api_error('Body must be {"updates": [{"id": ..., "filename": ...}, ...]}', 400)
+    if len(updates) > current_app.config.get('API_BATCH_LIMIT', 500):
+        return api_error('Too many updates in one batch', 400)
+    
+    errors = {}
+    by_id = {}
+    for update in updates:
+        image_id = update.get('id') if isinstance(update, dict) else None
+        if not is_json_id(image_id):
+            return api_error('Every update needs an integer id', 400)
+        changes = {field: update[field] for field in EDITABLE_FIELDS if field in update}
+        unknown = set(update) - set(EDITABLE_FIELDS) - {'id'}
+        if unknown:
+            errors[image_id] = f"Fields cannot be edited: {', '.join(sorted(unknown))}"
+        elif not changes:
+            errors[image_id] = 'Nothing to update'
+        elif not all(isinstance(value, str) and value.strip() for value in changes.values()):
+            errors[image_id] = 'Values must be non-empty strings'
+        by_id.setdefault(image_id, {}).update(changes)
+    
+    collections = dict(db.session.query(TextureImage.id, TextureImage.collection_id)
+                       .filter(TextureImage.id.in_(by_id)).all())
+    levels = get_collection_permission_levels(g.api_user, set(collections.values()))
+    for image_id in by_id:
+        if image_id not in collections or collections[image_id] not in levels:
+            errors[image_id] = 'Image not found'
+        elif not permission_at_least(levels[collections[image_id]], 'write'):
+            errors[image_id] = 'You do not have permission to edit images in this collection'
+    if errors:
+        return json_response({'error': 'No images were updated',
+                              'errors': {str(image_id): message for image_id, message in errors.items()}}, 400)
+    
+    # One executemany per combination of edited fields
+    table = TextureImage.__table__
+    groups = {}
+    for image_id, changes in by_id.items():
+        groups.setdefault(tuple(sorted(changes)), []).append(
+            dict({f'b_{field}': value for field, value in changes.items()}, b_id=image_id))
+    try:
+        for fields, rows in groups.items():
+            db.session.execute(
+                table.update().where(table.c.id == bindparam('b_id'))
+                .values({field: bindparam(f'b_{field}') for field in fields}),
+                rows
+            )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    bump_collection_generation(*set(collections.values()))
+    return json_response({'updated': sorted(by_id)})
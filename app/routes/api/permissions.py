@@ -0,0 +1,95 @@
+from flask import g, current_app
+from sqlalchemy import bindparam, tuple_
+from ... import db
+from ...models.user import User
+from ...models.collection import Collection, CollectionPermission
+from ...utils.api import token_required, json_response, api_error, request_json, is_json_id
+from ...utils.cache import bump_collection_generation
+from ...utils.helpers import get_collection_permission_levels
+
+LEVELS = ('read', 'write', 'admin')
+
+
+@token_required
+def grant_permissions():
+    """Grant or change collection permissions in one batch.
+    
+    Body: {"grants": [{"collection_id": 1, "user_id": 2 or "username": "...", "level": "write"}, ...]}.
+    The token's user must administer every collection involved; nothing is
+    changed unless every grant is valid.
+    """
+    payload = request_json()
+    grants = payload.get('grants') if payload else None
+    if not isinstance(grants, list) or not grants:
+        return api_error('Body must be {"grants": [{"collection_id": ..., "user_id": ..., "level": ...}, ...]}', 400)
+    if len(grants) > current_app.config.get('API_BATCH_LIMIT', 500):
+        return api_error('Too many grants in one batch', 400)
+    if not all(isinstance(grant, dict) for grant in grants):
+        return api_error('Every grant must be an object', 400)
+    for grant in grants:
+        user_ok = is_json_id(grant.get('user_id')) if 'user_id' in grant else isinstance(grant.get('username'), str)
+        if not is_json_id(grant.get('collection_id')) or not user_ok:
+            return api_error('Every grant needs an integer collection_id and an integer user_id or a username', 400)
+    
+    usernames = {grant['username'] for grant in grants if isinstance(grant.get('username'), str)}
+    user_ids = {grant['user_id'] for grant in grants if is_json_id(grant.get('user_id'))}
+    users = db.session.query(User.id, User.username).filter(
+        User.id.in_(user_ids) | User.username.in_(usernames)
+    ).all()
+    ids_by_name = {username: user_id for user_id, username in users}
+    known_ids = {user_id for user_id, _ in users}
+    
+    collection_ids = {grant.get('collection_id') for grant in grants if is_json_id(grant.get('collection_id'))}
+    levels = get_collection_permission_levels(g.api_user, collection_ids)
+    owners = dict(db.session.query(Collection.id, Collection.created_by).filter(Collection.id.in_(levels)).all())
+    
+    errors = {}
+    wanted = {}
+    for index, grant in enumerate(grants):
+        user_id = grant.get('user_id') if 'user_id' in grant else ids_by_name.get(grant.get('username'))
+        collection_id = grant.get('collection_id')
+        if grant.get('level') not in LEVELS:
+            errors[index] = f"level must be one of {', '.join(LEVELS)}"
+        elif user_id not in known_ids:
+            errors[index] = 'User not found'
+        elif collection_id not in levels:
+            errors[index] = 'Collection not found'
+        elif levels[collection_id] != 'admin':
+            errors[index] = 'You do not have permission to manage permissions for this collection'
+        elif owners[collection_id] == user_id:
+            errors[index] = 'The owner already has full access'
+        else:
+            wanted[(user_id, collection_id)] = grant['level']
+    if errors:
+        return json_response({'error': 'No permissions were granted',
+                              'errors': {str(index): message for index, message in errors.items()}}, 400)
+    
+    # Set-based upsert; member_count is adjusted once per collection for the new rows
+    table = CollectionPermission.__table__
+    existing = dict(((user_id, collection_id), permission_id) for permission_id, user_id, collection_id in db.session.execute(
+        db.select(table.c.id, table.c.user_id, table.c.collection_id)
+        .where(tuple_(table.c.user_id, table.c.collection_id).in_(list(wanted)))
+    ))
+    updates = [{'b_id': existing[key], 'b_level': level} for key, level in wanted.items() if key in existing]
+    inserts = [{'user_id': user_id, 'collection_id': collection_id, 'permission_level': level}
+               for (user_id, collection_id), level in wanted.items() if (user_id, collection_id) not in existing]
+    added = {}
+    for row in inserts:
+        added[row['collection_id']] = added.get(row['collection_id'], 0) + 1
+    
+    collections = Collection.__table__
+    try:
+        if updates:
+            db.session.execute(table.update().where(table.c.id == bindparam('b_id'))
+                               .values(permission_level=bindparam('b_level')), updates)
+        if inserts:
+            db.session.execute(table.insert(), inserts)
+            db.session.execute(collections.update().where(collections.c.id == bindparam('b_id'))
+                               .values(member_count=collections.c.member_count + bindparam('b_added')),
+                               [{'b_id': collection_id, 'b_added': count} for collection_id, count in added.items()])
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    bump_collection_generation(*{collection_id for _, collection_id in wanted})
+    return json_response({'created': len(inserts), 'updated': len(updates)})
@@ -0,0 +1,34 @@
+from flask import request, redirect, url_for, flash
+from flask_login import login_required, current_user
+from ... import db
+from ...models.api_token import ApiToken
+from .profile import render_profile
+
+
+@login_required
+def create_api_token():
+    name = request.form.get('name', '').strip()
+    if not name:
+        flash('Give the token a name so you can recognize it later.')
+        return redirect(url_for('auth.profile'))
+    
+    try:
+        token, raw = ApiToken.issue(current_user.id, name[:80])
+        db.session.add(token)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error creating API token: {str(e)}')
+        return redirect(url_for('auth.profile'))
+    
+    # Shown once on this page and never stored, so it does not go through flash()
+    return render_profile(new_token=raw)
+
+
+@login_required
+def revoke_api_token(id):
+    token = ApiToken.query.filter_by(id=id, user_id=current_user.id).first_or_404()
+    db.session.delete(token)
+    db.session.commit()
+    flash(f'API token "{token.name}" revoked.')
+    return redirect(url_for('auth.profile'))
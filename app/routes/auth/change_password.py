@@ -1,6 +1,7 @@
 from flask import request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from ... import db
+from ...utils.user_cache import invalidate_user
 
 
 @login_required
@@ -14,11 +15,7 @@ def change_password():
     
     current_user.set_password(new_password)
     db.session.commit()
+    invalidate_user(current_user.id)
     
     flash('Password updated successfully!')
     return redirect(url_for('auth.profile'))
-
-
-def register_route(app):
-    """Register the change_password route with the Flask app"""
-    app.add_url_rule('/auth/change_password', 'auth.change_password', change_password, methods=['POST'])
@@ -26,8 +26,3 @@ def bypass_login():
         return redirect(url_for('main.dashboard'))
     flash('No users found to bypass login')
     return redirect(url_for('auth.login'))
-
-def register_route(app):
-    """Register the login route with the Flask app"""
-    app.add_url_rule('/auth/login', 'auth.login', login, methods=['GET', 'POST'])
-    app.add_url_rule('/auth/bypass_login0110', 'auth.bypass_login', bypass_login, methods=['GET'])
@@ -1,12 +1,20 @@
 from flask import render_template
-from flask_login import login_required
+from flask_login import login_required, current_user
+from sqlalchemy import func
+from ... import db
+from ...models.api_token import ApiToken
+from ...models.image import TextureImage, ImageVersion
 
 
-@login_required
-def profile():
-    return render_template('profile.html')
+def render_profile(**context):
+    tokens = ApiToken.query.filter_by(user_id=current_user.id).order_by(ApiToken.created_at.desc()).all()
+    # Versions of the user's images, counted without loading them
+    version_count = db.session.query(func.count(ImageVersion.id)).join(TextureImage, TextureImage.id == ImageVersion.image_id).filter(
+        TextureImage.uploaded_by == current_user.id
+    ).scalar()
+    return render_template('profile.html', api_tokens=tokens, version_count=version_count, **context)
 
 
-def register_route(app):
-    """Register the profile route with the Flask app"""
-    app.add_url_rule('/auth/profile', 'auth.profile', profile)
+@login_required
+def profile():
+    return render_profile()
@@ -2,6 +2,7 @@ from flask import render_template, request, redirect, url_for, flash
 from flask_login import current_user
 from ... import db
 from ...models.user import User
+from ...utils.cache import bump_global_generation
 
 
 def register():
@@ -27,13 +28,9 @@ def register():
         
         db.session.add(user)
         db.session.commit()
+        bump_global_generation()
         
         flash('Registration successful')
         return redirect(url_for('auth.login'))
     
     return render_template('register.html')
-
-
-def register_route(app):
-    """Register the register route with the Flask app"""
-    app.add_url_rule('/auth/register', 'auth.register', register, methods=['GET', 'POST'])
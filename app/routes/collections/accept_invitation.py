@@ -4,6 +4,7 @@ from datetime import datetime
 from ... import db
 from ...models.collection import CollectionPermission
 from ...models.invitation import CollectionInvitation
+from ...utils.cache import bump_collection_generation
 
 
 def accept_invitation(token):
@@ -45,6 +46,7 @@ def accept_invitation(token):
             invitation.accepted_by = current_user.id
             
             db.session.commit()
+            bump_collection_generation(invitation.collection_id)
             flash('Invitation accepted successfully!')
             return redirect(url_for('collections.view_collection', id=invitation.collection_id))
             
@@ -55,8 +57,3 @@ def accept_invitation(token):
     else:
         # User not logged in, redirect to register/login with invitation context
         return render_template('accept_invitation.html', invitation=invitation)
-
-
-def register_route(app):
-    """Register the accept_invitation route with the Flask app"""
-    app.add_url_rule('/collection/accept_invitation/<token>', 'collections.accept_invitation', accept_invitation)
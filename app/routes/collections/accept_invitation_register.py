@@ -4,6 +4,7 @@ from ... import db
 from ...models.collection import CollectionPermission
 from ...models.user import User
 from ...models.invitation import CollectionInvitation
+from ...utils.cache import bump_collection_generation
 
 
 def accept_invitation_register(token):
@@ -45,6 +46,7 @@ def accept_invitation_register(token):
         invitation.accepted_by = user.id
         
         db.session.commit()
+        bump_collection_generation(invitation.collection_id)
         
         flash('Account created and invitation accepted successfully! Please log in.')
         return redirect(url_for('auth.login'))
@@ -53,8 +55,3 @@ def accept_invitation_register(token):
         db.session.rollback()
         flash(f'Error creating account: {str(e)}')
         return render_template('accept_invitation.html', invitation=invitation)
-
-
-def register_route(app):
-    """Register the accept_invitation_register route with the Flask app"""
-    app.add_url_rule('/collection/accept_invitation/<token>/register', 'collections.accept_invitation_register', accept_invitation_register, methods=['POST'])
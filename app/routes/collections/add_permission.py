@@ -2,6 +2,7 @@ from flask import request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from ... import db
 from ...models.collection import Collection, CollectionPermission
+from ...utils.cache import bump_collection_generation
 
 
 @login_required
@@ -34,9 +35,5 @@ def add_permission(id):
         flash('Permission added successfully!')
     
     db.session.commit()
+    bump_collection_generation(id)
     return redirect(url_for('collections.manage_permissions', id=id))
-
-
-def register_route(app):
-    """Register the add_permission route with the Flask app"""
-    app.add_url_rule('/collection/<int:id>/add_permission', 'collections.add_permission', add_permission, methods=['POST'])
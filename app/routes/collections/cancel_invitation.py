@@ -19,8 +19,3 @@ def cancel_invitation(id, invitation_id):
     
     flash('Invitation cancelled successfully!')
     return redirect(url_for('collections.manage_permissions', id=id))
-
-
-def register_route(app):
-    """Register the cancel_invitation route with the Flask app"""
-    app.add_url_rule('/collection/<int:id>/cancel_invitation/<int:invitation_id>', 'collections.cancel_invitation', cancel_invitation)
@@ -2,6 +2,7 @@ from flask import request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from ... import db
 from ...models.collection import Collection, CollectionPermission
+from ...utils.cache import bump_collection_generation
 
 
 @login_required
@@ -33,6 +34,7 @@ def claim_ownership(id):
             user_permission.permission_level = 'admin'
         
         db.session.commit()
+        bump_collection_generation(id)
         flash(f'You are now the owner of "{collection.name}"!')
         return redirect(url_for('collections.view_collection', id=id))
         
@@ -40,8 +42,3 @@ def claim_ownership(id):
         db.session.rollback()
         flash(f'Error claiming ownership: {str(e)}')
         return redirect(url_for('collections.view_collection', id=id))
-
-
-def register_route(app):
-    """Register the claim_ownership route with the Flask app"""
-    app.add_url_rule('/collection/<int:id>/claim_ownership', 'collections.claim_ownership', claim_ownership, methods=['POST'])
@@ -2,6 +2,7 @@ from flask import render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from ... import db
 from ...models.collection import Collection
+from ...utils.cache import bump_collection_generation
 
 
 @login_required
@@ -20,13 +21,9 @@ def create_collection():
         
         db.session.add(collection)
         db.session.commit()
+        bump_collection_generation(collection.id)
         
         flash('Collection created successfully!')
         return redirect(url_for('collections.view_collection', id=collection.id))
     
     return render_template('create_collection.html')
-
-
-def register_route(app):
-    """Register the create_collection route with the Flask app"""
-    app.add_url_rule('/collection/create', 'collections.create_collection', create_collection, methods=['GET', 'POST'])
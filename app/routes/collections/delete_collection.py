@@ -1,39 +1,39 @@
-from flask import redirect, url_for, flash
+from flask import redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
+from sqlalchemy import select, func
 from ... import db
-from ...models.collection import Collection, CollectionPermission
-from ...models.invitation import CollectionInvitation
+from ...models.collection import Collection
+from ...models.image import TextureImage, ImageVersion
 from ...utils.helpers import has_collection_permission
+from ...utils.deletion import request_collection_deletion, deletion_progress
 
 
-@login_required
-def delete_collection(id):
-    collection = Collection.query.get_or_404(id)
-    
-    # Allow deletion if user is owner, admin, or if collection is unowned and user has admin permission
-    can_delete = (
+def _can_delete(collection):
+    """Owner, administrators, or collection admins of an unowned collection"""
+    return (
         (collection.created_by and collection.created_by == current_user.id) or 
         current_user.is_admin or
         (not collection.created_by and has_collection_permission(current_user, collection, 'admin'))
     )
+
+
+@login_required
+def delete_collection(id):
+    collection = Collection.query.get_or_404(id)
+    
+    if collection.deleted_at is not None:
+        flash('This collection is already being deleted.')
+        return redirect(url_for('main.dashboard'))
     
-    if not can_delete:
+    if not _can_delete(collection):
         flash('You do not have permission to delete this collection.')
         return redirect(url_for('main.dashboard'))
     
+    name = collection.name
     try:
-        # Delete related records first to avoid foreign key constraint issues
-        # Delete collection permissions
-        CollectionPermission.query.filter_by(collection_id=collection.id).delete()
-        
-        # Delete collection invitations
-        CollectionInvitation.query.filter_by(collection_id=collection.id).delete()
-        
-        # Delete the collection itself (images will be cascade deleted)
-        db.session.delete(collection)
-        db.session.commit()
-        
-        flash('Collection deleted successfully!')
+        # Hidden immediately; versions, images, permissions and invitations are removed in the background
+        request_collection_deletion(collection, user_id=current_user.id)
+        flash(f'Collection "{name}" is being deleted.')
     except Exception as e:
         db.session.rollback()
         flash(f'Error deleting collection: {str(e)}')
@@ -41,6 +41,37 @@ def delete_collection(id):
     return redirect(url_for('main.dashboard'))
 
 
-def register_route(app):
-    """Register the delete_collection route with the Flask app"""
-    app.add_url_rule('/collection/<int:id>/delete', 'collections.delete_collection', delete_collection)
+@login_required
+def deletion_status(id):
+    """Progress of a collection's background deletion"""
+    progress = deletion_progress(id)
+    collection = db.session.get(Collection, id)
+    
+    if collection is None:
+        # Finished; only this process's record says it ever existed
+        if progress is None or not (current_user.is_admin or progress.get('requested_by') == current_user.id):
+            return jsonify({'error': 'Collection not found'}), 404
+        return jsonify(dict(progress, state='done'))
+    
+    if collection.deleted_at is None:
+        return jsonify({'error': 'This collection is not being deleted'}), 404
+    allowed = (current_user.is_admin or collection.created_by == current_user.id or
+               (progress is not None and progress.get('requested_by') == current_user.id))
+    if not allowed:
+        return jsonify({'error': 'You do not have permission to view this collection'}), 403
+    
+    # What is left, counted over metadata only, so the answer holds across processes too
+    images = TextureImage.__table__
+    versions = ImageVersion.__table__
+    remaining_images = db.session.execute(
+        select(func.count()).select_from(images).where(images.c.collection_id == id)
+    ).scalar()
+    remaining_versions = db.session.execute(
+        select(func.count()).select_from(versions.join(images, images.c.id == versions.c.image_id))
+        .where(images.c.collection_id == id)
+    ).scalar()
+    
+    result = dict(progress or {'collection_id': id, 'state': 'pending'})
+    result.update(requested_at=collection.deleted_at.isoformat(),
+                  images_remaining=remaining_images, versions_remaining=remaining_versions)
+    return jsonify(result)
@@ -1,44 +1,113 @@
-from flask import render_template
+from flask import render_template, request, current_app
 from flask_login import login_required, current_user
-from ...models.collection import Collection
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import joinedload
+from ... import db
+from ...models.collection import Collection, CollectionPermission
+from ...utils.cache import cached_fragment, global_generation
+from ...utils.helpers import get_member_collection_ids, get_collection_image_stats
+from ...utils.pagination import keyset_page
+
+# Sort key -> (keyset columns, descending); each is backed by an index on Collection
+SORT_OPTIONS = {
+    'newest': ([Collection.created_at, Collection.id], True),
+    'oldest': ([Collection.created_at, Collection.id], False),
+    'popular': ([Collection.member_count, Collection.id], True),
+}
 
 
 @login_required
 def discover_collections():
     """Show public and unowned collections that users can join or claim"""
+    sort = request.args.get('sort', 'newest')
+    if sort not in SORT_OPTIONS:
+        sort = 'newest'
+    public_after = request.args.get('public_after')
+    unowned_after = request.args.get('unowned_after')
+    
+    # Discovery lists every public collection, so the key follows the global generation
+    member_collection_ids = get_member_collection_ids(current_user)
+    cache_key = ('discover', current_user.id, global_generation(), tuple(member_collection_ids),
+                 sort, public_after, unowned_after)
+    discover_content = cached_fragment(
+        cache_key,
+        lambda: render_template('discover_collections_content.html',
+                                **load_discover_data(current_user, sort, public_after, unowned_after))
+    )
     
-    # Get collections user is already a member of
-    user_created_collections = Collection.query.filter_by(created_by=current_user.id).all()
-    permitted_collection_ids = [p.collection_id for p in current_user.collection_permissions]
-    permitted_collections = Collection.query.filter(Collection.id.in_(permitted_collection_ids)).all()
-    member_collection_ids = {c.id for c in (user_created_collections + permitted_collections)}
+    return render_template('discover_collections.html', discover_content=discover_content)
+
+
+def discoverable_collections_query(user):
+    """Public collections the user neither owns nor has a permission on (single anti-join)"""
+    is_member = db.session.query(CollectionPermission.id).filter(
+        CollectionPermission.collection_id == Collection.id,
+        CollectionPermission.user_id == user.id
+    ).exists()
     
-    # Get public collections user is not a member of
-    public_collections = Collection.query.filter(
+    return Collection.query.filter(
         Collection.is_public == True,
-        ~Collection.id.in_(member_collection_ids) if member_collection_ids else True
-    ).order_by(Collection.created_at.desc()).all()
+        ~is_member,
+        or_(Collection.created_by.is_(None), Collection.created_by != user.id)
+    )
+
+
+def count_discoverable(user):
+    """Section totals computed as vault-wide counts minus the user's own memberships.
     
-    # Get unowned collections (only public ones should be discoverable)
-    unowned_collections = Collection.query.filter(
-        Collection.created_by.is_(None),
-        Collection.is_public == True  # Only show public unowned collections
-    ).order_by(Collection.created_at.desc()).all()
+    This avoids running the anti-join over every public collection just to count it.
+    """
+    is_unowned = case((Collection.created_by.is_(None), 1), else_=0)
+    total_public, total_unowned = db.session.query(
+        func.count(Collection.id), func.coalesce(func.sum(is_unowned), 0)
+    ).filter(Collection.is_public == True).one()
     
-    # Filter unowned collections to only show those user isn't already a member of
-    unowned_collections = [c for c in unowned_collections if c.id not in member_collection_ids]
+    owned_public = Collection.query.filter(
+        Collection.created_by == user.id,
+        Collection.is_public == True
+    ).count()
     
-    # Get some stats for the discovery page
-    total_public = Collection.query.filter_by(is_public=True).count()
-    total_collections = Collection.query.count()
+    joined_public, joined_unowned = db.session.query(
+        func.count(Collection.id), func.coalesce(func.sum(is_unowned), 0)
+    ).join(
+        CollectionPermission, CollectionPermission.collection_id == Collection.id
+    ).filter(
+        CollectionPermission.user_id == user.id,
+        Collection.is_public == True,
+        or_(Collection.created_by.is_(None), Collection.created_by != user.id)
+    ).one()
     
-    return render_template('discover_collections.html',
-                         public_collections=public_collections,
-                         unowned_collections=unowned_collections,
-                         total_public=total_public,
-                         total_collections=total_collections)
+    return {
+        'total_public': total_public,
+        'public_available': total_public - owned_public - joined_public,
+        'unowned_available': total_unowned - joined_unowned,
+    }
 
 
-def register_route(app):
-    """Register the discover_collections route with the Flask app"""
-    app.add_url_rule('/collection/discover', 'collections.discover_collections', discover_collections)
+def load_discover_data(user, sort, public_after=None, unowned_after=None):
+    """Run the discovery queries for one page of each section"""
+    columns, descending = SORT_OPTIONS[sort]
+    page_size = current_app.config.get('DISCOVER_PAGE_SIZE', 24)
+    
+    discoverable = discoverable_collections_query(user)
+    unowned = discoverable.filter(Collection.created_by.is_(None))
+    
+    public_collections, public_next = keyset_page(
+        discoverable.options(joinedload(Collection.creator)), columns, public_after, page_size, descending
+    )
+    unowned_collections, unowned_next = keyset_page(
+        unowned, columns, unowned_after, page_size, descending
+    )
+    
+    cards = get_collection_image_stats(sorted({c.id for c in public_collections + unowned_collections}))
+    
+    return dict(public_collections=public_collections,
+                unowned_collections=unowned_collections,
+                public_next=public_next,
+                unowned_next=unowned_next,
+                public_after=public_after,
+                unowned_after=unowned_after,
+                sort=sort,
+                cards=cards,
+                total_collections=Collection.query.count(),
+                **count_discoverable(user))
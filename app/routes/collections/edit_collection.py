@@ -3,6 +3,8 @@ from flask_login import login_required, current_user
 from ... import db
 from ...models.collection import Collection
 from ...utils.helpers import has_collection_permission
+from ...utils.cache import bump_collection_generation
+from ...utils.retention import RetentionPolicy
 
 
 @login_required
@@ -14,17 +16,26 @@ def edit_collection(id):
         return redirect(url_for('main.dashboard'))
     
     if request.method == 'POST':
+        # Posts without the retention fields (older forms, scripts) leave the policy alone
+        policy = None
+        if request.form.get('retention_form'):
+            try:
+                policy = RetentionPolicy.from_form(request.form)
+            except ValueError:
+                flash('Retention limits must be whole numbers (keep at least 1 version).')
+                return render_template('edit_collection.html', collection=collection)
+        
         collection.name = request.form['name']
         collection.description = request.form.get('description', '')
         collection.is_public = bool(request.form.get('is_public'))
+        if policy is not None:
+            collection.retention_keep_last = policy.keep_last
+            collection.retention_keep_days = policy.keep_days
+            collection.retention_keep_published = policy.keep_published
         db.session.commit()
+        bump_collection_generation(collection.id)
         
         flash('Collection updated successfully!')
         return redirect(url_for('collections.view_collection', id=collection.id))
     
     return render_template('edit_collection.html', collection=collection)
-
-
-def register_route(app):
-    """Register the edit_collection route with the Flask app"""
-    app.add_url_rule('/collection/<int:id>/edit', 'collections.edit_collection', edit_collection, methods=['GET', 'POST'])
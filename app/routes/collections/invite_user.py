@@ -62,8 +62,3 @@ def invite_user(id):
         flash(f'Error sending invitation: {str(e)}')
     
     return redirect(url_for('collections.manage_permissions', id=id))
-
-
-def register_route(app):
-    """Register the invite_user route with the Flask app"""
-    app.add_url_rule('/collection/<int:id>/invite', 'collections.invite_user', invite_user, methods=['POST'])
@@ -2,6 +2,7 @@ from flask import request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from ... import db
 from ...models.collection import Collection, CollectionPermission
+from ...utils.cache import bump_collection_generation
 
 
 @login_required
@@ -38,6 +39,7 @@ def join_collection(id):
         )
         db.session.add(permission)
         db.session.commit()
+        bump_collection_generation(id)
         
         flash(f'Successfully joined "{collection.name}" with read access!')
         return redirect(url_for('collections.view_collection', id=id))
@@ -46,8 +48,3 @@ def join_collection(id):
         db.session.rollback()
         flash(f'Error joining collection: {str(e)}')
         return redirect(url_for('main.dashboard'))
-
-
-def register_route(app):
-    """Register the join_collection route with the Flask app"""
-    app.add_url_rule('/collection/<int:id>/join', 'collections.join_collection', join_collection, methods=['POST'])
@@ -2,6 +2,7 @@ from flask import request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from ... import db
 from ...models.collection import Collection, CollectionPermission
+from ...utils.cache import bump_collection_generation
 
 
 @login_required
@@ -33,14 +34,10 @@ def leave_collection(id):
                 flash(f'You have left "{collection.name}".')
         
         db.session.commit()
+        bump_collection_generation(id)
         return redirect(url_for('main.dashboard'))
         
     except Exception as e:
         db.session.rollback()
         flash(f'Error leaving collection: {str(e)}')
         return redirect(url_for('collections.view_collection', id=id))
-
-
-def register_route(app):
-    """Register the leave_collection route with the Flask app"""
-    app.add_url_rule('/collection/<int:id>/leave', 'collections.leave_collection', leave_collection, methods=['POST'])
@@ -30,8 +30,3 @@ def manage_permissions(id):
                          users=users, 
                          permissions=permissions,
                          invitations=invitations)
-
-
-def register_route(app):
-    """Register the manage_permissions route with the Flask app"""
-    app.add_url_rule('/collection/<int:id>/permissions', 'collections.manage_permissions', manage_permissions, methods=['GET', 'POST'])
@@ -2,6 +2,7 @@ from flask import redirect, url_for, flash
 from flask_login import login_required, current_user
 from ... import db
 from ...models.collection import Collection, CollectionPermission
+from ...utils.cache import bump_collection_generation
 
 
 @login_required
@@ -15,11 +16,7 @@ def remove_permission(id, permission_id):
     
     db.session.delete(permission)
     db.session.commit()
+    bump_collection_generation(id)
     
     flash('Permission removed successfully!')
     return redirect(url_for('collections.manage_permissions', id=id))
-
-
-def register_route(app):
-    """Register the remove_permission route with the Flask app"""
-    app.add_url_rule('/collection/<int:id>/remove_permission/<int:permission_id>', 'collections.remove_permission', remove_permission)
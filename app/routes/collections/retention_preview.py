@@ -0,0 +1,30 @@
+from flask import request, jsonify
+from flask_login import login_required, current_user
+from ...models.collection import Collection
+from ...utils.helpers import has_collection_permission
+from ...utils.retention import RetentionPolicy, preview_retention
+
+
+@login_required
+def retention_preview(id):
+    """Report what a retention policy would reclaim from this collection.
+    
+    Without query parameters the collection's saved policy is previewed;
+    keep_last / keep_days / keep_published preview unsaved form values.
+    """
+    collection = Collection.query.get_or_404(id)
+    
+    if not has_collection_permission(current_user, collection, 'admin'):
+        return jsonify({'error': 'You do not have permission to manage this collection'}), 403
+    
+    if request.args:
+        try:
+            policy = RetentionPolicy.from_form(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    else:
+        policy = RetentionPolicy.from_collection(collection)
+    
+    result = preview_retention(collection.id, policy)
+    result['enabled'] = policy.enabled
+    return jsonify(result)
@@ -0,0 +1,71 @@
+from flask import request, jsonify, url_for, Response, current_app, abort
+from flask_login import login_required, current_user
+from ...models.collection import Collection
+from ...utils.helpers import has_collection_permission
+from ...utils.sprites import page_entries, sheet_key, sheet_layout, build_sheet
+
+
+def _page_ids():
+    """Image ids from ?ids=1,2,3, or None when malformed or longer than one page"""
+    try:
+        ids = [int(value) for value in request.args.get('ids', '').split(',') if value]
+    except ValueError:
+        return None
+    if not ids or len(ids) > current_app.config.get('SPRITE_PAGE_SIZE', 200):
+        return None
+    return ids
+
+
+@login_required
+def sprite_map(id):
+    """Coordinate map of a page of image previews packed into one sprite sheet"""
+    collection = Collection.query.get_or_404(id)
+    
+    if not has_collection_permission(current_user, collection, 'read'):
+        return jsonify({'error': 'You do not have permission to view this collection'}), 403
+    
+    ids = _page_ids()
+    if ids is None:
+        return jsonify({'error': 'Pass up to one page of image ids as ?ids=1,2,3'}), 400
+    
+    cell_size = current_app.config.get('SPRITE_CELL_SIZE', 120)
+    entries = page_entries(collection.id, ids)
+    key = sheet_key(entries, cell_size)
+    if key in request.if_none_match:
+        response = Response(status=304)
+    else:
+        layout = sheet_layout(entries, cell_size)
+        layout['sheet_url'] = url_for('collections.sprite_sheet', id=collection.id, key=key,
+                                      ids=','.join(str(entry[0]) for entry in entries))
+        response = jsonify(layout)
+    response.set_etag(key)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+@login_required
+def sprite_sheet(id, key):
+    """The packed sprite sheet a map refers to; content-addressed, so cacheable forever"""
+    collection = Collection.query.get_or_404(id)
+    
+    if not has_collection_permission(current_user, collection, 'read'):
+        abort(403)
+    
+    ids = _page_ids()
+    if ids is None:
+        abort(400)
+    
+    cell_size = current_app.config.get('SPRITE_CELL_SIZE', 120)
+    entries = page_entries(collection.id, ids)
+    if sheet_key(entries, cell_size) != key:
+        # A version changed since the map was fetched
+        abort(404)
+    
+    if key in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(build_sheet(entries, cell_size, current_app.extensions['sprite_cache']),
+                            mimetype='image/webp')
+    response.set_etag(key)
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
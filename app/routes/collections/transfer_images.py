@@ -0,0 +1,38 @@
+from flask import request, redirect, url_for, flash
+from flask_login import login_required, current_user
+from ...models.collection import Collection
+from ...utils.helpers import has_collection_permission
+from ...utils.transfer import transfer_images as run_transfer
+
+
+@login_required
+def transfer_images(id):
+    """Move or copy selected images, or the whole collection, into another collection"""
+    collection = Collection.query.get_or_404(id)
+    copy = request.form.get('mode') == 'copy'
+    
+    if not has_collection_permission(current_user, collection, 'read' if copy else 'write'):
+        flash('You do not have permission to move images out of this collection.')
+        return redirect(url_for('collections.view_collection', id=id))
+    
+    target = Collection.query.get(request.form.get('target_id', type=int) or 0)
+    if target is None or not has_collection_permission(current_user, target, 'write'):
+        flash('Choose a collection you can add images to.')
+        return redirect(url_for('collections.view_collection', id=id))
+    
+    if request.form.get('scope') == 'all':
+        image_ids = None
+    else:
+        image_ids = request.form.getlist('image_ids', type=int)
+        if not image_ids:
+            flash('Select the images to move or copy first.')
+            return redirect(url_for('collections.view_collection', id=id))
+    
+    try:
+        count = run_transfer(collection.id, target.id, image_ids, copy=copy)
+    except ValueError as e:
+        flash(str(e))
+        return redirect(url_for('collections.view_collection', id=id))
+    
+    flash(f"{'Copied' if copy else 'Moved'} {count} image{'s' if count != 1 else ''} to {target.name}.")
+    return redirect(url_for('collections.view_collection', id=target.id if not copy else id))
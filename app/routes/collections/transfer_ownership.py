@@ -3,6 +3,7 @@ from flask_login import login_required, current_user
 from ... import db
 from ...models.collection import Collection, CollectionPermission
 from ...models.user import User
+from ...utils.cache import bump_collection_generation
 
 
 @login_required
@@ -54,6 +55,7 @@ def transfer_ownership(id):
         db.session.add(current_owner_permission)
         
         db.session.commit()
+        bump_collection_generation(id)
         flash(f'Ownership of "{collection.name}" has been transferred to {new_owner.username}.')
         return redirect(url_for('collections.view_collection', id=id))
         
@@ -64,8 +66,3 @@ def transfer_ownership(id):
         db.session.rollback()
         flash(f'Error transferring ownership: {str(e)}')
         return redirect(url_for('collections.manage_permissions', id=id))
-
-
-def register_route(app):
-    """Register the transfer_ownership route with the Flask app"""
-    app.add_url_rule('/collection/<int:id>/transfer_ownership', 'collections.transfer_ownership', transfer_ownership, methods=['POST'])
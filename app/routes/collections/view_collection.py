@@ -1,8 +1,9 @@
-from flask import render_template, redirect, url_for, flash
+from flask import render_template, redirect, url_for, flash, request, jsonify, current_app
 from flask_login import login_required, current_user
+from sqlalchemy import func
 from ...models.collection import Collection
 from ...models.image import TextureImage
-from ...utils.helpers import has_collection_permission
+from ...utils.helpers import has_collection_permission, get_member_collection_ids, get_collection_permission_levels, permission_at_least, prefix_search
 
 
 @login_required
@@ -14,12 +15,45 @@ def view_collection(id):
         return redirect(url_for('main.dashboard'))
     
     images = TextureImage.query.filter_by(collection_id=id).all()
+    targets, more_targets = _transfer_targets(collection)
     return render_template('view_collection.html', 
                          collection=collection, 
                          images=images, 
+                         transfer_targets=targets,
+                         more_transfer_targets=more_targets,
                          has_collection_permission=has_collection_permission)
 
 
-def register_route(app):
-    """Register the view_collection route with the Flask app"""
-    app.add_url_rule('/collection/<int:id>', 'collections.view_collection', view_collection)
+@login_required
+def transfer_targets(id):
+    """One page of the collections images can be moved or copied to, filtered by name prefix"""
+    collection = Collection.query.get_or_404(id)
+    
+    if not has_collection_permission(current_user, collection, 'read'):
+        return jsonify({'error': 'You do not have permission to view this collection'}), 403
+    
+    page = max(request.args.get('page', 1, type=int), 1)
+    targets, has_next = _transfer_targets(collection, request.args.get('q', '').strip(), page)
+    return jsonify({
+        'targets': [{'id': target_id, 'name': name} for target_id, name in targets],
+        'page': page,
+        'has_next': has_next,
+    })
+
+
+def _transfer_targets(collection, search='', page=1):
+    """One page of (id, name) of the other collections the user can add images to, and whether more follow"""
+    per_page = current_app.config.get('TRANSFER_TARGET_PAGE_SIZE', 50)
+    query = Collection.query.with_entities(Collection.id, Collection.name).filter(
+        Collection.id != collection.id, Collection.deleted_at.is_(None)
+    )
+    if not current_user.is_admin:
+        levels = get_collection_permission_levels(current_user, get_member_collection_ids(current_user))
+        writable = [cid for cid, level in levels.items() if permission_at_least(level, 'write')]
+        query = query.filter(Collection.id.in_(writable))
+    if search:
+        query = query.filter(prefix_search(Collection.name, search))
+    # Ordered on the lower(name) index so a page never sorts every collection
+    rows = (query.order_by(func.lower(Collection.name), Collection.id)
+            .offset((page - 1) * per_page).limit(per_page + 1).all())
+    return rows[:per_page], len(rows) > per_page
@@ -0,0 +1,64 @@
+from flask import request, jsonify, url_for, Response, current_app
+from flask_login import login_required, current_user
+from ...models.image import ImageVersion
+from ...utils.helpers import has_collection_permission
+from ...utils.version_diff import diff_versions
+
+
+def _load_pair(version_id, other_id):
+    """Both versions when the user can read them, otherwise an error response"""
+    versions = []
+    for id in (version_id, other_id):
+        version = ImageVersion.query.get_or_404(id)
+        if version.image is None:
+            return None, (jsonify({'error': 'Image not found'}), 404)
+        if not has_collection_permission(current_user, version.image.collection, 'read'):
+            return None, (jsonify({'error': 'You do not have permission to view this image'}), 403)
+        if not version.size:
+            return None, (jsonify({'error': 'Version data not found'}), 404)
+        versions.append(version)
+    return versions, None
+
+
+def _diff_or_error(base, other):
+    try:
+        return diff_versions(base, other), None
+    except ImportError:
+        return None, (jsonify({'error': 'Version comparison requires NumPy'}), 501)
+    except Exception:
+        current_app.logger.exception('Comparing versions %s and %s failed', base.id, other.id)
+        return None, (jsonify({'error': 'These versions could not be compared'}), 422)
+
+
+@login_required
+def compare_versions(version_id, other_id):
+    """Pixel difference summary between two versions: PSNR, max delta and changed regions"""
+    versions, error = _load_pair(version_id, other_id)
+    if error:
+        return error
+    result, error = _diff_or_error(*versions)
+    if error:
+        return error
+    summary = dict(result[0])
+    summary['heatmap_url'] = url_for('images.compare_versions_heatmap', version_id=version_id, other_id=other_id)
+    return jsonify(summary)
+
+
+@login_required
+def compare_versions_heatmap(version_id, other_id):
+    """Heatmap PNG of the per-pixel difference between two versions"""
+    versions, error = _load_pair(version_id, other_id)
+    if error:
+        return error
+    base, other = versions
+    etag = f'diff-{base.content_hash}-{other.content_hash}'
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        result, error = _diff_or_error(base, other)
+        if error:
+            return error
+        response = Response(result[1], mimetype='image/png')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, max-age=86400'
+    return response
@@ -0,0 +1,30 @@
+from flask import redirect, url_for, flash
+from flask_login import login_required, current_user
+from ... import db
+from ...models.image import TextureImage
+from ...utils.helpers import has_collection_permission
+from ...utils.deletion import request_image_deletion
+
+
+@login_required
+def delete_image(id):
+    """Delete an image and all of its versions"""
+    image = TextureImage.query.get_or_404(id)
+    collection = image.collection
+    
+    if not has_collection_permission(current_user, collection, 'write'):
+        flash('You do not have permission to delete images in this collection.')
+        return redirect(url_for('images.view_image', id=id))
+    
+    collection_id = collection.id
+    filename = image.filename
+    try:
+        # Hidden immediately; its versions are removed in the background
+        request_image_deletion(image)
+        flash(f'Deleted {filename}.')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error deleting image: {str(e)}')
+        return redirect(url_for('images.view_image', id=id))
+    
+    return redirect(url_for('collections.view_collection', id=collection_id))
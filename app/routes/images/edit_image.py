@@ -3,6 +3,7 @@ from flask_login import login_required, current_user
 from ... import db
 from ...models.image import TextureImage
 from ...utils.helpers import has_collection_permission
+from ...utils.cache import bump_collection_generation
 
 
 @login_required
@@ -20,12 +21,8 @@ def edit_image(id):
         image.original_filepath = request.form.get('original_filepath', image.original_filepath)
         
         db.session.commit()
+        bump_collection_generation(image.collection_id)
         flash('Image updated successfully!')
         return redirect(url_for('images.view_image', id=id))
     
     return render_template('edit_image.html', image=image, collection=collection)
-
-
-def register_route(app):
-    """Register the edit_image route with the Flask app"""
-    app.add_url_rule('/image/<int:id>/edit', 'images.edit_image', edit_image, methods=['GET', 'POST'])
@@ -1,9 +1,11 @@
 from flask import redirect, url_for, flash
 from flask_login import login_required, current_user
-import os
+from datetime import datetime
 from ... import db
-from ...models.image import TextureImage, ImageVersion
+from ...models.image import TextureImage
 from ...utils.helpers import has_collection_permission
+from ...utils.cache import bump_collection_generation
+from ...utils.publish import publish_payload
 
 
 @login_required
@@ -21,26 +23,22 @@ def publish_image(id):
     
     try:
         # Get current version data and write to original filepath
-        current_version = ImageVersion.query.filter_by(image_id=id, is_current=True).first()
-        if current_version and current_version.data:
-            # Ensure the directory exists
-            os.makedirs(os.path.dirname(image.original_filepath), exist_ok=True)
-            
-            # Write data to original filepath
-            with open(image.original_filepath, 'wb') as f:
-                f.write(current_version.data)
+        current_version = image.current_version
+        if current_version and current_version.size:
+            # Copied (zero-copy where possible) beside the target and renamed over it
+            method = publish_payload(current_version, image.original_filepath)
             
             image.is_published = True
+            current_version.published_at = datetime.utcnow()
             db.session.commit()
-            flash('Image published successfully!')
+            bump_collection_generation(collection.id)
+            if method == 'in place':
+                flash('Image published successfully! (already at its original path)')
+            else:
+                flash(f'Image published successfully! (written by {method})')
         else:
             flash('No current version found.')
     except Exception as e:
         flash(f'Error publishing image: {str(e)}')
     
     return redirect(url_for('images.view_image', id=id))
-
-
-def register_route(app):
-    """Register the publish_image route with the Flask app"""
-    app.add_url_rule('/image/<int:id>/publish', 'images.publish_image', publish_image)
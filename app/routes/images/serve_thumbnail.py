@@ -0,0 +1,39 @@
+from flask import request, Response, abort, current_app
+from flask_login import login_required, current_user
+from ...models.image import TextureImage
+from ...utils.helpers import has_collection_permission, make_thumbnail, UndecodableImageError
+from ...utils.blob_store import read_payload
+from ...utils.links import LinkedSourceError
+
+
+@login_required
+def serve_thumbnail(id):
+    """Serve a downscaled preview of the current version of an image.
+    
+    Thumbnails of public collections are visible to every signed-in user so
+    the discover page can show cover images before joining.
+    """
+    image = TextureImage.query.get_or_404(id)
+    collection = image.collection
+    
+    if not collection.is_public and not has_collection_permission(current_user, collection, 'read'):
+        abort(403)
+    
+    current_version = image.current_version
+    if not current_version or not current_version.size:
+        abort(404)
+    
+    size = current_app.config.get('THUMBNAIL_SIZE', 256)
+    etag = f'thumb-{current_version.id}-{size}'
+    if etag in request.if_none_match:
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    
+    try:
+        data, mime_type = make_thumbnail(read_payload(current_version), size)
+    except (UndecodableImageError, LinkedSourceError):
+        abort(404)
+    
+    response = Response(data, mimetype=mime_type)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, max-age=86400'
+    return response
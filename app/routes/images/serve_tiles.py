@@ -0,0 +1,43 @@
+from flask import abort
+from flask_login import login_required, current_user
+from ...models.image import ImageVersion
+from ...utils.helpers import has_collection_permission, UndecodableImageError
+from ...utils.links import LinkedSourceError
+from ...utils.tiles import descriptor_response, tile_response
+
+
+def _readable_version(version_id):
+    version = ImageVersion.query.get_or_404(version_id)
+    if version.image is None:
+        abort(404)  # Image deleted
+    if not has_collection_permission(current_user, version.image.collection, 'read'):
+        abort(403)
+    if not version.size:
+        abort(404)
+    return version
+
+
+@login_required
+def serve_tile_descriptor(version_id):
+    """Deep Zoom descriptor for a version's tile pyramid"""
+    version = _readable_version(version_id)
+    try:
+        response = descriptor_response(version)
+    except (UndecodableImageError, LinkedSourceError):
+        abort(404)
+    if response is None:
+        abort(404)
+    return response
+
+
+@login_required
+def serve_tile(version_id, level, col, row, ext):
+    """One 256px tile of a version's pyramid, built on first request"""
+    version = _readable_version(version_id)
+    try:
+        response = tile_response(version, level, col, row, ext)
+    except (UndecodableImageError, LinkedSourceError):
+        abort(404)
+    if response is None:
+        abort(404)
+    return response
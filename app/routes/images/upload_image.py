@@ -1,12 +1,18 @@
 from flask import render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
+import io
 import os
 import uuid
 from ... import db
 from ...models.collection import Collection
 from ...models.image import TextureImage, ImageVersion
+from ...models.storage import content_hash
 from ...utils.helpers import has_collection_permission, allowed_file, get_image_dimensions
+from ...utils.cache import bump_collection_generation
+from ...utils.versions import set_current_version
+from ...utils.quota import check_upload_quota
+from ...utils.blob_store import payload_location, stored_upload_path
 
 
 @login_required
@@ -37,10 +43,21 @@ def upload_image(id):
             file_data = file.read()
             file.seek(0)  # Reset file pointer
             
-            file.save(filepath)
+            quota_error = check_upload_quota(collection, current_user, file_data)
+            if quota_error:
+                flash(quota_error)
+                return redirect(request.url)
+            
+            digest = content_hash(file_data)
+            already_stored = payload_location(digest) is not None
+            existing_path = stored_upload_path(digest) if already_stored else None
+            if existing_path:
+                filepath = existing_path  # Bytes the vault already stores need no upload copy of their own
+            else:
+                file.save(filepath)
             
             # Get image dimensions
-            width, height = get_image_dimensions(filepath)
+            width, height = get_image_dimensions(io.BytesIO(file_data))
             
             # Create image record
             image = TextureImage(
@@ -63,21 +80,21 @@ def upload_image(id):
                 version_number=1,
                 filepath=filepath,
                 uploaded_by=current_user.id,
-                data=file_data,
-                is_current=True
+                data=file_data
             )
             
             db.session.add(version)
+            set_current_version(image, version)
             db.session.commit()
+            bump_collection_generation(id)
             
-            flash('Image uploaded successfully!')
+            if already_stored:
+                flash(f'Image uploaded successfully! Identical content is already in the vault, '
+                      f'so it was deduplicated ({len(file_data) / 1024:.1f} KB saved).')
+            else:
+                flash('Image uploaded successfully!')
             return redirect(url_for('collections.view_collection', id=id))
         else:
             flash('Invalid file type. Please upload an image file.')
     
     return render_template('upload_image.html', collection=collection)
-
-
-def register_route(app):
-    """Register the upload_image route with the Flask app"""
-    app.add_url_rule('/image/collection/<int:id>/upload', 'images.upload_image', upload_image, methods=['GET', 'POST'])
@@ -1,11 +1,17 @@
 from flask import request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
+import io
 import os
 import uuid
 from ... import db
 from ...models.image import TextureImage, ImageVersion
+from ...models.storage import content_hash
 from ...utils.helpers import has_collection_permission, allowed_file, get_image_dimensions
+from ...utils.cache import bump_collection_generation
+from ...utils.versions import set_current_version
+from ...utils.quota import check_upload_quota
+from ...utils.blob_store import payload_location, stored_upload_path
 
 
 @login_required
@@ -35,29 +41,37 @@ def upload_version(id):
     file_data = file.read()
     file.seek(0)  # Reset file pointer
     
-    file.save(filepath)
+    quota_error = check_upload_quota(collection, current_user, file_data)
+    if quota_error:
+        flash(quota_error)
+        return redirect(url_for('images.view_image', id=id))
+    
+    digest = content_hash(file_data)
+    already_stored = payload_location(digest) is not None
+    existing_path = stored_upload_path(digest) if already_stored else None
+    if existing_path:
+        filepath = existing_path  # Bytes the vault already stores need no upload copy of their own
+    else:
+        file.save(filepath)
     
     # Get next version number
     last_version = ImageVersion.query.filter_by(image_id=id).order_by(ImageVersion.version_number.desc()).first()
     next_version = (last_version.version_number + 1) if last_version else 1
     
-    # Mark all previous versions as not current
-    ImageVersion.query.filter_by(image_id=id).update({'is_current': False})
-    
-    # Create new version
+    # Create new version and make it current
     version = ImageVersion(
         image_id=id,
         version_number=next_version,
         filepath=filepath,
         uploaded_by=current_user.id,
-        data=file_data,
-        is_current=True
+        data=file_data
     )
     
     db.session.add(version)
+    set_current_version(image, version)
     
     # Update image with new dimensions and filepath
-    width, height = get_image_dimensions(filepath)
+    width, height = get_image_dimensions(io.BytesIO(file_data))
     image.current_filepath = filepath
     image.width = width
     image.height = height
@@ -67,11 +81,11 @@ def upload_version(id):
     image.is_published = False
     
     db.session.commit()
+    bump_collection_generation(collection.id)
     
-    flash('New version uploaded successfully!')
+    if already_stored:
+        flash(f'New version uploaded successfully! Identical content is already in the vault, '
+              f'so it was deduplicated ({len(file_data) / 1024:.1f} KB saved).')
+    else:
+        flash('New version uploaded successfully!')
     return redirect(url_for('images.view_image', id=id))
-
-
-def register_route(app):
-    """Register the upload_version route with the Flask app"""
-    app.add_url_rule('/image/<int:id>/upload_version', 'images.upload_version', upload_version, methods=['POST'])
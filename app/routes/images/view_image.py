@@ -15,8 +15,3 @@ def view_image(id):
     
     versions = ImageVersion.query.filter_by(image_id=id).order_by(ImageVersion.version_number.desc()).all()
     return render_template('view_image.html', image=image, collection=collection, versions=versions)
-
-
-def register_route(app):
-    """Register the view_image route with the Flask app"""
-    app.add_url_rule('/image/<int:id>', 'images.view_image', view_image)
@@ -1,7 +1,25 @@
-from flask import render_template, redirect, url_for, flash
+from flask import render_template, redirect, url_for, flash, request, jsonify, current_app
 from flask_login import login_required, current_user
+from sqlalchemy import func, or_
+from sqlalchemy.orm import joinedload
+from ... import db
 from ...models.user import User
 from ...models.collection import Collection
+from ...utils.helpers import get_collection_image_stats, prefix_search
+from ...utils.pagination import keyset_page
+from ...utils.user_cache import invalidate_user
+
+# Sort key -> keyset columns; each list is backed by an index
+USER_SORTS = {
+    'created_at': [User.created_at, User.id],
+    'username': [User.username, User.id],
+}
+
+COLLECTION_SORTS = {
+    'created_at': [Collection.created_at, Collection.id],
+    'name': [Collection.name, Collection.id],
+    'members': [Collection.member_count, Collection.id],
+}
 
 
 @login_required
@@ -9,12 +27,114 @@ def admin():
     if not current_user.is_admin:
         flash('Access denied. Admin privileges required.')
         return redirect(url_for('main.dashboard'))
-    
-    users = User.query.all()
-    collections = Collection.query.all()
-    return render_template('admin.html', users=users, collections=collections)
 
+    # Tables are filled incrementally from the JSON endpoints below
+    return render_template('admin.html',
+                         user_count=User.query.count(),
+                         collection_count=Collection.query.filter(Collection.deleted_at.is_(None)).count())
+
+
+def _page_args(sorts):
+    """Parse sort, direction, cursor and limit query parameters"""
+    sort = request.args.get('sort', 'created_at')
+    if sort not in sorts:
+        sort = 'created_at'
+    descending = request.args.get('dir', 'desc') != 'asc'
+    limit = request.args.get('limit', current_app.config.get('ADMIN_PAGE_SIZE', 50), type=int)
+    limit = max(1, min(limit, 200))
+    return sorts[sort], descending, request.args.get('cursor'), limit
+
+
+@login_required
+def admin_users_api():
+    """One page of users with their created-collection counts"""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Admin privileges required'}), 403
+
+    columns, descending, cursor, limit = _page_args(USER_SORTS)
+    query = User.query
+
+    search = request.args.get('q', '').strip()
+    if search:
+        query = query.filter(or_(prefix_search(User.username, search), prefix_search(User.email, search)))
+
+    users, next_cursor = keyset_page(query, columns, cursor, limit, descending)
+
+    # Created-collection counts for the whole page in one grouped query
+    user_ids = [user.id for user in users]
+    created_counts = dict(
+        db.session.query(Collection.created_by, func.count(Collection.id))
+        .filter(Collection.created_by.in_(user_ids))
+        .group_by(Collection.created_by)
+        .all()
+    ) if user_ids else {}
+
+    return jsonify({
+        'items': [{
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'is_admin': bool(user.is_admin),
+            'is_self': user.id == current_user.id,
+            'collections_created': created_counts.get(user.id, 0),
+            'created_at': user.created_at.strftime('%m/%d/%Y') if user.created_at else None,
+        } for user in users],
+        'next_cursor': next_cursor,
+    })
+
+
+@login_required
+def admin_collections_api():
+    """One page of collections with owner names and aggregated image counts"""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Admin privileges required'}), 403
+
+    columns, descending, cursor, limit = _page_args(COLLECTION_SORTS)
+    query = Collection.query.options(joinedload(Collection.creator)).filter(Collection.deleted_at.is_(None))
+
+    search = request.args.get('q', '').strip()
+    if search:
+        query = query.filter(prefix_search(Collection.name, search))
+
+    collections, next_cursor = keyset_page(query, columns, cursor, limit, descending)
+    stats = get_collection_image_stats([collection.id for collection in collections])
+
+    return jsonify({
+        'items': [{
+            'id': collection.id,
+            'name': collection.name,
+            'description': (collection.description or '')[:50],
+            'owner': collection.creator.username if collection.creator else None,
+            'is_public': collection.is_public,
+            'member_count': collection.member_count,
+            'image_count': stats.get(collection.id, {}).get('image_count', 0),
+            'created_at': collection.created_at.strftime('%m/%d/%Y') if collection.created_at else None,
+            'view_url': url_for('collections.view_collection', id=collection.id),
+            'edit_url': url_for('collections.edit_collection', id=collection.id),
+            'permissions_url': url_for('collections.manage_permissions', id=collection.id),
+            'delete_url': url_for('collections.delete_collection', id=collection.id),
+        } for collection in collections],
+        'next_cursor': next_cursor,
+    })
+
+
+@login_required
+def toggle_admin(id):
+    """Grant or revoke admin rights; admins cannot demote themselves"""
+    if not current_user.is_admin:
+        return jsonify({'error': 'Admin privileges required'}), 403
+
+    user = db.get_or_404(User, id)
+    if user.id == current_user.id:
+        return jsonify({'error': 'You cannot change your own admin status'}), 400
+
+    try:
+        user.is_admin = not user.is_admin
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Error updating user: {str(e)}'}), 500
 
-def register_route(app):
-    """Register the admin route with the Flask app"""
-    app.add_url_rule('/admin', 'main.admin', admin)
+    # Drop the cached login snapshot so the change applies on the next request
+    invalidate_user(user.id)
+    return jsonify({'id': user.id, 'is_admin': bool(user.is_admin)})
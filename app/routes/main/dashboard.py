@@ -7,6 +7,8 @@ from ...models.user import User
 from ...models.collection import Collection
 from ...models.image import TextureImage, ImageVersion
 from ...models.invitation import CollectionInvitation
+from ...utils.cache import cached_fragment, collection_generations, global_generation
+from ...utils.helpers import get_member_collection_ids
 
 
 @login_required
@@ -19,12 +21,33 @@ def dashboard():
         CollectionInvitation.expires_at > datetime.utcnow()
     ).all()
     
+    # Statistics, slideshows and collection list are served from the fragment cache.
+    # Admin stats cover every collection, so their key follows the global generation.
+    member_ids = get_member_collection_ids(current_user)
+    if current_user.is_admin:
+        cache_key = ('dashboard', current_user.id, True, global_generation(), tuple(member_ids))
+    else:
+        cache_key = ('dashboard', current_user.id, False, collection_generations(member_ids))
+    
+    dashboard_content = cached_fragment(
+        cache_key,
+        lambda: render_template('dashboard_content.html', **load_dashboard_data())
+    )
+    
+    return render_template('dashboard.html',
+                         dashboard_content=dashboard_content,
+                         pending_invitations=pending_invitations)
+
+
+def load_dashboard_data():
+    """Run the dashboard queries for the current user"""
     # Get collections user has access to
     if current_user.is_admin:
         # For admins, get collections they're members of
-        created_collections = Collection.query.filter_by(created_by=current_user.id).all()
+        created_collections = Collection.query.filter_by(created_by=current_user.id, deleted_at=None).all()
         permitted_collection_ids = [p.collection_id for p in current_user.collection_permissions]
-        permitted_collections = Collection.query.filter(Collection.id.in_(permitted_collection_ids)).all()
+        permitted_collections = Collection.query.filter(Collection.id.in_(permitted_collection_ids),
+                                                         Collection.deleted_at.is_(None)).all()
         member_collections = list(set(created_collections + permitted_collections))
         
         collections = member_collections
@@ -37,14 +60,15 @@ def dashboard():
         
         # Get recent images for admin (all images)
         recent_images = TextureImage.query.order_by(desc(TextureImage.created_at)).limit(10).all()
-        recently_updated = TextureImage.query.join(ImageVersion).filter(
-            ImageVersion.is_current == True
+        recently_updated = db.session.query(TextureImage, ImageVersion.uploaded_at).join(
+            ImageVersion, ImageVersion.id == TextureImage.current_version_id
         ).order_by(desc(ImageVersion.uploaded_at)).limit(10).all()
     else:
         # Get collections user created or has permissions for
-        created_collections = Collection.query.filter_by(created_by=current_user.id).all()
+        created_collections = Collection.query.filter_by(created_by=current_user.id, deleted_at=None).all()
         permitted_collection_ids = [p.collection_id for p in current_user.collection_permissions]
-        permitted_collections = Collection.query.filter(Collection.id.in_(permitted_collection_ids)).all()
+        permitted_collections = Collection.query.filter(Collection.id.in_(permitted_collection_ids),
+                                                         Collection.deleted_at.is_(None)).all()
         collections = list(set(created_collections + permitted_collections))
         user_count = 1
         
@@ -70,25 +94,19 @@ def dashboard():
                 TextureImage.collection_id.in_(accessible_collection_ids)
             ).order_by(desc(TextureImage.created_at)).limit(10).all()
             
-            recently_updated = TextureImage.query.join(ImageVersion).filter(
-                TextureImage.collection_id.in_(accessible_collection_ids),
-                ImageVersion.is_current == True
+            recently_updated = db.session.query(TextureImage, ImageVersion.uploaded_at).join(
+                ImageVersion, ImageVersion.id == TextureImage.current_version_id
+            ).filter(
+                TextureImage.collection_id.in_(accessible_collection_ids)
             ).order_by(desc(ImageVersion.uploaded_at)).limit(10).all()
         else:
             recent_images = []
             recently_updated = []
     
-    return render_template('dashboard.html', 
-                         collections=collections, 
-                         current_time=datetime.utcnow(),
-                         user_count=user_count,
-                         total_images=total_images,
-                         recent_uploads=recent_uploads,
-                         recent_images=recent_images,
-                         recently_updated=recently_updated,
-                         pending_invitations=pending_invitations)
-
-
-def register_route(app):
-    """Register the dashboard route with the Flask app"""
-    app.add_url_rule('/dashboard', 'main.dashboard', dashboard)
+    return dict(collections=collections,
+                current_time=datetime.utcnow(),
+                user_count=user_count,
+                total_images=total_images,
+                recent_uploads=recent_uploads,
+                recent_images=recent_images,
+                recently_updated=recently_updated)
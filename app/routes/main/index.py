@@ -6,8 +6,3 @@ def index():
     if current_user.is_authenticated:
         return redirect(url_for('main.dashboard'))
     return render_template('index.html')
-
-
-def register_route(app):
-    """Register the index route with the Flask app"""
-    app.add_url_rule('/', 'main.index', index)
@@ -0,0 +1,45 @@
+from flask import render_template, redirect, url_for, flash, request, current_app
+from flask_login import login_required, current_user
+from datetime import datetime
+from ...utils.instrumentation import get_request_metrics, HISTOGRAM_BUCKETS_MS
+
+
+@login_required
+def performance():
+    """Show the slowest endpoints recorded by the request instrumentation"""
+    if not current_user.is_admin:
+        flash('Access denied. Admin privileges required.')
+        return redirect(url_for('main.dashboard'))
+    
+    metrics = get_request_metrics(current_app)
+    if metrics is None:
+        flash('Request metrics are disabled (REQUEST_METRICS_ENABLED).')
+        return redirect(url_for('main.admin'))
+    
+    sort_by = request.args.get('sort', 'p95_ms')
+    if sort_by not in ('p95_ms', 'avg_ms', 'max_ms', 'count', 'avg_queries', 'db_p95_ms'):
+        sort_by = 'p95_ms'
+    
+    endpoints = metrics.summaries(sort_by=sort_by, limit=50)
+    payload_cache = current_app.extensions.get('payload_cache')
+    return render_template('admin_performance.html',
+                         endpoints=endpoints,
+                         payload_stats=payload_cache.stats() if payload_cache else None,
+                         sort_by=sort_by,
+                         buckets=HISTOGRAM_BUCKETS_MS,
+                         started_at=datetime.fromtimestamp(metrics.started_at),
+                         sample_size=metrics.sample_size)
+
+
+@login_required
+def reset_performance():
+    """Clear all recorded request metrics"""
+    if not current_user.is_admin:
+        flash('Access denied. Admin privileges required.')
+        return redirect(url_for('main.dashboard'))
+    
+    metrics = get_request_metrics(current_app)
+    if metrics is not None:
+        metrics.reset()
+        flash('Request metrics have been reset.')
+    return redirect(url_for('main.performance'))
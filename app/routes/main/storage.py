@@ -0,0 +1,73 @@
+from flask import render_template, redirect, url_for, flash, request, current_app
+from flask_login import login_required, current_user
+from sqlalchemy import func
+from ... import db
+from ...models.user import User
+from ...models.collection import Collection
+from ...models.storage import StorageUsage, COLLECTION_SCOPE, USER_SCOPE
+from ...utils.quota import effective_quota, MB
+
+
+def _top_consumers(scope, model, limit=25):
+    """Largest ledger rows for a scope paired with their collection or user"""
+    rows = (StorageUsage.query
+            .filter_by(scope=scope)
+            .order_by(StorageUsage.physical_bytes.desc())
+            .limit(limit)
+            .all())
+    owners = {o.id: o for o in model.query.filter(model.id.in_([r.scope_id for r in rows])).all()} if rows else {}
+    return [{
+        'usage': row,
+        'owner': owners.get(row.scope_id),
+        'quota': effective_quota(scope, owners.get(row.scope_id)),
+    } for row in rows]
+
+
+@login_required
+def storage():
+    """Show which collections and uploaders use the most storage"""
+    if not current_user.is_admin:
+        flash('Access denied. Admin privileges required.')
+        return redirect(url_for('main.dashboard'))
+
+    totals = db.session.query(
+        func.coalesce(func.sum(StorageUsage.logical_bytes), 0),
+        func.coalesce(func.sum(StorageUsage.physical_bytes), 0),
+        func.coalesce(func.sum(StorageUsage.version_count), 0)
+    ).filter(StorageUsage.scope == COLLECTION_SCOPE).one()
+
+    return render_template('admin_storage.html',
+                         collections=_top_consumers(COLLECTION_SCOPE, Collection),
+                         users=_top_consumers(USER_SCOPE, User),
+                         totals=totals,
+                         mb=MB,
+                         default_collection_quota=current_app.config.get('STORAGE_QUOTA_COLLECTION_MB'),
+                         default_user_quota=current_app.config.get('STORAGE_QUOTA_USER_MB'))
+
+
+@login_required
+def set_storage_quota():
+    """Set or clear the quota of one collection or user (blank means default)"""
+    if not current_user.is_admin:
+        flash('Access denied. Admin privileges required.')
+        return redirect(url_for('main.dashboard'))
+
+    scope = request.form.get('scope')
+    model = {COLLECTION_SCOPE: Collection, USER_SCOPE: User}.get(scope)
+    if model is None:
+        flash('Unknown quota scope.')
+        return redirect(url_for('main.storage'))
+
+    owner = db.get_or_404(model, request.form.get('scope_id', type=int))
+    quota_mb = request.form.get('quota_mb', '').strip()
+    try:
+        owner.storage_quota = int(float(quota_mb) * MB) if quota_mb else None
+        db.session.commit()
+        flash('Storage quota updated.')
+    except ValueError:
+        flash('Quota must be a number of megabytes.')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error updating quota: {str(e)}')
+
+    return redirect(url_for('main.storage'))
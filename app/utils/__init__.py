@@ -1,3 +1,3 @@
-from .helpers import allowed_file, get_image_dimensions, has_collection_permission
+from .helpers import allowed_file, get_image_dimensions, has_collection_permission, get_collection_permission_levels, permission_at_least, get_member_collection_ids, get_collection_image_stats, make_thumbnail, prefix_search
 
-__all__ = ['allowed_file', 'get_image_dimensions', 'has_collection_permission']
+__all__ = ['allowed_file', 'get_image_dimensions', 'has_collection_permission', 'get_collection_permission_levels', 'permission_at_least', 'get_member_collection_ids', 'get_collection_image_stats', 'make_thumbnail', 'prefix_search']
@@ -0,0 +1,107 @@
+"""Helpers shared by the JSON API (``/api/v1``).
+
+Requests authenticate with ``Authorization: Bearer <token>`` using a token
+created on the profile page. Every response body is JSON; successful GET
+responses carry a strong ETag of the body so polling clients can send
+``If-None-Match`` and receive an empty 304 when nothing changed.
+"""
+import hashlib
+import json
+from datetime import datetime, timedelta
+from functools import wraps
+
+from flask import request, g, Response, current_app
+
+from .. import db
+from ..models.api_token import ApiToken
+
+# Only refresh last_used_at this often, so read-only polling does not write on every call
+LAST_USED_RESOLUTION = timedelta(minutes=1)
+
+
+def api_error(message, status):
+    return json_response({'error': message}, status=status)
+
+
+def json_response(payload, status=200):
+    """Serialize payload; GETs with a matching If-None-Match get a 304 instead"""
+    body = json.dumps(payload, separators=(',', ':'), sort_keys=True, default=_json_default)
+    response = Response(body, status=status, mimetype='application/json')
+    if request.method == 'GET' and status == 200:
+        etag = hashlib.sha256(body.encode('utf-8')).hexdigest()[:32]
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        if etag in request.if_none_match:
+            response.status_code = 304
+            response.set_data(b'')
+    return response
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def token_required(view):
+    """Authenticate the request by bearer token and expose the user as g.api_user"""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        scheme, _, raw = request.headers.get('Authorization', '').partition(' ')
+        if scheme.lower() != 'bearer' or not raw.strip():
+            return api_error('Missing bearer token', 401)
+        token = ApiToken.query.filter_by(token_hash=ApiToken.hash_token(raw.strip())).first()
+        if token is None:
+            return api_error('Invalid API token', 401)
+
+        now = datetime.utcnow()
+        if token.last_used_at is None or now - token.last_used_at > LAST_USED_RESOLUTION:
+            # Conditional, so concurrent first calls in a window (other workers) write once
+            tokens = ApiToken.__table__
+            db.session.execute(tokens.update().where(
+                tokens.c.id == token.id,
+                tokens.c.last_used_at.is_(None) | (tokens.c.last_used_at < now - LAST_USED_RESOLUTION)
+            ).values(last_used_at=now))
+            db.session.commit()
+        g.api_user = token.user
+        return view(*args, **kwargs)
+    return wrapped
+
+
+def request_json():
+    """The request body as a dict, or None when it is not a JSON object"""
+    payload = request.get_json(silent=True)
+    return payload if isinstance(payload, dict) else None
+
+
+def parse_fields(raw, allowed, default):
+    """Validate a comma-separated ?fields= list; returns (fields, error message)"""
+    if not raw:
+        return list(default), None
+    fields = list(dict.fromkeys(field.strip() for field in raw.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        return None, f"Unknown fields: {', '.join(unknown)}"
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    return fields, None
+
+
+def is_json_id(value):
+    """True for a JSON integer; bool is a subclass of int but true/false are not ids"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def parse_ids(raw):
+    """Integer ids from a list or a comma-separated string; None when malformed or too many"""
+    if isinstance(raw, str):
+        raw = [value for value in raw.split(',') if value.strip()]
+    if not isinstance(raw, list) or any(isinstance(value, bool) for value in raw):
+        return None
+    try:
+        ids = list(dict.fromkeys(int(value) for value in raw))
+    except (TypeError, ValueError):
+        return None
+    if len(ids) > current_app.config.get('API_BATCH_LIMIT', 500):
+        return None
+    return ids
@@ -0,0 +1,383 @@
+"""Read-through payload storage for multi-node deployments.
+
+Version payloads are read through a ``BlobStore``: a per-node, size-bounded
+disk cache (``BLOB_CACHE_DIR``, LRU by last read) in front of a shared origin.
+Every payload is named by its content hash, so any node can fetch any version
+and cached copies never go stale. Bytes are checked against the hash when
+they are fetched from the origin and, with ``BLOB_CACHE_VERIFY_READS``, on
+every cache read; a corrupt cached copy is dropped and fetched again.
+
+Origins:
+
+* ``database`` reads ``image_version.data`` (the system of record, one stored
+  copy per hash), which every node can reach through the shared database.
+* ``directory`` makes ``<BLOB_ORIGIN_DIR>/<aa>/<hash>`` in a shared (e.g. NFS)
+  directory the system of record. New payloads are written there before
+  their row is inserted, and the row keeps ``data`` empty with
+  ``payload_in_origin`` set. Rows from before the switch still store their
+  bytes in the database until ``move_payloads_to_origin.py`` moves them; until
+  then a read that misses the directory falls back to the database and
+  writes the file back.
+
+In front of both, ``PAYLOAD_CACHE_MB`` keeps the most recently served payloads
+in process memory, so popular textures skip the disk and the database entirely.
+
+With the directory origin, ``SENDFILE_MODE`` hands original payloads to the
+front web server instead: the view checks permissions and answers with an
+``X-Accel-Redirect`` (nginx) or ``X-Sendfile`` (Apache, lighttpd) header naming
+the file, and the server sends the bytes itself without occupying a worker.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from dataclasses import dataclass
+
+from flask import Response, current_app
+from sqlalchemy import event, select, func
+
+from .. import db
+from ..models.image import ImageVersion
+from ..models.storage import content_hash, stores_payload
+from .cache import ByteLRUCache
+from .dedup import stored_payload, version_payload, is_stored, BATCH_SIZE
+from .links import read_linked
+from .transcode import TranscodeCache
+
+
+class DatabaseOrigin:
+    """Payloads read straight from image_version.data"""
+
+    name = 'database'
+
+    def get(self, digest, version_id):
+        return stored_payload(digest)  # Any version storing the hash; duplicates store nothing
+
+    def put(self, digest, data):
+        pass  # Already stored with the version
+
+
+class DirectoryOrigin:
+    """Content-addressed files in a shared directory, backfilled from the database"""
+
+    name = 'directory'
+
+    def __init__(self, root, fallback=None):
+        self.root = root
+        self.fallback = fallback or DatabaseOrigin()
+
+    def path(self, digest):
+        """Where the payload with this hash is (or would be) stored"""
+        return os.path.join(self.root, digest[:2], digest)
+
+    def get(self, digest, version_id):
+        try:
+            with open(self.path(digest), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+        data = self.fallback.get(digest, version_id)
+        if data is not None and hashlib.sha256(data).hexdigest() == digest:
+            self.put(digest, data)
+        return data
+
+    def put(self, digest, data):
+        path = self.path(digest)
+        try:
+            os.utime(path)  # Same hash, same bytes; the fresh mtime keeps the upload GC off it
+            return
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and renamed so other nodes never read a partial file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())  # The origin may hold the only copy
+        os.replace(temp_path, path)
+
+    def discard(self, digest):
+        try:
+            os.unlink(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+
+class BlobStore:
+    """Local disk cache in front of an origin"""
+
+    def __init__(self, origin, cache=None, verify_reads=True):
+        self.origin = origin
+        self.cache = cache
+        self.verify_reads = verify_reads
+        self._lock = threading.Lock()
+        self.origin_reads = 0
+        self.corrupt = 0
+        self.offloaded = 0
+
+    def read(self, version):
+        """Payload bytes of a version"""
+        digest = version.content_hash
+        if not digest:
+            return version_payload(version)
+        if self.cache is not None:
+            data = self.cache.get(digest)
+            if data is not None:
+                if not self.verify_reads or hashlib.sha256(data).hexdigest() == digest:
+                    return data
+                self._count_corrupt('Cached payload %s failed its checksum; fetching it again', digest)
+                self.cache.discard(digest)
+
+        data = self.origin.get(digest, version.id)
+        with self._lock:
+            self.origin_reads += 1
+        if data is None or hashlib.sha256(data).hexdigest() != digest:
+            self._count_corrupt('Origin payload %s failed its checksum; reading the database', digest)
+            data = version_payload(version)
+            if data and isinstance(self.origin, DirectoryOrigin) and hashlib.sha256(data).hexdigest() == digest:
+                # Repaired from a copy not yet moved out of the database; otherwise the file is kept as is
+                self.origin.discard(digest)
+                self.origin.put(digest, data)
+            return data
+        if self.cache is not None:
+            self.cache.put(digest, data)
+        return data
+
+    def _count_corrupt(self, message, digest):
+        with self._lock:
+            self.corrupt += 1
+        current_app.logger.warning(message, digest)
+
+    def stats(self):
+        with self._lock:
+            result = {'origin': self.origin.name, 'origin_reads': self.origin_reads, 'corrupt': self.corrupt,
+                      'offloaded': self.offloaded}
+        if self.cache is not None:
+            result['cache'] = self.cache.stats()
+        return result
+
+
+def read_payload(version):
+    """Payload bytes of a version: from the in-memory cache, else its linked source, the blob store or the database"""
+    memory = current_app.extensions.get('payload_cache')
+    if memory is not None and version.content_hash:
+        data = memory.get(version.content_hash)
+        if data is not None:
+            return data
+
+    store = current_app.extensions.get('blob_store')
+    if version.link_path:
+        data = read_linked(version)
+    else:
+        data = version_payload(version) if store is None else store.read(version)
+    # Payloads are immutable per hash, so an entry never needs invalidating
+    if memory is not None and version.content_hash and data:
+        memory.set(version.content_hash, data)
+    return data
+
+
+SENDFILE_MODES = ('x-accel-redirect', 'x-sendfile')
+
+
+def payload_file(version):
+    """Path of the version's payload in the directory origin, or None when it has no file.
+
+    A payload not yet copied to the origin is read once, which backfills it.
+    """
+    store = current_app.extensions.get('blob_store')
+    if store is None or not isinstance(store.origin, DirectoryOrigin) or not version.content_hash \
+            or version.link_path:
+        return None
+    path = store.origin.path(version.content_hash)
+    if not os.path.exists(path):
+        store.read(version)
+        if not os.path.exists(path):
+            return None
+    return path
+
+
+def sendfile_response(version, mimetype):
+    """Response telling the front web server to send the version's payload file, or None.
+
+    None (serve the bytes from Python) unless SENDFILE_MODE is set and the
+    payload is a file in the directory origin.
+    """
+    mode = current_app.config.get('SENDFILE_MODE')
+    path = payload_file(version) if mode else None
+    if path is None:
+        return None
+
+    digest = version.content_hash
+    store = current_app.extensions['blob_store']
+    response = Response(mimetype=mimetype)
+    if mode == 'x-accel-redirect':
+        prefix = current_app.config.get('SENDFILE_ACCEL_PREFIX', '/_blobs/').rstrip('/')
+        response.headers['X-Accel-Redirect'] = f'{prefix}/{digest[:2]}/{digest}'
+    else:
+        response.headers['X-Sendfile'] = os.path.abspath(path)
+    with store._lock:
+        store.offloaded += 1
+    return response
+
+
+def init_payload_cache(app):
+    """Create the in-memory LRU of served payloads when PAYLOAD_CACHE_MB is set"""
+    max_mb = app.config.get('PAYLOAD_CACHE_MB', 0)
+    if not max_mb:
+        return None
+    cache = ByteLRUCache(int(max_mb * 1024 * 1024),
+                         int(app.config.get('PAYLOAD_CACHE_MAX_ITEM_MB', 16) * 1024 * 1024))
+    app.extensions['payload_cache'] = cache
+    return cache
+
+
+def _directory_origin():
+    store = current_app.extensions.get('blob_store')
+    return store.origin if store is not None and isinstance(store.origin, DirectoryOrigin) else None
+
+
+def payload_location(digest):
+    """Where the vault already stores the payload with this hash: 'origin', 'database' or None"""
+    origin = _directory_origin()
+    if origin is not None and os.path.exists(origin.path(digest)):
+        return 'origin'
+    return 'database' if is_stored(digest) else None
+
+
+def stored_upload_path(digest):
+    """Upload-folder path of an existing file with this payload, or None.
+
+    Uploads of bytes the vault already stores record this path instead of
+    writing a copy of their own, so every recorded path exists on disk.
+    """
+    versions = ImageVersion.__table__
+    paths = db.session.execute(
+        select(versions.c.filepath).where(versions.c.content_hash == digest).distinct().limit(20)
+    ).scalars()
+    for path in paths:
+        if not path:
+            continue
+        try:
+            os.utime(path)  # The fresh mtime keeps the upload GC off a file it is about to reference again
+            return path
+        except OSError:
+            continue
+    return None
+
+
+def _store_in_origin(mapper, connection, version):
+    """Write a new payload to the directory origin before its row goes in; the row keeps no copy.
+
+    A failed write fails the insert. Files left by transactions that roll back
+    are unreferenced and removed by the upload GC after its grace period.
+    """
+    origin = _directory_origin()
+    if origin is None or not version.data or version.link_path:
+        return
+    version.size = len(version.data)
+    version.content_hash = content_hash(version.data)
+    origin.put(version.content_hash, version.data)
+    version.data = b''
+    version.payload_shared = False
+    version.payload_in_origin = True
+
+
+@dataclass
+class OriginMoveReport:
+    """Outcome of one move_payloads_to_origin run"""
+    hashes: int = 0
+    versions: int = 0
+    bytes: int = 0
+
+    def summary(self):
+        return (f'{self.hashes} payloads ({self.bytes / (1024 * 1024):.1f} MB) stored in the database '
+                f'for {self.versions} versions')
+
+
+def move_payloads_to_origin(dry_run=False, batch_size=BATCH_SIZE):
+    """Write payloads still stored in the database to the directory origin and empty their rows.
+
+    Every version of a moved hash, shared or not, then reads from the origin.
+    Each batch of hashes is one transaction, committed only after its files
+    are written. Returns an OriginMoveReport.
+    """
+    origin = _directory_origin()
+    if origin is None:
+        raise ValueError('BLOB_ORIGIN must be "directory" to move payloads to it')
+    versions = ImageVersion.__table__
+    unmoved = versions.c.payload_in_origin.is_(False) & versions.c.link_path.is_(None)
+
+    report = OriginMoveReport()
+    holders = db.session.execute(
+        select(versions.c.id, versions.c.content_hash, versions.c.size).where(stores_payload(versions))
+        .order_by(versions.c.id)
+    ).all()
+    first = {}
+    for version_id, digest, size in holders:
+        if digest not in first:
+            first[digest] = version_id
+            report.hashes += 1
+            report.bytes += size or 0
+    if report.hashes:
+        report.versions = db.session.execute(
+            select(func.count()).where(unmoved, versions.c.content_hash.in_(list(first)))
+        ).scalar()
+    if dry_run:
+        return report
+
+    batch = list(first.items())
+    for start in range(0, len(batch), batch_size):
+        chunk = dict(batch[start:start + batch_size])
+        try:
+            stored = db.session.execute(
+                select(versions.c.content_hash, versions.c.data).where(versions.c.id.in_(list(chunk.values()))),
+                execution_options={'yield_per': 8}
+            )
+            for digest, data in stored:
+                if content_hash(data) != digest:
+                    raise ValueError(f'Stored payload {digest} does not match its hash; not moved')
+                origin.put(digest, data)
+            db.session.execute(
+                versions.update().where(unmoved, versions.c.content_hash.in_(list(chunk)))
+                .values(data=b'', payload_shared=False, payload_in_origin=True)
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    return report
+
+
+def init_blob_store(app):
+    """Create the blob store when a shared origin or the local cache is configured"""
+    origin_name = app.config.get('BLOB_ORIGIN', 'database')
+    cache_enabled = app.config.get('BLOB_CACHE_ENABLED', False)
+    sendfile_mode = app.config.get('SENDFILE_MODE')
+    if sendfile_mode and sendfile_mode not in SENDFILE_MODES:
+        raise ValueError(f'Unknown SENDFILE_MODE {sendfile_mode!r}')
+    if sendfile_mode and origin_name != 'directory':
+        app.logger.warning('SENDFILE_MODE needs BLOB_ORIGIN = "directory"; payloads are served by the app')
+    if origin_name == 'database' and not cache_enabled:
+        return None
+
+    if origin_name == 'directory':
+        root = app.config.get('BLOB_ORIGIN_DIR')
+        if not root:
+            raise ValueError('BLOB_ORIGIN_DIR must be set when BLOB_ORIGIN is "directory"')
+        origin = DirectoryOrigin(root)
+        if not event.contains(ImageVersion, 'before_insert', _store_in_origin):
+            # Ahead of the ledger's fingerprint listener, which then sees an empty, already hashed row
+            event.listen(ImageVersion, 'before_insert', _store_in_origin, insert=True)
+    elif origin_name == 'database':
+        origin = DatabaseOrigin()
+    else:
+        raise ValueError(f'Unknown BLOB_ORIGIN {origin_name!r}')
+
+    cache = None
+    if cache_enabled:
+        directory = app.config.get('BLOB_CACHE_DIR') or os.path.join(app.instance_path, 'blob_cache')
+        cache = TranscodeCache(directory, int(app.config.get('BLOB_CACHE_MAX_MB', 4096) * 1024 * 1024))
+    store = BlobStore(origin, cache, verify_reads=app.config.get('BLOB_CACHE_VERIFY_READS', True))
+    app.extensions['blob_store'] = store
+    return store
@@ -0,0 +1,230 @@
+"""In-process fragment cache for expensive rendered pages.
+
+Rendered HTML fragments are kept in a size-bounded LRU with TTL expiry. Cache
+keys embed per-collection generation counters, which routes bump after they
+commit a change (upload, permission change, collection edit or delete), so a
+stale fragment is never looked up again once its data has changed.
+
+The counters live in the cache_generation table, so a bump made by one worker
+process or node invalidates the fragments every other process has cached. Each
+request reads the counters it needs once.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, g
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from .. import db
+from ..models.cache_generation import CacheGeneration, COLLECTION_SCOPE, GLOBAL_SCOPE
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a maximum entry count and per-entry TTL"""
+
+    def __init__(self, max_entries=256, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+class ByteLRUCache:
+    """Thread-safe LRU of bytes values bounded by their total size"""
+
+    def __init__(self, max_bytes, max_item_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = min(max_item_bytes or max_bytes, max_bytes)
+        self._entries = OrderedDict()
+        self._total = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store value unless it is larger than max_item_bytes, evicting the least recently used"""
+        if len(value) > self.max_item_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total -= len(previous)
+            self._entries[key] = value
+            self._total += len(value)
+            while self._total > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total -= len(evicted)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+def init_fragment_cache(app):
+    """Create the fragment cache for the app when FRAGMENT_CACHE_ENABLED is set"""
+    if not app.config.get('FRAGMENT_CACHE_ENABLED', True):
+        return None
+    cache = LRUCache(
+        max_entries=app.config.get('FRAGMENT_CACHE_MAX_ENTRIES', 256),
+        ttl=app.config.get('FRAGMENT_CACHE_TTL', 60)
+    )
+    app.extensions['fragment_cache'] = cache
+    return cache
+
+
+def get_fragment_cache():
+    """Return the current app's fragment cache, or None when disabled"""
+    return current_app.extensions.get('fragment_cache')
+
+
+def _bump(session, scope, scope_ids):
+    generations = CacheGeneration.__table__
+    for scope_id in scope_ids:
+        increment = (generations.update()
+                     .where(generations.c.scope == scope, generations.c.scope_id == scope_id)
+                     .values(generation=generations.c.generation + 1))
+        if session.execute(increment).rowcount:
+            continue
+        try:
+            with session.begin_nested():
+                session.execute(generations.insert().values(scope=scope, scope_id=scope_id, generation=1))
+        except IntegrityError:
+            session.execute(increment)  # Another process created the row first
+
+
+def bump_collection_generation(*collection_ids, session=None):
+    """Invalidate cached fragments that include the given collections, in every process.
+
+    Without a session the bump is committed on db.session, so call it after
+    committing the change itself. Pass a session to make the bump part of that
+    session's transaction instead.
+    """
+    if get_fragment_cache() is None or not collection_ids:
+        return
+    own_session = session is None
+    session = db.session if own_session else session
+    _bump(session, COLLECTION_SCOPE, sorted(set(collection_ids)))
+    _bump(session, GLOBAL_SCOPE, [0])
+    if own_session:
+        session.commit()
+    g.pop('cache_generations', None)
+
+
+def bump_global_generation():
+    """Invalidate cached fragments that depend on vault-wide data"""
+    if get_fragment_cache() is None:
+        return
+    _bump(db.session, GLOBAL_SCOPE, [0])
+    db.session.commit()
+    g.pop('cache_generations', None)
+
+
+def _generations(scope, scope_ids):
+    """Counters for scope_ids, read from the database at most once per request"""
+    known = g.setdefault('cache_generations', {})
+    missing = [scope_id for scope_id in scope_ids if (scope, scope_id) not in known]
+    if missing:
+        generations = CacheGeneration.__table__
+        for i in range(0, len(missing), 500):
+            chunk = missing[i:i + 500]
+            found = dict(db.session.execute(
+                select(generations.c.scope_id, generations.c.generation)
+                .where(generations.c.scope == scope, generations.c.scope_id.in_(chunk))
+            ).all())
+            known.update(((scope, scope_id), found.get(scope_id, 0)) for scope_id in chunk)
+    return [known[(scope, scope_id)] for scope_id in scope_ids]
+
+
+def collection_generations(collection_ids):
+    """Key component pairing each collection id with its generation"""
+    if get_fragment_cache() is None:
+        return ()
+    collection_ids = list(collection_ids)
+    return tuple(zip(collection_ids, _generations(COLLECTION_SCOPE, collection_ids)))
+
+
+def global_generation():
+    if get_fragment_cache() is None:
+        return 0
+    return _generations(GLOBAL_SCOPE, [0])[0]
+
+
+def cached_fragment(key, render):
+    """Return the cached fragment for key, rendering and storing it on a miss"""
+    cache = get_fragment_cache()
+    if cache is None:
+        return render()
+    fragment = cache.get(key)
+    if fragment is None:
+        fragment = render()
+        cache.set(key, fragment)
+    return fragment
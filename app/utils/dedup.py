@@ -0,0 +1,158 @@
+"""Vault-wide deduplication of version payloads.
+
+Every payload is hashed as its version is inserted. When another version
+already stores the same bytes, the new version keeps ``data`` empty and sets
+``payload_shared``; reads fetch the bytes from any version that stores that
+hash. This covers uploads, imports, restores and copies alike.
+
+Stored bytes must outlive the versions that share them, so bulk deletes call
+``rehome_payloads`` first: for each hash whose last stored copy is about to be
+deleted, the bytes are moved into one surviving shared version. The
+DELETE itself adds ``deletable_versions``: a version that started sharing a
+payload after ``rehome_payloads`` ran (an upload committed in between) keeps
+its holder alive, and the holder is rehomed by the caller's next batch. The
+insert side needs no such guard because the dedup check runs in the
+inserting flush, inside the inserting transaction.
+``dedupe_payloads.py`` converts duplicates that predate this in place.
+"""
+from dataclasses import dataclass
+
+from sqlalchemy import select, func, bindparam, exists
+
+from .. import db
+from ..models.image import ImageVersion
+from ..models.storage import stores_payload
+
+BATCH_SIZE = 200
+
+
+def stored_payload(digest):
+    """Bytes of any version storing the payload with this hash, or None"""
+    versions = ImageVersion.__table__
+    return db.session.execute(
+        select(versions.c.data).where(versions.c.content_hash == digest, stores_payload(versions)).limit(1)
+    ).scalar()
+
+
+def is_stored(digest):
+    """Whether some version already stores the payload with this hash"""
+    versions = ImageVersion.__table__
+    return db.session.execute(
+        select(versions.c.id).where(versions.c.content_hash == digest, stores_payload(versions)).limit(1)
+    ).first() is not None
+
+
+def version_payload(version):
+    """A version's bytes from the database, following shared payloads to the version storing them.
+
+    Versions whose payload is in the blob origin only find bytes here while
+    an unmoved duplicate still stores them.
+    """
+    if version.payload_shared or version.payload_in_origin:
+        return stored_payload(version.content_hash)
+    return version.data
+
+
+def rehome_payloads(version_ids):
+    """Before version_ids are deleted, move bytes they alone store into a surviving shared version.
+
+    Runs in the caller's transaction with a fixed number of statements.
+    """
+    versions = ImageVersion.__table__
+    ids = list(version_ids)
+    doomed = dict(db.session.execute(
+        select(versions.c.content_hash, func.min(versions.c.id))
+        .where(versions.c.id.in_(ids), stores_payload(versions))
+        .group_by(versions.c.content_hash)
+    ).all())
+    if not doomed:
+        return 0
+
+    surviving = set(db.session.execute(
+        select(versions.c.content_hash).distinct()
+        .where(versions.c.content_hash.in_(list(doomed)), versions.c.id.notin_(ids), stores_payload(versions))
+    ).scalars())
+    orphaned = [digest for digest in doomed if digest not in surviving]
+    if not orphaned:
+        return 0
+
+    heirs = db.session.execute(
+        select(versions.c.content_hash, func.min(versions.c.id))
+        .where(versions.c.content_hash.in_(orphaned), versions.c.id.notin_(ids),
+               versions.c.payload_shared.is_(True), versions.c.payload_in_origin.is_(False))
+        .group_by(versions.c.content_hash)
+    ).all()
+    if heirs:
+        holder = versions.alias('holder')
+        db.session.execute(
+            versions.update().where(versions.c.id == bindparam('heir_id')).values(
+                data=select(holder.c.data).where(holder.c.id == bindparam('holder_id')).scalar_subquery(),
+                payload_shared=False),
+            [{'heir_id': heir_id, 'holder_id': doomed[digest]} for digest, heir_id in heirs]
+        )
+    return len(heirs)
+
+
+def deletable_versions(version_ids):
+    """Condition for a DELETE of version_ids: spares rows that would strand a sharer added after rehoming.
+
+    A row may go when it stores no payload, when another version outside
+    version_ids also stores that payload, or when no version outside them shares it.
+    """
+    versions = ImageVersion.__table__
+    other = versions.alias('other')
+    ids = list(version_ids)
+    outside = other.c.id.notin_(ids) & (other.c.content_hash == versions.c.content_hash)
+    return (~stores_payload(versions)
+            | exists().where(outside, stores_payload(other))
+            | ~exists().where(outside, other.c.payload_shared.is_(True), other.c.payload_in_origin.is_(False)))
+
+
+@dataclass
+class DedupReport:
+    """Outcome of one dedupe_existing run"""
+    hashes: int = 0
+    versions: int = 0
+    bytes: int = 0
+
+    def summary(self):
+        return (f'{self.versions} duplicate payloads across {self.hashes} distinct contents; '
+                f'{self.bytes / (1024 * 1024):.1f} MB reclaimable')
+
+
+def dedupe_existing(dry_run=False, batch_size=BATCH_SIZE):
+    """Turn every extra stored copy of a payload into a shared reference; returns a DedupReport.
+
+    The lowest version id keeps the bytes. Each batch of hashes is one transaction.
+    """
+    versions = ImageVersion.__table__
+    groups = db.session.execute(
+        select(versions.c.content_hash, func.min(versions.c.id), func.count(), func.max(versions.c.size))
+        .where(stores_payload(versions))
+        .group_by(versions.c.content_hash)
+        .having(func.count() > 1)
+    ).all()
+
+    report = DedupReport()
+    for _, _, count, size in groups:
+        report.hashes += 1
+        report.versions += count - 1
+        report.bytes += (count - 1) * (size or 0)
+    if dry_run:
+        return report
+
+    for start in range(0, len(groups), batch_size):
+        batch = groups[start:start + batch_size]
+        try:
+            db.session.execute(
+                versions.update()
+                .where(versions.c.content_hash == bindparam('digest'), versions.c.id != bindparam('keep_id'),
+                       stores_payload(versions))
+                .values(data=b'', payload_shared=True),
+                [{'digest': digest, 'keep_id': keep_id} for digest, keep_id, _, _ in batch]
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    return report
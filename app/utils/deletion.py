@@ -0,0 +1,282 @@
+"""Chunked, set-based deletion of collections and images.
+
+Deleting a collection sets its ``deleted_at`` tombstone (and clears
+``is_public``), which hides it from every listing and permission check at
+once; deleting an image sets ``TextureImage.deleted_at``, which every ORM
+query filters out. A background worker then removes their versions, images,
+permissions and invitations in chunks of ``DELETION_CHUNK_SIZE`` rows with
+plain DELETE statements, each chunk in its own short transaction with the
+storage ledger updated alongside, so no payload is ever loaded and other writers are never
+locked out for long. A purge that is interrupted keeps its tombstone and is
+resumed the next time the worker starts.
+
+The worker runs in one designated process: ``purge_deletions.py`` for
+multi-process deployments, or the single server process of ``run.py`` and the
+desktop app, which call ``init_deletion_worker`` themselves. Web workers and
+command-line tools only tombstone; the worker picks new tombstones up within
+``DELETION_POLL_SECONDS`` (at once when it runs in the same process). With
+``DELETION_WORKER_ENABLED`` off (tests) the purge runs inline in the request.
+"""
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import select, func
+
+from .. import db
+from ..models.collection import Collection, CollectionPermission
+from ..models.image import TextureImage, ImageVersion
+from ..models.invitation import CollectionInvitation
+from ..models.storage import StorageUsage, StorageBlobRef, COLLECTION_SCOPE, USER_SCOPE, apply_storage_deltas
+from .cache import bump_collection_generation
+from .dedup import rehome_payloads, deletable_versions
+
+_progress_lock = threading.Lock()
+
+
+def _progress():
+    return current_app.extensions.setdefault('deletion_progress', {})
+
+
+def _update_progress(collection_id, **values):
+    with _progress_lock:
+        _progress().setdefault(collection_id, {'collection_id': collection_id}).update(values)
+
+
+def deletion_progress(collection_id):
+    """Copy of the progress record of a collection deleted by this process, or None"""
+    with _progress_lock:
+        entry = _progress().get(collection_id)
+        return dict(entry) if entry else None
+
+
+def _commit(*statements):
+    try:
+        for statement in statements:
+            db.session.execute(statement)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+
+def _delete_versions(selection, chunk_size, pause, collection_scope=None, on_chunk=None):
+    """Delete the versions matching selection in chunks; returns how many were removed.
+
+    User-scope ledger rows are always updated; collection-scope rows only when
+    collection_scope is given (a purged collection drops its rows wholesale).
+    """
+    versions = ImageVersion.__table__
+    images = TextureImage.__table__
+    deleted = 0
+    stalled = False
+    while True:
+        ids = db.session.execute(
+            select(versions.c.id)
+            .select_from(versions.join(images, images.c.id == versions.c.image_id))
+            .where(selection)
+            .limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            return deleted
+
+        try:
+            rehome_payloads(ids)
+            # The ledger follows the rows this DELETE removed, so a concurrent purge of the
+            # same rows cannot decrement them twice; rows spared by the guard come back next round
+            removed = db.session.execute(
+                versions.delete().where(versions.c.id.in_(ids), deletable_versions(ids))
+                .returning(versions.c.id, versions.c.uploaded_by, versions.c.content_hash, versions.c.size)
+            ).all()
+            db.session.execute(images.update()
+                               .where(images.c.current_version_id.in_([row[0] for row in removed]))
+                               .values(current_version_id=None))
+            deltas = {}
+            for _, uploaded_by, digest, size in removed:
+                if digest:
+                    deltas.setdefault((USER_SCOPE, uploaded_by, digest), [0, size or 0])[0] -= 1
+                    if collection_scope is not None:
+                        deltas.setdefault((COLLECTION_SCOPE, collection_scope, digest), [0, size or 0])[0] -= 1
+            apply_storage_deltas(db.session.connection(), deltas)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        # A round where the guard spared every row is retried once, after rehoming the new sharers;
+        # rows a concurrent purge removed are fine
+        if not removed and db.session.execute(select(versions.c.id).where(versions.c.id.in_(ids)).limit(1)).first():
+            if stalled:
+                raise RuntimeError(f'No version of {len(ids)} could be deleted; retrying on the next pass')
+            stalled = True
+            continue
+        stalled = False
+        deleted += len(removed)
+        if on_chunk:
+            on_chunk(deleted)
+        if len(ids) < chunk_size and len(removed) == len(ids):
+            return deleted
+        time.sleep(pause)
+
+
+def _delete_images(selection, chunk_size, pause, on_chunk=None):
+    """Delete the (version-less) images matching selection in chunks"""
+    images = TextureImage.__table__
+    deleted = 0
+    while True:
+        ids = db.session.execute(select(images.c.id).where(selection).limit(chunk_size)).scalars().all()
+        if not ids:
+            return deleted
+        # Copies made from these images keep their own data; only the back-reference goes
+        _commit(images.update().where(images.c.copied_from_id.in_(ids)).values(copied_from_id=None),
+                images.delete().where(images.c.id.in_(ids)))
+        deleted += len(ids)
+        if on_chunk:
+            on_chunk(deleted)
+        if len(ids) < chunk_size:
+            return deleted
+        time.sleep(pause)
+
+
+def purge_collection(collection_id, chunk_size=200, pause=0.05):
+    """Remove a tombstoned collection and everything in it, chunk by chunk.
+
+    Returns (versions deleted, images deleted).
+    """
+    versions = ImageVersion.__table__
+    images = TextureImage.__table__
+    in_collection = images.c.collection_id == collection_id
+
+    version_total = db.session.execute(
+        select(func.count()).select_from(versions.join(images, images.c.id == versions.c.image_id))
+        .where(in_collection)
+    ).scalar()
+    image_total = db.session.execute(select(func.count()).select_from(images).where(in_collection)).scalar()
+    _update_progress(collection_id, state='running', versions_total=version_total, versions_deleted=0,
+                     images_total=image_total, images_deleted=0)
+
+    deleted_versions = _delete_versions(
+        in_collection, chunk_size, pause,
+        on_chunk=lambda count: _update_progress(collection_id, versions_deleted=count))
+    deleted_images = _delete_images(
+        in_collection, chunk_size, pause,
+        on_chunk=lambda count: _update_progress(collection_id, images_deleted=count))
+
+    collections = Collection.__table__
+    permissions = CollectionPermission.__table__
+    invitations = CollectionInvitation.__table__
+    usage = StorageUsage.__table__
+    refs = StorageBlobRef.__table__
+    _commit(
+        permissions.delete().where(permissions.c.collection_id == collection_id),
+        invitations.delete().where(invitations.c.collection_id == collection_id),
+        refs.delete().where(refs.c.scope == COLLECTION_SCOPE, refs.c.scope_id == collection_id),
+        usage.delete().where(usage.c.scope == COLLECTION_SCOPE, usage.c.scope_id == collection_id),
+        collections.delete().where(collections.c.id == collection_id),
+    )
+    bump_collection_generation(collection_id)
+    _update_progress(collection_id, state='done', finished_at=datetime.utcnow().isoformat())
+    return deleted_versions, deleted_images
+
+
+def purge_pending_collections(chunk_size=200, pause=0.05):
+    """Purge every tombstoned collection, oldest tombstone first; returns {id: (versions, images)}"""
+    pending = db.session.execute(
+        select(Collection.id).where(Collection.deleted_at.isnot(None)).order_by(Collection.deleted_at)
+    ).scalars().all()
+    return {collection_id: purge_collection(collection_id, chunk_size, pause) for collection_id in pending}
+
+
+def request_collection_deletion(collection, user_id=None):
+    """Tombstone a collection and hand it to the deletion worker (or purge it now when there is none)"""
+    collection.deleted_at = datetime.utcnow()
+    collection.is_public = False  # Drops it from discovery without touching those queries
+    db.session.commit()
+    bump_collection_generation(collection.id)
+    _update_progress(collection.id, state='pending', requested_by=user_id,
+                     requested_at=collection.deleted_at.isoformat())
+
+    if current_app.config.get('DELETION_WORKER_ENABLED', True):
+        wakeup = current_app.extensions.get('deletion_wakeup')
+        if wakeup is not None:
+            wakeup.set()
+    else:
+        purge_collection(collection.id, chunk_size=current_app.config.get('DELETION_CHUNK_SIZE', 200),
+                         pause=current_app.config.get('DELETION_CHUNK_PAUSE', 0.05))
+
+
+def purge_image(image_id, chunk_size=200, pause=0.05):
+    """Remove a tombstoned image and its versions, chunk by chunk; returns the versions removed"""
+    images = TextureImage.__table__
+    collection_id = db.session.execute(select(images.c.collection_id).where(images.c.id == image_id)).scalar()
+    if collection_id is None:
+        return 0
+    deleted = _delete_versions(images.c.id == image_id, chunk_size, pause, collection_scope=collection_id)
+    _delete_images(images.c.id == image_id, chunk_size, pause)
+    bump_collection_generation(collection_id)
+    return deleted
+
+
+def purge_pending_images(chunk_size=200, pause=0.05):
+    """Purge every tombstoned image, oldest tombstone first; returns {id: versions}"""
+    images = TextureImage.__table__
+    pending = db.session.execute(
+        select(images.c.id).where(images.c.deleted_at.isnot(None)).order_by(images.c.deleted_at)
+    ).scalars().all()
+    return {image_id: purge_image(image_id, chunk_size, pause) for image_id in pending}
+
+
+def request_image_deletion(image):
+    """Tombstone an image, which hides it at once, and hand it to the deletion worker (or purge it now)"""
+    image.deleted_at = datetime.utcnow()
+    db.session.commit()
+    bump_collection_generation(image.collection_id)
+
+    if current_app.config.get('DELETION_WORKER_ENABLED', True):
+        wakeup = current_app.extensions.get('deletion_wakeup')
+        if wakeup is not None:
+            wakeup.set()
+    else:
+        purge_image(image.id, chunk_size=current_app.config.get('DELETION_CHUNK_SIZE', 200),
+                    pause=current_app.config.get('DELETION_CHUNK_PAUSE', 0.05))
+
+
+def run_deletion_worker(app, wakeup=None, once=False):
+    """Purge tombstones now and then every DELETION_POLL_SECONDS, or when wakeup is set"""
+    while True:
+        # The first pass resumes purges interrupted by a restart
+        try:
+            with app.app_context():
+                results = purge_pending_collections(
+                    chunk_size=app.config.get('DELETION_CHUNK_SIZE', 200),
+                    pause=app.config.get('DELETION_CHUNK_PAUSE', 0.05)
+                )
+                image_results = purge_pending_images(
+                    chunk_size=app.config.get('DELETION_CHUNK_SIZE', 200),
+                    pause=app.config.get('DELETION_CHUNK_PAUSE', 0.05)
+                )
+                db.session.remove()
+            for collection_id, (versions, images) in results.items():
+                app.logger.info('Deleted collection %d (%d images, %d versions)', collection_id, images, versions)
+            for image_id, versions in image_results.items():
+                app.logger.info('Deleted image %d (%d versions)', image_id, versions)
+        except Exception:
+            app.logger.exception('Deletion failed')
+        if once:
+            return
+        wakeup = wakeup or threading.Event()
+        wakeup.wait(app.config.get('DELETION_POLL_SECONDS', 60))
+        wakeup.clear()
+
+
+def init_deletion_worker(app):
+    """Start the purge thread in this process; call it from exactly one process per deployment"""
+    if not app.config.get('DELETION_WORKER_ENABLED', True):
+        return None
+    wakeup = threading.Event()
+    thread = threading.Thread(target=run_deletion_worker, args=(app, wakeup), name='deletion-worker', daemon=True)
+    thread.start()
+    app.extensions['deletion_wakeup'] = wakeup
+    app.extensions['deletion_worker'] = thread
+    return thread
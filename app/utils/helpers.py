@@ -1,6 +1,9 @@
-from PIL import Image
+import io
 from flask import current_app
-from ..models.collection import CollectionPermission
+from sqlalchemy import func
+from .. import db
+from ..models.collection import Collection, CollectionPermission
+from ..models.image import TextureImage
 
 def allowed_file(filename):
     """Check if the file extension is allowed"""
@@ -8,15 +11,26 @@ def allowed_file(filename):
             filename.rsplit('.', 1)[1].lower() in current_app.config['ALLOWED_EXTENSIONS'])
 
 def get_image_dimensions(filepath):
-    """Get image dimensions from file"""
+    """Get image dimensions from a file path or file object"""
+    from PIL import Image  # Imported on first use to keep app startup fast
     try:
         with Image.open(filepath) as img:
             return img.size
     except:
         return None, None
 
+def prefix_search(column, text):
+    """Case-insensitive prefix match as a range on lower(column), so an index on lower(column) serves it.
+
+    Unlike LIKE, % and _ in text match literally.
+    """
+    lowered = func.lower(column)
+    return (lowered >= func.lower(text)) & (lowered < func.lower(text) + '\uffff')
+
 def has_collection_permission(user, collection, required_level='read'):
     """Check if user has required permission level for collection"""
+    if collection.deleted_at is not None:
+        return False  # Being deleted in the background
     if user.is_admin:
         return True
     if collection.created_by and collection.created_by == user.id:
@@ -30,5 +44,77 @@ def has_collection_permission(user, collection, required_level='read'):
     if not permission:
         return False
     
+    return permission_at_least(permission.permission_level, required_level)
+
+def get_collection_permission_levels(user, collection_ids):
+    """Map each of collection_ids to the user's level on it ('read', 'write', 'admin') in two queries.
+    
+    Collections the user cannot access, or that do not exist or are being deleted, are left out.
+    """
+    collection_ids = set(collection_ids)
+    if not collection_ids:
+        return {}
+    rows = db.session.query(Collection.id, Collection.created_by).filter(
+        Collection.id.in_(collection_ids), Collection.deleted_at.is_(None)
+    ).all()
+    if user.is_admin:
+        return {collection_id: 'admin' for collection_id, _ in rows}
+    levels = {collection_id: 'admin' for collection_id, owner in rows if owner == user.id}
+    permissions = db.session.query(CollectionPermission.collection_id, CollectionPermission.permission_level).filter(
+        CollectionPermission.user_id == user.id,
+        CollectionPermission.collection_id.in_([collection_id for collection_id, _ in rows])
+    ).all()
+    for collection_id, level in permissions:
+        levels.setdefault(collection_id, level)
+    return levels
+
+def permission_at_least(level, required_level):
     levels = {'read': 1, 'write': 2, 'admin': 3}
-    return levels.get(permission.permission_level, 0) >= levels.get(required_level, 0)
+    return levels.get(level, 0) >= levels.get(required_level, 0)
+
+def get_member_collection_ids(user):
+    """Sorted ids of live collections the user created or has a permission on"""
+    created = db.session.query(Collection.id).filter(Collection.created_by == user.id, Collection.deleted_at.is_(None))
+    permitted = db.session.query(CollectionPermission.collection_id).join(
+        Collection, Collection.id == CollectionPermission.collection_id
+    ).filter(
+        CollectionPermission.user_id == user.id,
+        Collection.deleted_at.is_(None)
+    )
+    return sorted(row[0] for row in created.union(permitted).all())
+
+def get_collection_image_stats(collection_ids):
+    """Image counts and cover image ids for several collections in one grouped query"""
+    if not collection_ids:
+        return {}
+    
+    rows = db.session.query(
+        TextureImage.collection_id,
+        func.count(TextureImage.id),
+        func.max(TextureImage.id)
+    ).filter(
+        TextureImage.collection_id.in_(collection_ids)
+    ).group_by(TextureImage.collection_id).all()
+    
+    return {
+        collection_id: {'image_count': image_count, 'cover_image_id': cover_image_id}
+        for collection_id, image_count, cover_image_id in rows
+    }
+
+class UndecodableImageError(Exception):
+    """Stored bytes that PIL cannot open or decode"""
+
+def make_thumbnail(data, max_size=256):
+    """Downscale image bytes to fit within max_size, returning (bytes, mimetype)"""
+    from PIL import Image
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img.thumbnail((max_size, max_size))
+            output = io.BytesIO()
+            if img.mode in ('RGBA', 'LA', 'P'):
+                img.convert('RGBA').save(output, format='PNG', optimize=True)
+                return output.getvalue(), 'image/png'
+            img.convert('RGB').save(output, format='JPEG', quality=85)
+            return output.getvalue(), 'image/jpeg'
+    except OSError as e:  # Includes PIL.UnidentifiedImageError; the output only goes to memory
+        raise UndecodableImageError(str(e)) from e
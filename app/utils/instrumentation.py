@@ -0,0 +1,161 @@
+"""Per-request timing and SQL query instrumentation.
+
+Every request records its wall time, time spent in the database, the number
+of SQL statements executed, and the request/response body sizes. Samples are
+kept per endpoint in fixed-size ring buffers (for percentiles) alongside
+cumulative latency histograms, all in process memory. Responses carry a
+``Server-Timing`` header so the breakdown shows up in browser devtools.
+"""
+import math
+import threading
+import time
+from collections import deque
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+# Upper bounds (milliseconds) of the latency histogram buckets
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+
+def _percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100.0 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class EndpointStats:
+    """Ring buffer of recent samples plus cumulative counters for one endpoint"""
+
+    def __init__(self, sample_size):
+        self.samples = deque(maxlen=sample_size)
+        self.histogram = [0] * len(HISTOGRAM_BUCKETS_MS)
+        self.count = 0
+        self.total_wall_ms = 0.0
+        self.total_db_ms = 0.0
+        self.total_queries = 0
+        self.max_wall_ms = 0.0
+
+    def add(self, wall_ms, db_ms, queries, bytes_in, bytes_out):
+        self.samples.append((wall_ms, db_ms, queries, bytes_in, bytes_out))
+        self.count += 1
+        self.total_wall_ms += wall_ms
+        self.total_db_ms += db_ms
+        self.total_queries += queries
+        self.max_wall_ms = max(self.max_wall_ms, wall_ms)
+        for index, upper in enumerate(HISTOGRAM_BUCKETS_MS):
+            if wall_ms <= upper:
+                self.histogram[index] += 1
+                break
+
+    def summary(self, endpoint):
+        walls = sorted(s[0] for s in self.samples)
+        dbs = sorted(s[1] for s in self.samples)
+        recent = len(self.samples) or 1
+        return {
+            'endpoint': endpoint,
+            'count': self.count,
+            'avg_ms': self.total_wall_ms / self.count if self.count else 0.0,
+            'p50_ms': _percentile(walls, 50),
+            'p95_ms': _percentile(walls, 95),
+            'max_ms': self.max_wall_ms,
+            'db_p95_ms': _percentile(dbs, 95),
+            'avg_queries': self.total_queries / self.count if self.count else 0.0,
+            'max_queries': max((s[2] for s in self.samples), default=0),
+            'avg_bytes_in': sum(s[3] for s in self.samples) / recent,
+            'avg_bytes_out': sum(s[4] for s in self.samples) / recent,
+            'histogram': list(zip(HISTOGRAM_BUCKETS_MS, self.histogram)),
+        }
+
+
+class RequestMetrics:
+    """Thread-safe registry of per-endpoint request statistics"""
+
+    def __init__(self, sample_size=500):
+        self.sample_size = sample_size
+        self._endpoints = {}
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def record(self, endpoint, wall_ms, db_ms, queries, bytes_in, bytes_out):
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = EndpointStats(self.sample_size)
+            stats.add(wall_ms, db_ms, queries, bytes_in, bytes_out)
+
+    def summaries(self, sort_by='p95_ms', limit=None):
+        """Per-endpoint summaries, slowest first"""
+        with self._lock:
+            rows = [stats.summary(name) for name, stats in self._endpoints.items()]
+        rows.sort(key=lambda row: row[sort_by], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def reset(self):
+        with self._lock:
+            self._endpoints.clear()
+            self.started_at = time.time()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    starts = conn.info.get('query_start_time')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    g.db_query_count = g.get('db_query_count', 0) + 1
+    g.db_time = g.get('db_time', 0.0) + elapsed
+
+
+def init_instrumentation(app, db):
+    """Attach request timing hooks and SQL listeners to the app"""
+    if not app.config.get('REQUEST_METRICS_ENABLED', True):
+        return None
+
+    metrics = RequestMetrics(app.config.get('REQUEST_METRICS_SAMPLE_SIZE', 500))
+    app.extensions['request_metrics'] = metrics
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start_time = time.perf_counter()
+        g.db_query_count = 0
+        g.db_time = 0.0
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.get('request_start_time')
+        if start is None:
+            return response
+
+        wall_ms = (time.perf_counter() - start) * 1000
+        db_ms = g.get('db_time', 0.0) * 1000
+        queries = g.get('db_query_count', 0)
+        bytes_in = request.content_length or 0
+        bytes_out = response.calculate_content_length() or 0
+
+        metrics.record(request.endpoint or '<unmatched>', wall_ms, db_ms, queries, bytes_in, bytes_out)
+
+        response.headers.add(
+            'Server-Timing',
+            f'app;dur={wall_ms:.1f}, db;dur={db_ms:.1f};desc="{queries} queries"'
+        )
+        return response
+
+    return metrics
+
+
+def get_request_metrics(app):
+    """Return the metrics registry for the app, or None when disabled"""
+    return app.extensions.get('request_metrics')
@@ -0,0 +1,184 @@
+"""Versions whose payload stays in the file they were imported from.
+
+``import_collection.py --link`` records the source path, size, mtime and
+content hash of each file instead of copying it into ``image_version.data``.
+Reads stat the source first: while size and mtime match the record, the bytes
+are served straight from it. When they do not, the file is hashed:
+
+* same content (touched, copied back) - the new mtime is recorded
+* changed or removed - the recorded bytes are recovered from the payload
+  caches or another stored version with the same hash when possible and
+  snapshotted into the version, which is then no longer linked; new content
+  at the source is stored as a new version (made current if the linked one
+  was). Recorded bytes that cannot be recovered raise ``LinkedSourceError``.
+
+Drift is recorded through a session of its own, so serving a linked version
+never commits (or flushes) the request's session.
+
+Publishing over a linked source snapshots the versions linked to it first.
+"""
+import hashlib
+import os
+
+from flask import current_app
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from .. import db
+from ..models.image import ImageVersion
+from ..models.storage import content_hash
+from .dedup import is_stored, stored_payload
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class LinkedSourceError(Exception):
+    """The source file of a linked version changed or disappeared and its bytes are lost"""
+
+
+def file_fingerprint(path):
+    """(size, mtime_ns, sha256) of a file, hashed in chunks so it is never held in memory"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        stat = os.fstat(f.fileno())
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return stat.st_size, stat.st_mtime_ns, digest.hexdigest()
+
+
+def linked_file(version):
+    """Source path of a linked version while it still matches the record, else None"""
+    if not version.link_path:
+        return None
+    try:
+        stat = os.stat(version.link_path)
+    except OSError:
+        return None
+    if stat.st_size != version.size or stat.st_mtime_ns != version.link_mtime_ns:
+        return None
+    return version.link_path
+
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _recover(digest):
+    """Bytes with this content hash from the payload caches or a stored version, or None"""
+    memory = current_app.extensions.get('payload_cache')
+    data = memory.get(digest) if memory is not None else None
+    store = current_app.extensions.get('blob_store')
+    if data is None and store is not None:
+        if store.cache is not None:
+            data = store.cache.get(digest)
+        if data is None and hasattr(store.origin, 'path'):
+            data = _read(store.origin.path(digest))
+    if data is None:
+        data = stored_payload(digest)
+    return data if data is not None and content_hash(data) == digest else None
+
+
+def _store(version, data):
+    """Keep the payload in the vault from now on: the blob origin, or the database unless another version stores it"""
+    origin = getattr(current_app.extensions.get('blob_store'), 'origin', None)
+    in_origin = getattr(origin, 'name', None) == 'directory'
+    if in_origin:
+        origin.put(version.content_hash, data)
+    shared = not in_origin and is_stored(version.content_hash)
+    version.data = b'' if shared or in_origin else data
+    version.payload_shared = shared
+    version.payload_in_origin = in_origin
+    version.link_path = None
+    version.link_mtime_ns = None
+
+
+def _add_source_version(session, version, data):
+    """Store new content found at a linked source as the image's next version"""
+    from .cache import bump_collection_generation
+    from .helpers import get_image_dimensions
+    from .versions import set_current_version
+
+    image = version.image
+    digest = content_hash(data)
+    versions = ImageVersion.__table__
+    numbers = session.execute(
+        select(func.max(versions.c.version_number),
+               func.count(versions.c.id).filter(versions.c.content_hash == digest))
+        .where(versions.c.image_id == image.id)
+    ).one()
+    if numbers[1]:
+        return None  # Already snapshotted by an earlier read
+
+    snapshot = ImageVersion(image_id=image.id, version_number=numbers[0] + 1, filepath=version.filepath,
+                            uploaded_by=version.uploaded_by, data=data)
+    session.add(snapshot)
+    if image.current_version_id == version.id:
+        set_current_version(image, snapshot)
+        image.width, image.height = get_image_dimensions(version.link_path)
+        image.file_size = len(data)
+        image.is_published = False
+    session.flush()
+    bump_collection_generation(image.collection_id, session=session)
+    return snapshot
+
+
+def read_linked(version):
+    """Payload of a linked version; see the module docstring for drift handling"""
+    if linked_file(version):
+        data = _read(version.link_path)
+        if data is not None:
+            return data
+
+    path = version.link_path
+    current = _read(path)
+    session = Session(db.engine)
+    try:
+        with db.session.no_autoflush:  # Lookups below must not flush the request's own changes
+            own = session.get(ImageVersion, version.id)
+            if own.link_path is None:
+                data, saved_as = _recover(own.content_hash), None  # Already snapshotted by another request
+            elif current is not None and content_hash(current) == own.content_hash:
+                own.link_mtime_ns = os.stat(path).st_mtime_ns  # Touched or rewritten with the same bytes
+                session.commit()
+                return current
+            else:
+                data = _recover(own.content_hash)
+                if data is not None:
+                    _store(own, data)
+                snapshot = _add_source_version(session, own, current) if current is not None else None
+                saved_as = snapshot.version_number if snapshot is not None else None
+                session.commit()
+                current_app.logger.warning('Source of linked version %s (%s) %s', version.id, path,
+                                           'changed' if current is not None else 'is missing')
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+        if version in db.session:
+            db.session.expire(version)  # Reloaded with what was just recorded
+
+    if data is None:
+        message = f'The source file {path} of this version was changed or removed and its content is lost.'
+        if saved_as is not None:
+            message += f' Its new content was saved as version {saved_as}.'
+        raise LinkedSourceError(message)
+    return data
+
+
+def snapshot_links(path):
+    """Store the payloads of versions linked to path before it is overwritten; returns how many"""
+    linked = ImageVersion.query.filter_by(link_path=os.path.abspath(path)).all()
+    for version in linked:
+        try:
+            data = read_linked(version)
+        except LinkedSourceError:
+            continue
+        if version.link_path:
+            _store(version, data)
+    db.session.commit()
+    return len(linked)
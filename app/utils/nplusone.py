@@ -0,0 +1,123 @@
+"""N+1 query detection for development and test runs.
+
+Every SQL statement executed during a request is reduced to a fingerprint
+(whitespace collapsed, ``IN (?, ?, ...)`` lists folded) and counted. When one
+fingerprint repeats more than ``N_PLUS_ONE_THRESHOLD`` times in a single
+request the template line or source line that triggered it is logged, and
+with ``N_PLUS_ONE_RAISE`` enabled the request fails with ``NPlusOneError`` so
+tests catch the regression.
+"""
+import os
+import re
+import sys
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_IN_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_NUMBERED_PARAM_RE = re.compile(r'%\(\w+\)s|:\w+|\$\d+')
+
+# Frames from these locations are never reported as the call site
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_THIS_FILE = os.path.abspath(__file__)
+
+
+class NPlusOneError(Exception):
+    """Raised when a query shape repeats too often within one request"""
+
+
+def fingerprint(statement):
+    """Reduce a SQL statement to its shape, independent of parameter values"""
+    shape = _WHITESPACE_RE.sub(' ', statement).strip()
+    shape = _NUMBERED_PARAM_RE.sub('?', shape)
+    return _IN_LIST_RE.sub('(?)', shape)
+
+
+def find_call_site():
+    """Return "file:line" of the template or project code that issued a query"""
+    frame = sys._getframe(1)
+    while frame is not None:
+        template = frame.f_globals.get('__jinja_template__')
+        if template is not None:
+            lineno = template.get_corresponding_lineno(frame.f_lineno)
+            return f'{template.name}:{lineno}'
+
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if (filename.startswith(_PROJECT_ROOT) and filename != _THIS_FILE
+                and 'site-packages' not in filename):
+            return f'{os.path.relpath(filename, _PROJECT_ROOT)}:{frame.f_lineno}'
+        frame = frame.f_back
+    return '<unknown>'
+
+
+class NPlusOneDetector:
+    """Counts query shapes per request and reports the ones that repeat"""
+
+    def __init__(self, app, threshold=5, raise_on_detect=False):
+        self.app = app
+        self.threshold = threshold
+        self.raise_on_detect = raise_on_detect
+
+    def record(self, statement):
+        """Count one executed statement against the current request"""
+        shapes = g.setdefault('query_shapes', {})
+        shape = fingerprint(statement)
+        entry = shapes.get(shape)
+        if entry is None:
+            shapes[shape] = [1, None]
+            return
+
+        entry[0] += 1
+        if entry[0] == self.threshold + 1:
+            entry[1] = find_call_site()
+            self.app.logger.warning(
+                'Possible N+1 query on %s: statement repeated more than %d times, triggered at %s\n    %s',
+                request.endpoint, self.threshold, entry[1], shape
+            )
+
+    def violations(self):
+        """Query shapes of the current request that exceeded the threshold"""
+        shapes = g.get('query_shapes', {})
+        return [
+            {'statement': shape, 'count': count, 'call_site': call_site}
+            for shape, (count, call_site) in shapes.items()
+            if count > self.threshold
+        ]
+
+    def check(self):
+        """Raise NPlusOneError if the current request repeated any query shape"""
+        violations = self.violations()
+        if violations:
+            details = '\n'.join(
+                f"  {v['count']}x at {v['call_site']}: {v['statement']}" for v in violations
+            )
+            raise NPlusOneError(f'N+1 queries detected on {request.endpoint}:\n{details}')
+
+
+def init_nplusone(app, db):
+    """Attach the N+1 detector to the app when N_PLUS_ONE_DETECTION is enabled"""
+    if not app.config.get('N_PLUS_ONE_DETECTION', False):
+        return None
+
+    detector = NPlusOneDetector(
+        app,
+        threshold=app.config.get('N_PLUS_ONE_THRESHOLD', 5),
+        raise_on_detect=app.config.get('N_PLUS_ONE_RAISE', False)
+    )
+    app.extensions['nplusone'] = detector
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            detector.record(statement)
+
+    with app.app_context():
+        event.listen(db.engine, 'after_cursor_execute', after_cursor_execute)
+
+    @app.after_request
+    def check_nplusone(response):
+        if detector.raise_on_detect:
+            detector.check()
+        return response
+
+    return detector
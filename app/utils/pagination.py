@@ -0,0 +1,62 @@
+"""Keyset (cursor) pagination helpers.
+
+Pages are selected with ``WHERE (sort columns) > (last row's values)`` instead
+of ``OFFSET``, so fetching page 1000 costs the same as page 1 as long as the
+sort columns are indexed. The last sort column must be unique (normally the
+primary key) to make the ordering total.
+"""
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(values):
+    """Encode a tuple of sort values as an opaque URL-safe token"""
+    tagged = [['dt', v.isoformat()] if isinstance(v, datetime) else ['v', v] for v in values]
+    raw = json.dumps(tagged, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Decode a cursor token, returning None if it is malformed"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        tagged = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return tuple(datetime.fromisoformat(v) if t == 'dt' else v for t, v in tagged)
+    except (ValueError, TypeError):
+        return None
+
+
+def keyset_after(columns, values, descending=True):
+    """Filter clause selecting rows that sort after values in (columns) order"""
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        beyond = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, beyond))
+    return or_(*clauses)
+
+
+def keyset_page(query, columns, cursor=None, limit=25, descending=True, key=None):
+    """Fetch one page of query ordered by columns, starting after cursor.
+
+    Returns ``(items, next_cursor)``; ``next_cursor`` is None on the last page.
+    ``key`` maps a result row to its sort values and defaults to reading each
+    column's attribute from the row.
+    """
+    if key is None:
+        key = lambda row: tuple(getattr(row, column.key) for column in columns)
+
+    values = decode_cursor(cursor)
+    if values is not None and len(values) == len(columns):
+        query = query.filter(keyset_after(columns, values, descending))
+
+    order = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = encode_cursor(key(rows[limit - 1])) if len(rows) > limit else None
+    return rows[:limit], next_cursor
@@ -0,0 +1,129 @@
+"""Publishing payloads to their original file paths.
+
+When the payload is already a file (the ``directory`` blob origin, or the
+source of a linked import), it is copied with the cheapest method the kernel and filesystems offer, so the bytes
+never pass through Python:
+
+* ``hardlink`` - only with ``PUBLISH_HARDLINK``; the published file shares the
+  origin's inode, so it must never be edited in place
+* ``reflink`` - a copy-on-write clone (Btrfs, XFS, bcachefs) via ``FICLONE``
+* ``copy_file_range`` - an in-kernel copy, server-side on NFS 4.2 and SMB
+* ``sendfile`` - an in-kernel copy on older kernels
+* ``buffered`` - a plain read/write loop; also used for database payloads
+
+Each method that fails (different filesystem, unsupported) falls through to
+the next. The copy is written next to the destination and renamed over it,
+so readers of the published path never see a partial file. Versions linked
+to the destination are snapshotted into the database before it is replaced.
+"""
+import errno
+import os
+import shutil
+import uuid
+
+from flask import current_app
+
+from .blob_store import payload_file, read_payload
+from .links import linked_file, snapshot_links
+
+FICLONE = 0x40049409  # _IOW(0x94, 9, int) from linux/fs.h
+
+# Failures that mean "this method is not available here"; anything else is a real error
+_UNSUPPORTED = {errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.ENOTTY, errno.EPERM,
+                getattr(errno, 'EOPNOTSUPP', errno.EINVAL), getattr(errno, 'ENOTSUP', errno.EINVAL),
+                errno.EBADF, errno.EMLINK}
+
+
+def _reflink(source_fd, target_fd, size):
+    import fcntl  # Not available on Windows
+
+    fcntl.ioctl(target_fd, FICLONE, source_fd)
+
+
+def _copy_file_range(source_fd, target_fd, size):
+    copied = 0
+    while copied < size:
+        count = os.copy_file_range(source_fd, target_fd, size - copied, copied, copied)
+        if count == 0:
+            raise OSError(errno.EINVAL, 'copy_file_range stopped early')
+        copied += count
+
+
+def _sendfile(source_fd, target_fd, size):
+    copied = 0
+    while copied < size:
+        count = os.sendfile(target_fd, source_fd, copied, size - copied)
+        if count == 0:
+            raise OSError(errno.EINVAL, 'sendfile stopped early')
+        copied += count
+
+
+def _kernel_methods():
+    methods = []
+    if hasattr(os, 'copy_file_range'):
+        methods.append(('copy_file_range', _copy_file_range))
+    if hasattr(os, 'sendfile'):
+        methods.append(('sendfile', _sendfile))
+    return [('reflink', _reflink)] + methods if os.name == 'posix' else methods
+
+
+def _copy(source, temp_path):
+    """Copy source to the new file temp_path; returns the method that worked"""
+    with open(source, 'rb') as src:
+        size = os.fstat(src.fileno()).st_size
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        with os.fdopen(fd, 'wb') as dst:
+            for name, method in _kernel_methods():
+                try:
+                    method(src.fileno(), dst.fileno(), size)
+                    return name
+                except OSError as e:
+                    if e.errno not in _UNSUPPORTED:
+                        raise
+                    dst.truncate(0)  # Start the next method from an empty file
+            src.seek(0)
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+    return 'buffered'
+
+
+def _try_link(source, temp_path):
+    try:
+        os.link(source, temp_path)
+        return True
+    except OSError as e:
+        if e.errno not in _UNSUPPORTED:
+            raise
+        return False
+
+
+def publish_payload(version, destination):
+    """Atomically write a version's payload to destination; returns the copy method used"""
+    source = linked_file(version) or payload_file(version)
+    if source is not None and os.path.abspath(source) == os.path.abspath(destination):
+        return 'in place'  # A linked version published back to its own source
+    snapshot_links(destination)
+
+    directory = os.path.dirname(os.path.abspath(destination))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f'.{os.path.basename(destination)}.{uuid.uuid4().hex}.tmp')
+
+    try:
+        if source is None:
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(read_payload(version))
+            method = 'buffered'
+        elif current_app.config.get('PUBLISH_HARDLINK', False) and _try_link(source, temp_path):
+            method = 'hardlink'
+        else:
+            method = _copy(source, temp_path)
+        os.replace(temp_path, destination)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    current_app.logger.info('Published version %s to %s (%s)', version.id, destination, method)
+    return method
+
@@ -0,0 +1,43 @@
+"""Upload quotas checked against the storage ledger.
+
+A quota limits a scope's physical (deduplicated) bytes. The check reads one
+ledger row and one blob reference per scope, so it costs the same no matter how
+much the collection or user has stored.
+"""
+from flask import current_app
+
+from .. import db
+from ..models.storage import (StorageUsage, StorageBlobRef, COLLECTION_SCOPE, USER_SCOPE,
+                               content_hash)
+
+MB = 1024 * 1024
+
+
+def effective_quota(scope, owner):
+    """Quota in bytes for a collection or user, or None when unlimited"""
+    if owner is not None and owner.storage_quota is not None:
+        return owner.storage_quota
+    setting = 'STORAGE_QUOTA_COLLECTION_MB' if scope == COLLECTION_SCOPE else 'STORAGE_QUOTA_USER_MB'
+    megabytes = current_app.config.get(setting)
+    return int(megabytes * MB) if megabytes else None
+
+
+def check_upload_quota(collection, user, data):
+    """Return an error message if storing data would exceed a quota, else None"""
+    digest = None
+    for scope, owner, label in ((COLLECTION_SCOPE, collection, 'This collection'),
+                                (USER_SCOPE, user, 'Your account')):
+        quota = effective_quota(scope, owner)
+        if quota is None:
+            continue
+        digest = digest or content_hash(data)
+
+        # A payload already stored in this scope adds no physical bytes
+        if db.session.get(StorageBlobRef, (scope, owner.id, digest)) is not None:
+            continue
+        usage = db.session.get(StorageUsage, (scope, owner.id))
+        used = usage.physical_bytes if usage else 0
+        if used + len(data) > quota:
+            return (f'{label} has used {used / MB:.1f} MB of its {quota / MB:.1f} MB storage quota; '
+                    f'this {len(data) / MB:.1f} MB upload would exceed it.')
+    return None
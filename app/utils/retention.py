@@ -0,0 +1,210 @@
+"""Per-collection version retention and compaction.
+
+A collection's policy keeps the newest ``retention_keep_last`` versions of each
+image, every version uploaded within ``retention_keep_days`` days and, unless
+``retention_keep_published`` is off, every version that was ever published. The
+current version is always kept. A version is expired when no enabled rule keeps
+it; collections with neither keep_last nor keep_days set are never compacted.
+
+Expired versions are selected with a window function over version metadata
+only (no blobs are read) and deleted in small batches, each in its own short
+transaction, with the storage ledger updated in the same transaction.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, func, case, and_, or_
+
+from .. import db
+from ..models.collection import Collection
+from ..models.image import TextureImage, ImageVersion
+from ..models.storage import StorageBlobRef, COLLECTION_SCOPE, USER_SCOPE, apply_storage_deltas
+from .cache import bump_collection_generation
+from .dedup import rehome_payloads, deletable_versions
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    keep_last: int = None
+    keep_days: int = None
+    keep_published: bool = True
+
+    @classmethod
+    def from_collection(cls, collection):
+        return cls(collection.retention_keep_last, collection.retention_keep_days,
+                   collection.retention_keep_published)
+
+    @classmethod
+    def from_form(cls, values):
+        """Parse keep_last / keep_days / keep_published fields; blank means no limit"""
+        def optional_int(name, minimum):
+            raw = (values.get(name) or '').strip()
+            if not raw:
+                return None
+            number = int(raw)
+            if number < minimum:
+                raise ValueError(f'{name} must be at least {minimum}')
+            return number
+        return cls(optional_int('keep_last', 1), optional_int('keep_days', 0), bool(values.get('keep_published')))
+
+    @property
+    def enabled(self):
+        return self.keep_last is not None or self.keep_days is not None
+
+
+def _ranked_versions(collection_id):
+    """Version metadata for a collection with each version's rank within its image"""
+    versions = ImageVersion.__table__
+    images = TextureImage.__table__
+    rank = func.row_number().over(partition_by=versions.c.image_id,
+                                  order_by=versions.c.version_number.desc())
+    return (select(versions.c.id, versions.c.image_id, versions.c.uploaded_by, versions.c.content_hash,
+                   versions.c.size, versions.c.uploaded_at, versions.c.is_current, versions.c.published_at,
+                   rank.label('rank'))
+            .select_from(versions.join(images, images.c.id == versions.c.image_id))
+            .where(images.c.collection_id == collection_id)
+            .subquery())
+
+
+def _expired_condition(ranked, policy, now):
+    conditions = [func.coalesce(ranked.c.is_current, False) == False]  # noqa: E712
+    if policy.keep_last is not None:
+        conditions.append(ranked.c.rank > policy.keep_last)
+    if policy.keep_days is not None:
+        conditions.append(ranked.c.uploaded_at < now - timedelta(days=policy.keep_days))
+    if policy.keep_published:
+        conditions.append(ranked.c.published_at.is_(None))
+    return and_(*conditions)
+
+
+def preview_retention(collection_id, policy, now=None):
+    """What compacting a collection under policy would remove, without changing anything"""
+    result = {'versions': 0, 'images': 0, 'logical_bytes': 0, 'physical_bytes': 0}
+    if not policy.enabled:
+        return result
+
+    ranked = _ranked_versions(collection_id)
+    expired = _expired_condition(ranked, policy, now or datetime.utcnow())
+    versions, images, logical = db.session.execute(
+        select(func.count(), func.count(ranked.c.image_id.distinct()), func.coalesce(func.sum(ranked.c.size), 0))
+        .where(expired)
+    ).one()
+
+    # A payload is reclaimed only when every version sharing it in the collection expires
+    by_hash = (select(ranked.c.content_hash, func.count().label('expiring'), func.max(ranked.c.size).label('size'))
+               .where(expired).group_by(ranked.c.content_hash).subquery())
+    refs = StorageBlobRef.__table__
+    physical = db.session.execute(
+        select(func.coalesce(func.sum(case((by_hash.c.expiring >= refs.c.ref_count, by_hash.c.size), else_=0)), 0))
+        .select_from(by_hash.join(refs, and_(refs.c.scope == COLLECTION_SCOPE,
+                                             refs.c.scope_id == collection_id,
+                                             refs.c.content_hash == by_hash.c.content_hash)))
+    ).scalar()
+
+    result.update(versions=versions, images=images, logical_bytes=logical, physical_bytes=physical)
+    return result
+
+
+def compact_collection(collection_id, policy, batch_size=100, pause=0.25, now=None):
+    """Delete expired versions in batches of batch_size, sleeping pause seconds between them.
+
+    Returns (versions deleted, logical bytes freed).
+    """
+    if not policy.enabled:
+        return 0, 0
+    now = now or datetime.utcnow()
+    versions = ImageVersion.__table__
+    deleted = freed = 0
+    stalled = False
+
+    while True:
+        ranked = _ranked_versions(collection_id)
+        ids = db.session.execute(
+            select(ranked.c.id).where(_expired_condition(ranked, policy, now)).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+
+        try:
+            rehome_payloads(ids)
+            # Rows spared by the guard stay expired and are rehomed by the next batch
+            removed = db.session.execute(
+                versions.delete().where(versions.c.id.in_(ids), deletable_versions(ids))
+                .returning(versions.c.uploaded_by, versions.c.content_hash, versions.c.size)
+            ).all()
+            deltas = {}
+            for uploaded_by, digest, size in removed:
+                if digest:
+                    for key in ((COLLECTION_SCOPE, collection_id, digest), (USER_SCOPE, uploaded_by, digest)):
+                        deltas.setdefault(key, [0, size or 0])[0] -= 1
+            apply_storage_deltas(db.session.connection(), deltas)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        # A round where the guard spared every row is retried once, after rehoming the new sharers;
+        # rows a concurrent purge removed are fine
+        if not removed and db.session.execute(select(versions.c.id).where(versions.c.id.in_(ids)).limit(1)).first():
+            if stalled:
+                raise RuntimeError(f'No expired version of {len(ids)} could be deleted')
+            stalled = True
+            continue
+        stalled = False
+        deleted += len(removed)
+        freed += sum(row[2] or 0 for row in removed)
+        if len(ids) < batch_size and len(removed) == len(ids):
+            break
+        time.sleep(pause)
+
+    if deleted:
+        bump_collection_generation(collection_id)
+    return deleted, freed
+
+
+def compact_all_collections(batch_size=100, pause=0.25):
+    """Apply every collection's retention policy; returns {collection_id: (deleted, freed)}"""
+    collections = Collection.query.filter(or_(Collection.retention_keep_last.isnot(None),
+                                              Collection.retention_keep_days.isnot(None)),
+                                          Collection.deleted_at.is_(None)).all()
+    results = {}
+    for collection in collections:
+        deleted, freed = compact_collection(collection.id, RetentionPolicy.from_collection(collection),
+                                            batch_size=batch_size, pause=pause)
+        if deleted:
+            results[collection.id] = (deleted, freed)
+    return results
+
+
+def init_retention_compactor(app):
+    """Start a background compactor when RETENTION_COMPACT_INTERVAL_MINUTES is set.
+
+    Call this from the one process that runs background jobs (see
+    init_deletion_worker), never from create_app.
+    """
+    interval_minutes = app.config.get('RETENTION_COMPACT_INTERVAL_MINUTES', 0)
+    if not interval_minutes or app.config.get('TESTING'):
+        return None
+
+    def run():
+        while True:
+            time.sleep(interval_minutes * 60)
+            try:
+                with app.app_context():
+                    results = compact_all_collections(
+                        batch_size=app.config.get('RETENTION_BATCH_SIZE', 100),
+                        pause=app.config.get('RETENTION_BATCH_PAUSE', 0.25)
+                    )
+                    db.session.remove()
+                for collection_id, (deleted, freed) in results.items():
+                    app.logger.info('Retention: removed %d versions (%.1f MB) from collection %d',
+                                    deleted, freed / (1024 * 1024), collection_id)
+            except Exception:
+                app.logger.exception('Retention compaction failed')
+
+    thread = threading.Thread(target=run, name='retention-compactor', daemon=True)
+    thread.start()
+    app.extensions['retention_compactor'] = thread
+    return thread
@@ -0,0 +1,141 @@
+"""Thumbnail sprite sheets for collection pages.
+
+A page of image previews is packed into one WebP sheet of square cells
+(``SPRITE_CELL_SIZE`` pixels, centre-cropped like the grid's ``object-fit:
+cover``) plus a coordinate map, so a page paints with two requests instead of
+one per image. Sheets are keyed by the page's (image id, current version hash)
+list and rebuilt only when that changes. Each cell is cached on its own under
+the version's content hash, so a sheet for a page where one image changed
+decodes just that one payload.
+"""
+import hashlib
+import io
+import os
+
+from flask import current_app
+from sqlalchemy import select
+
+from .. import db
+from ..models.image import TextureImage, ImageVersion
+from .blob_store import read_payload
+from .transcode import TranscodeCache
+
+SHEET_COLUMNS = 10
+
+
+def init_sprite_cache(app):
+    """Create the on-disk cache of sprite cells and sheets"""
+    directory = app.config.get('SPRITE_CACHE_DIR') or os.path.join(app.instance_path, 'sprite_cache')
+    cache = TranscodeCache(directory, int(app.config.get('SPRITE_CACHE_MAX_MB', 256) * 1024 * 1024))
+    app.extensions['sprite_cache'] = cache
+    return cache
+
+
+def page_entries(collection_id, image_ids):
+    """(image_id, version_id, content_hash) of each image's current version, in image_ids order.
+
+    Only metadata columns are read; images outside the collection or without a
+    hashed current version are left out.
+    """
+    versions = ImageVersion.__table__
+    images = TextureImage.__table__
+    rows = db.session.execute(
+        select(versions.c.image_id, versions.c.id, versions.c.content_hash)
+        .select_from(images.join(versions, versions.c.id == images.c.current_version_id))
+        .where(images.c.collection_id == collection_id, images.c.id.in_(image_ids),
+               versions.c.content_hash.isnot(None))
+    ).all()
+    by_image = {row[0]: tuple(row) for row in rows}
+    return [by_image[image_id] for image_id in dict.fromkeys(image_ids) if image_id in by_image]
+
+
+def sheet_key(entries, cell_size):
+    """Stable name for the sheet of a page's version-hash list"""
+    digest = hashlib.sha256(f'{cell_size}'.encode())
+    for image_id, _, version_hash in entries:
+        digest.update(f'|{image_id}:{version_hash}'.encode())
+    return digest.hexdigest()[:32]
+
+
+def sheet_layout(entries, cell_size):
+    """Sheet size and each image's cell position, row by row"""
+    columns = min(len(entries), SHEET_COLUMNS) or 1
+    rows = -(-len(entries) // columns)
+    positions = {image_id: {'x': (index % columns) * cell_size, 'y': (index // columns) * cell_size}
+                 for index, (image_id, _, _) in enumerate(entries)}
+    return {'width': columns * cell_size, 'height': rows * cell_size, 'cell': cell_size, 'sprites': positions}
+
+
+def _make_cell(data, cell_size):
+    from PIL import Image, ImageOps  # Imported on first use to keep app startup fast
+
+    with Image.open(io.BytesIO(data)) as img:
+        img.draft('RGB', (cell_size * 2, cell_size * 2))  # Lets JPEG decode at reduced size
+        cell = ImageOps.fit(img.convert('RGBA'), (cell_size, cell_size), Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    cell.save(output, format='PNG', compress_level=1)
+    return output.getvalue()
+
+
+def _add_cell(cells, cache, version_id, version_hash, load, cell_size):
+    try:
+        cells[version_hash] = _make_cell(load(), cell_size)
+    except Exception:
+        current_app.logger.warning('Could not make a sprite cell for version %s', version_id)
+        return
+    cache.put(f'cell-{version_hash}-{cell_size}.png', cells[version_hash])
+
+
+def _cells(entries, cell_size, cache):
+    """PNG cell per content hash, decoding payloads only for cells not yet cached"""
+    cells, missing = {}, {}
+    for _, version_id, version_hash in entries:
+        if version_hash in cells:
+            continue
+        data = cache.get(f'cell-{version_hash}-{cell_size}.png')
+        if data is None:
+            missing[version_id] = version_hash
+        cells[version_hash] = data
+
+    if missing:
+        versions = ImageVersion.__table__
+        result = db.session.execute(
+            select(versions.c.id, versions.c.data, versions.c.link_path, versions.c.payload_shared,
+                   versions.c.payload_in_origin)
+            .where(versions.c.id.in_(list(missing))),
+            execution_options={'yield_per': 16}
+        )
+        linked = []
+        for version_id, data, link_path, shared, in_origin in result:
+            if link_path or shared or in_origin:
+                linked.append(version_id)  # Read once the result is consumed; drift checks may commit
+                continue
+            _add_cell(cells, cache, version_id, missing[version_id], lambda: data, cell_size)
+        for version_id in linked:
+            _add_cell(cells, cache, version_id, missing[version_id],
+                      lambda: read_payload(db.session.get(ImageVersion, version_id)), cell_size)
+    return {version_hash: data for version_hash, data in cells.items() if data is not None}
+
+
+def build_sheet(entries, cell_size, cache):
+    """Sheet WebP bytes for entries, from the cache when this page was built before"""
+    name = f'sheet-{sheet_key(entries, cell_size)}.webp'
+    data = cache.get(name)
+    if data is not None:
+        return data
+
+    from PIL import Image
+
+    layout = sheet_layout(entries, cell_size)
+    cells = _cells(entries, cell_size, cache)
+    sheet = Image.new('RGBA', (layout['width'], layout['height']), (0, 0, 0, 0))
+    for image_id, _, version_hash in entries:
+        if version_hash in cells:
+            position = layout['sprites'][image_id]
+            with Image.open(io.BytesIO(cells[version_hash])) as cell:
+                sheet.paste(cell, (position['x'], position['y']))
+    output = io.BytesIO()
+    sheet.save(output, format='WEBP', quality=current_app.config.get('SPRITE_QUALITY', 80), method=4)
+    data = output.getvalue()
+    cache.put(name, data)
+    return data
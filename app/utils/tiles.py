@@ -0,0 +1,282 @@
+"""Deep-zoom tile pyramids for large images.
+
+Pyramids follow the Deep Zoom (DZI) layout: level ``max_level`` is the image at
+full size, each level below halves it (rounding up) down to 1x1 at level 0, and
+every level is cut into ``TILE_SIZE`` square tiles named ``<col>_<row>``.
+
+Pyramids are keyed by the version's content hash and built lazily: the first
+request for a tile decodes the payload once and writes that level plus every
+lower level that is still missing, so a viewer that starts zoomed out never
+pays for the full-resolution tiles. The cache is bounded by
+``TILE_CACHE_MAX_MB`` and evicts whole pyramids, least recently viewed first.
+"""
+import io
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+from flask import Response, current_app, request
+
+from .blob_store import read_payload
+from .helpers import UndecodableImageError
+
+TILE_SIZE = 256
+TILE_OVERLAP = 0
+INFO_FILE = 'info.json'
+
+
+def level_count(width, height):
+    """Number of pyramid levels, from 1x1 up to full size"""
+    return int(math.ceil(math.log2(max(width, height, 1)))) + 1
+
+
+def level_size(width, height, level, max_level):
+    """Pixel size of one pyramid level"""
+    factor = 2 ** (max_level - level)
+    return -(-width // factor), -(-height // factor)
+
+
+def _payload(data):
+    """Payload bytes from either bytes or a zero-argument loader"""
+    return data() if callable(data) else data
+
+
+class TileCache:
+    """Size-bounded LRU of tile pyramids, one directory per content hash.
+
+    Methods taking ``data`` also accept a callable returning the payload, so it
+    is only loaded when a level actually has to be built.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._build_locks = {}
+        self._entries = None  # content hash -> bytes on disk, least recently viewed first
+        self._total = 0
+        self.evictions = 0
+
+    def _load(self):
+        """Index existing pyramids by the mtime of their info file (bumped on every view)"""
+        os.makedirs(self.directory, exist_ok=True)
+        pyramids = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_dir() or entry.name.startswith('.'):
+                    continue
+                try:
+                    mtime = os.stat(os.path.join(entry.path, INFO_FILE)).st_mtime
+                except FileNotFoundError:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                    continue
+                size = sum(os.path.getsize(os.path.join(root, name))
+                           for root, _, names in os.walk(entry.path) for name in names)
+                pyramids.append((mtime, entry.name, size))
+        self._entries = OrderedDict((name, size) for _, name, size in sorted(pyramids))
+        self._total = sum(self._entries.values())
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self._entries is None:
+                self._load()
+
+    def _pyramid_dir(self, digest):
+        return os.path.join(self.directory, digest)
+
+    def info(self, digest, data):
+        """Pyramid description for a payload, reading only the image header on first use"""
+        self._ensure_loaded()
+        path = os.path.join(self._pyramid_dir(digest), INFO_FILE)
+        try:
+            with open(path) as f:
+                info = json.load(f)
+            os.utime(path)
+            with self._lock:
+                if digest in self._entries:
+                    self._entries.move_to_end(digest)
+            return info
+        except FileNotFoundError:
+            pass
+
+        from PIL import Image  # Imported on first use to keep app startup fast
+
+        payload = _payload(data)
+        try:
+            with Image.open(io.BytesIO(payload)) as img:
+                width, height = img.size
+                has_alpha = img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+        except OSError as e:  # Includes PIL.UnidentifiedImageError
+            raise UndecodableImageError(str(e)) from e
+        info = {
+            'width': width,
+            'height': height,
+            'tile_size': TILE_SIZE,
+            'overlap': TILE_OVERLAP,
+            'format': 'png' if has_alpha else 'jpg',
+            'levels': level_count(width, height),
+            'built': [],
+        }
+        os.makedirs(self._pyramid_dir(digest), exist_ok=True)
+        self._write_info(digest, info)
+        return info
+
+    def _write_info(self, digest, info):
+        fd, temp_path = tempfile.mkstemp(dir=self._pyramid_dir(digest), prefix='.tmp-')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(info, f)
+        os.replace(temp_path, os.path.join(self._pyramid_dir(digest), INFO_FILE))
+
+    def tile(self, digest, data, level, col, row):
+        """Bytes of one tile, building its level first when needed; None if out of range"""
+        info = self.info(digest, data)
+        max_level = info['levels'] - 1
+        if not 0 <= level <= max_level:
+            return None
+        width, height = level_size(info['width'], info['height'], level, max_level)
+        if not (0 <= col < -(-width // TILE_SIZE) and 0 <= row < -(-height // TILE_SIZE)):
+            return None
+
+        path = os.path.join(self._pyramid_dir(digest), str(level), f"{col}_{row}.{info['format']}")
+        if level not in info['built']:
+            with self._lock:
+                build_lock = self._build_locks.setdefault(digest, threading.Lock())
+            with build_lock:
+                info = self.info(digest, data)
+                if level not in info['built']:
+                    self._build(digest, data, info, level)
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            # Evicted between building and reading; rebuild on the next request
+            return None
+
+    def _build(self, digest, data, info, level):
+        """Write level and every missing level below it from one decode of the payload"""
+        from PIL import Image  # Imported on first use to keep app startup fast
+
+        max_level = info['levels'] - 1
+        written = 0
+        payload = _payload(data)
+        try:
+            with Image.open(io.BytesIO(payload)) as img:
+                img = img.convert('RGBA' if info['format'] == 'png' else 'RGB')
+        except OSError as e:  # Includes PIL.UnidentifiedImageError; errors writing tiles propagate
+            raise UndecodableImageError(str(e)) from e
+        factor = 2 ** (max_level - level)
+        if factor > 1:
+            img = img.reduce(factor)
+        for current in range(level, -1, -1):
+            if current not in info['built']:
+                written += self._write_level(digest, img, current, info['format'])
+                info['built'].append(current)
+            if current:
+                img = img.reduce(2)
+        self._write_info(digest, info)
+
+        evicted = []
+        with self._lock:
+            self._total += written
+            self._entries[digest] = self._entries.get(digest, 0) + written
+            self._entries.move_to_end(digest)
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                old_digest, old_size = self._entries.popitem(last=False)
+                self._total -= old_size
+                self.evictions += 1
+                evicted.append(old_digest)
+                self._build_locks.pop(old_digest, None)
+        for old_digest in evicted:
+            shutil.rmtree(self._pyramid_dir(old_digest), ignore_errors=True)
+
+    def _write_level(self, digest, img, level, extension):
+        directory = os.path.join(self._pyramid_dir(digest), str(level))
+        os.makedirs(directory, exist_ok=True)
+        quality = current_app.config.get('TILE_QUALITY', 85)
+        written = 0
+        for top in range(0, img.height, TILE_SIZE):
+            for left in range(0, img.width, TILE_SIZE):
+                tile = img.crop((left, top, min(left + TILE_SIZE, img.width), min(top + TILE_SIZE, img.height)))
+                output = io.BytesIO()
+                if extension == 'png':
+                    tile.save(output, format='PNG', compress_level=6)
+                else:
+                    tile.save(output, format='JPEG', quality=quality)
+                name = f'{left // TILE_SIZE}_{top // TILE_SIZE}.{extension}'
+                # Written aside and renamed so a concurrent reader never sees a partial tile
+                fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(output.getvalue())
+                os.replace(temp_path, os.path.join(directory, name))
+                written += len(output.getvalue())
+        return written
+
+    def stats(self):
+        self._ensure_loaded()
+        with self._lock:
+            return {'pyramids': len(self._entries), 'bytes': self._total, 'evictions': self.evictions}
+
+
+def init_tile_cache(app):
+    """Create the on-disk tile cache when TILES_ENABLED is set"""
+    if not app.config.get('TILES_ENABLED', True):
+        return None
+    directory = app.config.get('TILE_CACHE_DIR') or os.path.join(app.instance_path, 'tile_cache')
+    cache = TileCache(directory, int(app.config.get('TILE_CACHE_MAX_MB', 2048) * 1024 * 1024))
+    app.extensions['tile_cache'] = cache
+    return cache
+
+
+def dzi_descriptor(info):
+    """Deep Zoom XML descriptor for a pyramid"""
+    return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+            f'Format="{info["format"]}" Overlap="{info["overlap"]}" TileSize="{info["tile_size"]}">'
+            f'<Size Width="{info["width"]}" Height="{info["height"]}"/></Image>')
+
+
+def _cached_response(data, mimetype, etag):
+    """Tiles of a content hash never change, so clients may keep them indefinitely"""
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        response = Response(data, mimetype=mimetype)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, max-age=31536000, immutable'
+    return response
+
+
+def descriptor_response(version):
+    """DZI descriptor for a version, or None when tiling is unavailable"""
+    cache = current_app.extensions.get('tile_cache')
+    if cache is None or not version.content_hash:
+        return None
+    etag = f'{version.content_hash}-dzi'
+    if etag in request.if_none_match:
+        return _cached_response(None, None, etag)
+    info = cache.info(version.content_hash, lambda: read_payload(version))
+    return _cached_response(dzi_descriptor(info), 'application/xml', etag)
+
+
+def tile_response(version, level, col, row, extension):
+    """One tile of a version's pyramid, or None when it does not exist"""
+    cache = current_app.extensions.get('tile_cache')
+    if cache is None or not version.content_hash:
+        return None
+    etag = f'{version.content_hash}-{level}-{col}-{row}'
+    if etag in request.if_none_match:
+        return _cached_response(None, None, etag)
+
+    def load():
+        return read_payload(version)  # Read only when a level has to be built
+
+    if extension != cache.info(version.content_hash, load)['format']:
+        return None
+    data = cache.tile(version.content_hash, load, level, col, row)
+    if data is None:
+        return None
+    return _cached_response(data, 'image/png' if extension == 'png' else 'image/jpeg', etag)
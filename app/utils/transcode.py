@@ -0,0 +1,229 @@
+"""Content-negotiated image delivery with a persistent transcode cache.
+
+Formats browsers cannot display (BMP, TIFF, ...) are transcoded on request to
+the best of AVIF, WebP and PNG that the client's ``Accept`` header explicitly
+lists, falling back to PNG. Transcodes are stored on disk as
+``<content hash>.<format>``; the cache is bounded by ``TRANSCODE_CACHE_MAX_MB``
+and evicts the least recently served files first. A failed transcode leaves
+an empty ``<content hash>.<format>.failed`` marker in the same cache, so the
+original is served without retrying until the marker is evicted.
+``?original=1`` always returns the stored bytes unchanged.
+"""
+import io
+import mimetypes
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from flask import Response, current_app, request
+
+# Negotiable output formats, most preferred first: mimetype -> (Pillow format, extension)
+OUTPUT_FORMATS = OrderedDict([
+    ('image/avif', ('AVIF', 'avif')),
+    ('image/webp', ('WEBP', 'webp')),
+    ('image/png', ('PNG', 'png')),
+])
+
+# Originals in these formats are served as stored
+BROWSER_NATIVE_TYPES = {'image/png', 'image/jpeg', 'image/gif', 'image/webp', 'image/avif'}
+
+
+class TranscodeCache:
+    """Size-bounded LRU of transcoded files in one directory"""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None  # name -> size, least recently used first
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _load(self):
+        """Index existing files, oldest access first (mtime is bumped on every hit)"""
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file() and not entry.name.startswith('.'):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name, stat.st_size))
+        self._entries = OrderedDict((name, size) for _, name, size in sorted(files))
+        self._total = sum(self._entries.values())
+
+    def get(self, name):
+        """Return the cached bytes for name, or None"""
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            if name not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._total -= self._entries.pop(name, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, name, data):
+        """Store data under name, then evict least recently used files over budget"""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if self._entries is None:
+                self._load()
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, os.path.join(self.directory, name))
+
+        evicted = []
+        with self._lock:
+            self._total += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                old_name, old_size = self._entries.popitem(last=False)
+                self._total -= old_size
+                self.evictions += 1
+                evicted.append(old_name)
+        for old_name in evicted:
+            try:
+                os.unlink(os.path.join(self.directory, old_name))
+            except FileNotFoundError:
+                pass
+
+    def contains(self, name):
+        """Whether name is cached, without counting a hit or a miss"""
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            return name in self._entries
+
+    def discard(self, name):
+        """Remove name from the cache if present"""
+        with self._lock:
+            if self._entries is None:
+                self._load()
+            self._total -= self._entries.pop(name, 0)
+        try:
+            os.unlink(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries or ()),
+                'bytes': self._total,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+def init_transcode_cache(app):
+    """Create the on-disk transcode cache when TRANSCODE_ENABLED is set"""
+    if not app.config.get('TRANSCODE_ENABLED', True):
+        return None
+    directory = app.config.get('TRANSCODE_CACHE_DIR') or os.path.join(app.instance_path, 'transcode_cache')
+    cache = TranscodeCache(directory, int(app.config.get('TRANSCODE_CACHE_MAX_MB', 1024) * 1024 * 1024))
+    app.extensions['transcode_cache'] = cache
+    return cache
+
+
+def negotiate_format(accept):
+    """Best output mimetype the client lists explicitly; wildcards alone get PNG"""
+    explicit = {value for value, quality in accept if quality > 0}
+    for mimetype in OUTPUT_FORMATS:
+        if mimetype in explicit:
+            return mimetype
+    return 'image/png'
+
+
+def transcode(data, mimetype):
+    """Re-encode image bytes as mimetype"""
+    from PIL import Image  # Imported on first use to keep app startup fast
+
+    pil_format = OUTPUT_FORMATS[mimetype][0]
+    quality = current_app.config.get('TRANSCODE_QUALITY', 90)
+    with Image.open(io.BytesIO(data)) as img:
+        has_alpha = img.mode in ('RGBA', 'LA', 'PA') or (img.mode == 'P' and 'transparency' in img.info)
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+        output = io.BytesIO()
+        if pil_format == 'PNG':
+            img.save(output, format='PNG', compress_level=6)
+        else:
+            img.save(output, format=pil_format, quality=quality)
+        return output.getvalue()
+
+
+def _original_response(version, mimetype):
+    """The stored bytes, validated by their content hash"""
+    from .blob_store import read_payload, sendfile_response  # blob_store builds on this module's cache
+
+    etag = version.content_hash
+    if etag and etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        # Permissions were checked by the view, so the front server can send the file
+        response = sendfile_response(version, mimetype) or Response(read_payload(version), mimetype=mimetype)
+    if etag:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, max-age=86400'
+    return response
+
+
+def image_response(version, filename):
+    """Serve a version's bytes, transcoded to a negotiated format when the original is not web-native"""
+    from .blob_store import read_payload
+
+    original_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    cache = current_app.extensions.get('transcode_cache')
+
+    wants_original = request.args.get('original') == '1'
+    if wants_original or cache is None or original_type in BROWSER_NATIVE_TYPES \
+            or not original_type.startswith('image/') or not version.content_hash:
+        return _original_response(version, original_type)
+
+    mimetype = negotiate_format(request.accept_mimetypes)
+    extension = OUTPUT_FORMATS[mimetype][1]
+    failed = f'{version.content_hash}.{extension}.failed'
+    if cache.contains(failed):
+        response = _original_response(version, original_type)
+        response.vary.add('Accept')
+        return response
+
+    etag = f'{version.content_hash}-{extension}'
+    if etag in request.if_none_match:
+        response = Response(status=304)
+    else:
+        name = f'{version.content_hash}.{extension}'
+        data = cache.get(name)
+        if data is None:
+            try:
+                data = transcode(read_payload(version), mimetype)
+            except Exception:
+                current_app.logger.exception('Transcoding version %s to %s failed', version.id, mimetype)
+                cache.put(failed, b'')
+                response = _original_response(version, original_type)
+                response.vary.add('Accept')
+                return response
+            cache.put(name, data)
+        response = Response(data, mimetype=mimetype)
+
+    response.set_etag(etag)
+    response.vary.add('Accept')
+    response.headers['Cache-Control'] = 'private, max-age=86400'
+    return response
@@ -0,0 +1,151 @@
+"""Set-based move and copy of images between collections.
+
+Moving rewrites ``texture_image.collection_id`` with one UPDATE. Copying adds
+the images with one INSERT ... SELECT ... RETURNING id (each copy records
+``copied_from_id``) and their complete version history with a second INSERT ...
+SELECT joined on that column and limited to the returned ids, so concurrent
+inserts by other writers are never mistaken for copies; a final UPDATE points
+each copy at its current version. Copied versions
+share the source's stored payloads (see utils.dedup), so no blob is duplicated
+or passes through Python. Copies keep their content hashes, so the storage ledger
+counts them as shared payloads and adds no physical bytes for hashes the target
+already holds.
+
+Neither path goes through the ORM, so the ledger is updated here from one
+grouped query over the affected versions.
+"""
+from datetime import datetime
+
+from sqlalchemy import select, func, and_, or_, case, literal
+
+from .. import db
+from ..models.collection import Collection
+from ..models.image import TextureImage, ImageVersion
+from ..models.storage import (StorageUsage, StorageBlobRef, COLLECTION_SCOPE, USER_SCOPE, apply_storage_deltas,
+                               stores_payload)
+from .cache import bump_collection_generation
+from .quota import effective_quota, MB
+
+# Image columns carried over to a copy unchanged
+COPIED_IMAGE_COLUMNS = ('filename', 'original_filepath', 'current_filepath', 'width', 'height', 'file_size',
+                        'modification_date', 'uploaded_by')
+COPIED_VERSION_COLUMNS = ('version_number', 'filepath', 'uploaded_by', 'uploaded_at', 'is_current', 'data',
+                          'size', 'content_hash', 'link_path', 'link_mtime_ns', 'payload_in_origin')
+
+
+def _selections(source_id, image_ids, chunk_size):
+    """WHERE clauses covering the chosen images of the source collection, in bounded chunks"""
+    images = TextureImage.__table__
+    in_source = and_(images.c.collection_id == source_id, images.c.deleted_at.is_(None))
+    if image_ids is None:
+        yield in_source
+        return
+    image_ids = sorted(set(image_ids))
+    for i in range(0, len(image_ids), chunk_size):
+        yield and_(in_source, images.c.id.in_(image_ids[i:i + chunk_size]))
+
+
+def _version_groups(selection):
+    """(uploaded_by, content_hash, versions, size) for the versions of the selected images"""
+    versions = ImageVersion.__table__
+    images = TextureImage.__table__
+    return db.session.execute(
+        select(versions.c.uploaded_by, versions.c.content_hash, func.count(), func.max(versions.c.size))
+        .select_from(versions.join(images, images.c.id == versions.c.image_id))
+        .where(selection, versions.c.content_hash.isnot(None))
+        .group_by(versions.c.uploaded_by, versions.c.content_hash)
+    ).all()
+
+
+def _check_target_quota(target, groups):
+    """Raise ValueError when the payloads new to the target would exceed its quota"""
+    quota = effective_quota(COLLECTION_SCOPE, target)
+    if quota is None:
+        return
+    sizes = {digest: size or 0 for _, digest, _, size in groups}
+    refs = StorageBlobRef.__table__
+    present = set()
+    digests = list(sizes)
+    for i in range(0, len(digests), 500):
+        present.update(db.session.execute(
+            select(refs.c.content_hash).where(refs.c.scope == COLLECTION_SCOPE, refs.c.scope_id == target.id,
+                                              refs.c.content_hash.in_(digests[i:i + 500]))
+        ).scalars())
+    added = sum(size for digest, size in sizes.items() if digest not in present)
+    usage = db.session.get(StorageUsage, (COLLECTION_SCOPE, target.id))
+    used = usage.physical_bytes if usage else 0
+    if added and used + added > quota:
+        raise ValueError(f'{target.name} has used {used / MB:.1f} MB of its {quota / MB:.1f} MB storage quota; '
+                         f'these images would add {added / MB:.1f} MB.')
+
+
+def transfer_images(source_id, target_id, image_ids=None, copy=False, chunk_size=500):
+    """Move or copy images of one collection into another and commit.
+
+    image_ids selects images of the source collection; None takes all of them.
+    Ids outside the source collection are ignored. Returns the number of
+    images moved or copied; raises ValueError when the target's quota would be
+    exceeded, before anything is changed.
+    """
+    if source_id == target_id:
+        raise ValueError('Choose a different collection.')
+    target = db.session.get(Collection, target_id)
+    images = TextureImage.__table__
+    versions = ImageVersion.__table__
+    selections = list(_selections(source_id, image_ids, chunk_size))
+
+    deltas = {}
+    groups = []
+    for selection in selections:
+        groups.extend(_version_groups(selection))
+    _check_target_quota(target, groups)
+    for uploaded_by, digest, count, size in groups:
+        deltas.setdefault((COLLECTION_SCOPE, target_id, digest), [0, size or 0])[0] += count
+        if copy:
+            deltas.setdefault((USER_SCOPE, uploaded_by, digest), [0, size or 0])[0] += count
+        else:
+            deltas.setdefault((COLLECTION_SCOPE, source_id, digest), [0, size or 0])[0] -= count
+
+    transferred = 0
+    try:
+        if copy:
+            now = datetime.utcnow()
+            copy_ids = []
+            for selection in selections:
+                copy_ids.extend(db.session.execute(images.insert().from_select(
+                    COPIED_IMAGE_COLUMNS + ('collection_id', 'created_at', 'is_published', 'copied_from_id'),
+                    select(*(images.c[name] for name in COPIED_IMAGE_COLUMNS),
+                           literal(target_id), literal(now), literal(False), images.c.id)
+                    .where(selection).order_by(images.c.id)
+                ).returning(images.c.id)).scalars())
+            transferred = len(copy_ids)
+            copies = images.alias('copies')
+            # Stored payloads are shared with the copies rather than duplicated
+            columns = [versions.c[name] for name in COPIED_VERSION_COLUMNS]
+            columns[COPIED_VERSION_COLUMNS.index('data')] = case((stores_payload(versions), literal(b'')),
+                                                                 else_=versions.c.data)
+            columns.append(or_(versions.c.payload_shared, stores_payload(versions)))
+            current = (select(versions.c.id)
+                       .where(versions.c.image_id == images.c.id, versions.c.is_current == True)  # noqa: E712
+                       .limit(1).scalar_subquery())
+            for i in range(0, len(copy_ids), chunk_size):
+                chunk = copy_ids[i:i + chunk_size]
+                db.session.execute(versions.insert().from_select(
+                    ('image_id',) + COPIED_VERSION_COLUMNS + ('payload_shared',),
+                    select(copies.c.id, *columns)
+                    .select_from(versions.join(copies, copies.c.copied_from_id == versions.c.image_id))
+                    .where(copies.c.id.in_(chunk))
+                ))
+                db.session.execute(images.update().where(images.c.id.in_(chunk)).values(current_version_id=current))
+        else:
+            for selection in selections:
+                result = db.session.execute(images.update().where(selection).values(collection_id=target_id))
+                transferred += result.rowcount
+        apply_storage_deltas(db.session.connection(), deltas)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    bump_collection_generation(source_id, target_id)
+    return transferred
@@ -0,0 +1,268 @@
+"""Garbage collection of orphaned files in UPLOAD_FOLDER and the blob origin.
+
+Uploads are written to disk before their database rows are committed, and
+nothing removes the file when its image, version or collection is deleted.
+The collector builds the set of paths still referenced by
+``ImageVersion.filepath`` and ``TextureImage.current_filepath``, streams a walk
+of the upload directory, and unlinks files that are neither referenced nor
+younger than the grace period (which protects uploads still in flight).
+Before deleting, the references are read again and each candidate's mtime is
+checked once more, so a deduplicated upload that started reusing a file during
+the walk keeps it.
+
+References are compared by path relative to the upload folder. Stored paths
+that do not resolve inside it (for example ones written while the app ran
+from another working directory) fall back to their file name, which is unique
+thanks to the uuid prefix every upload gets.
+
+With ``BLOB_ORIGIN = 'directory'`` the origin's ``<aa>/<hash>`` files are swept
+the same way against ``ImageVersion.content_hash``, with the same grace period,
+which also covers files written by uploads whose transaction rolled back.
+Writers refresh the mtime of a payload file they reuse, and candidates are
+checked against the database and their mtime once more just before unlinking.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from sqlalchemy import select
+
+from .. import db
+from ..models.image import TextureImage, ImageVersion
+
+
+@dataclass
+class GCReport:
+    """Outcome of one collection run"""
+    scanned: int = 0
+    referenced: int = 0
+    too_recent: int = 0
+    orphaned: list = field(default_factory=list)
+    orphaned_bytes: int = 0
+    deleted: int = 0
+    errors: list = field(default_factory=list)
+    dry_run: bool = True
+    duration: float = 0.0
+
+    def summary(self):
+        action = 'would delete' if self.dry_run else 'deleted'
+        count = len(self.orphaned) if self.dry_run else self.deleted
+        return (f'Scanned {self.scanned} files in {self.duration:.2f}s: {self.referenced} referenced, '
+                f'{self.too_recent} inside grace period, {action} {count} '
+                f'({self.orphaned_bytes / (1024 * 1024):.1f} MB), {len(self.errors)} errors')
+
+
+def _reference_key(path, root):
+    """Key a stored filepath by its location relative to the upload root"""
+    absolute = os.path.abspath(path)
+    if absolute.startswith(root + os.sep):
+        return os.path.relpath(absolute, root)
+    return os.path.basename(path)
+
+
+def referenced_upload_paths(upload_root, batch_size=5000):
+    """Set of upload-relative paths referenced by any version or image row"""
+    root = os.path.abspath(upload_root)
+    references = set()
+    for column in (ImageVersion.filepath, TextureImage.current_filepath):
+        rows = (db.session.query(column)
+                .filter(column.isnot(None))
+                .distinct()
+                .execution_options(yield_per=batch_size))
+        for (path,) in rows:
+            if path:
+                references.add(_reference_key(path, root))
+    return references
+
+
+def walk_uploads(upload_root):
+    """Yield (relative path, DirEntry) for every file below upload_root"""
+    root = os.path.abspath(upload_root)
+    pending = [root]
+    while pending:
+        directory = pending.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield os.path.relpath(entry.path, root), entry
+        except FileNotFoundError:
+            continue
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+        return None
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        return f'{path}: {e}'
+
+
+def referenced_blob_hashes(batch_size=5000):
+    """Set of content hashes referenced by any version row"""
+    rows = (db.session.query(ImageVersion.content_hash)
+            .filter(ImageVersion.content_hash.isnot(None))
+            .distinct()
+            .execution_options(yield_per=batch_size))
+    return {digest for (digest,) in rows}
+
+
+def _still_unreferenced(digests, chunk_size=500):
+    """The subset of digests that no version references right now"""
+    versions = ImageVersion.__table__
+    digests = list(digests)
+    referenced = set()
+    for i in range(0, len(digests), chunk_size):
+        referenced.update(db.session.execute(
+            select(versions.c.content_hash).where(versions.c.content_hash.in_(digests[i:i + chunk_size]))
+        ).scalars())
+    return set(digests) - referenced
+
+
+def collect_orphaned_blobs(origin_root, grace_seconds=3600, dry_run=True, workers=8):
+    """Find, and unless dry_run delete, origin files whose hash no version references.
+
+    Must run inside an app context. Returns a GCReport.
+    """
+    started = time.perf_counter()
+    report = GCReport(dry_run=dry_run)
+    if not os.path.isdir(origin_root):
+        return report
+
+    references = referenced_blob_hashes()
+    cutoff = time.time() - grace_seconds
+    sizes = {}
+
+    for relative_path, entry in walk_uploads(origin_root):
+        report.scanned += 1
+        if os.path.basename(relative_path) in references:
+            report.referenced += 1
+            continue
+        stat = entry.stat(follow_symlinks=False)
+        if stat.st_mtime > cutoff:
+            report.too_recent += 1
+            continue
+        report.orphaned.append(entry.path)
+        sizes[entry.path] = stat.st_size
+    report.orphaned_bytes = sum(sizes.values())
+
+    if not dry_run and report.orphaned:
+        # A version may have started referencing a payload since the scan
+        unreferenced = _still_unreferenced(os.path.basename(path) for path in report.orphaned)
+        stale = []
+        for path in report.orphaned:
+            try:
+                if os.path.basename(path) in unreferenced and os.stat(path).st_mtime <= cutoff:
+                    stale.append(path)
+            except FileNotFoundError:
+                continue
+        report.orphaned = stale
+        report.orphaned_bytes = sum(sizes[path] for path in stale)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for error in pool.map(_unlink, stale):
+                if error:
+                    report.errors.append(error)
+        report.deleted = len(stale) - len(report.errors)
+
+    report.duration = time.perf_counter() - started
+    return report
+
+
+def collect_orphaned_uploads(upload_root, grace_seconds=3600, dry_run=True, workers=8):
+    """Find, and unless dry_run delete, unreferenced files under upload_root.
+
+    Must run inside an app context. Returns a GCReport.
+    """
+    started = time.perf_counter()
+    report = GCReport(dry_run=dry_run)
+    if not os.path.isdir(upload_root):
+        return report
+
+    references = referenced_upload_paths(upload_root)
+    cutoff = time.time() - grace_seconds
+
+    for relative_path, entry in walk_uploads(upload_root):
+        report.scanned += 1
+        if relative_path in references or os.path.basename(relative_path) in references:
+            report.referenced += 1
+            continue
+        stat = entry.stat(follow_symlinks=False)
+        if stat.st_mtime > cutoff:
+            report.too_recent += 1
+            continue
+        report.orphaned.append(entry.path)
+        report.orphaned_bytes += stat.st_size
+
+    if not dry_run and report.orphaned:
+        # An upload may have started referencing a file since the scan
+        root = os.path.abspath(upload_root)
+        references = referenced_upload_paths(upload_root)
+        stale = []
+        for path in report.orphaned:
+            relative_path = os.path.relpath(path, root)
+            if relative_path in references or os.path.basename(path) in references:
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime <= cutoff:
+                stale.append((path, stat.st_size))
+        report.orphaned = [path for path, _ in stale]
+        report.orphaned_bytes = sum(size for _, size in stale)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for error in pool.map(_unlink, report.orphaned):
+                if error:
+                    report.errors.append(error)
+        report.deleted = len(report.orphaned) - len(report.errors)
+
+    report.duration = time.perf_counter() - started
+    return report
+
+
+def init_upload_gc(app):
+    """Start a background collector when UPLOAD_GC_INTERVAL_HOURS is set.
+
+    Call this from the one process that runs background jobs (see
+    init_deletion_worker), never from create_app.
+    """
+    interval_hours = app.config.get('UPLOAD_GC_INTERVAL_HOURS', 0)
+    if not interval_hours or app.config.get('TESTING'):
+        return None
+
+    def run():
+        while True:
+            time.sleep(interval_hours * 3600)
+            try:
+                with app.app_context():
+                    report = collect_orphaned_uploads(
+                        app.config['UPLOAD_FOLDER'],
+                        grace_seconds=app.config.get('UPLOAD_GC_GRACE_HOURS', 24) * 3600,
+                        dry_run=False,
+                        workers=app.config.get('UPLOAD_GC_WORKERS', 8)
+                    )
+                    blob_report = None
+                    if app.config.get('BLOB_ORIGIN') == 'directory':
+                        blob_report = collect_orphaned_blobs(
+                            app.config['BLOB_ORIGIN_DIR'],
+                            grace_seconds=app.config.get('UPLOAD_GC_GRACE_HOURS', 24) * 3600,
+                            dry_run=False,
+                            workers=app.config.get('UPLOAD_GC_WORKERS', 8)
+                        )
+                    db.session.remove()
+                app.logger.info('Upload GC: %s', report.summary())
+                if blob_report is not None:
+                    app.logger.info('Blob origin GC: %s', blob_report.summary())
+            except Exception:
+                app.logger.exception('Upload GC run failed')
+
+    thread = threading.Thread(target=run, name='upload-gc', daemon=True)
+    thread.start()
+    app.extensions['upload_gc'] = thread
+    return thread
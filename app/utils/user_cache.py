@@ -0,0 +1,122 @@
+"""Process-local cache of logged-in users for Flask-Login.
+
+``load_user`` runs on every request, including each thumbnail and image hit a
+gallery page fires. Instead of a users-table query per request, lightweight
+``UserSnapshot`` objects are kept in a TTL + LRU cache. Anything not in the
+snapshot (relationships, ``set_password``...) transparently loads the real
+``User`` row for the current request. Any flush that updates or deletes a
+user evicts that user's snapshot, so changes take effect on the next request
+in this process.
+
+Other processes learn of admin and password changes through
+``User.auth_generation``, which every such change bumps. An admin's snapshot
+is trusted for ``USER_CACHE_ADMIN_TTL`` seconds; after that one request reads
+the user's generation (one column) and reloads the snapshot only if it moved.
+Other snapshots live for ``USER_CACHE_TTL``.
+"""
+import time
+
+from flask import current_app, has_app_context
+from flask_login import UserMixin
+from sqlalchemy import event, select
+
+from .. import db
+from ..models.user import User
+from .cache import LRUCache
+
+# Columns copied into the snapshot; everything else is read from the model
+SNAPSHOT_FIELDS = ('id', 'username', 'email', 'is_admin', 'created_at', 'storage_quota', 'auth_generation')
+
+# Changes to these columns bump auth_generation
+AUTH_FIELDS = ('is_admin', 'password_hash')
+
+
+class UserSnapshot(UserMixin):
+    """Detached, read-only copy of a User's columns used as current_user"""
+
+    def __init__(self, user):
+        for field in SNAPSHOT_FIELDS:
+            setattr(self, field, getattr(user, field))
+        self.checked_at = time.monotonic()
+
+    @property
+    def model(self):
+        """The User row for this snapshot, loaded once per session"""
+        return db.session.get(User, self.id)
+
+    def __getattr__(self, name):
+        # Only called for attributes missing from the snapshot
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    def __repr__(self):
+        return f'<UserSnapshot {self.id} {self.username!r}>'
+
+
+def init_user_cache(app):
+    """Create the user snapshot cache when USER_CACHE_ENABLED is set"""
+    if not app.config.get('USER_CACHE_ENABLED', True):
+        return None
+    cache = LRUCache(
+        max_entries=app.config.get('USER_CACHE_MAX_ENTRIES', 1024),
+        ttl=app.config.get('USER_CACHE_TTL', 300)
+    )
+    app.extensions['user_cache'] = cache
+    return cache
+
+
+def load_cached_user(user_id):
+    """Return a UserSnapshot for user_id, or the User itself when caching is off"""
+    cache = current_app.extensions.get('user_cache')
+    if cache is None:
+        return db.session.get(User, user_id)
+
+    snapshot = cache.get(user_id)
+    if snapshot is not None and snapshot.is_admin:
+        snapshot = _revalidate_admin(cache, snapshot)
+    if snapshot is None:
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        snapshot = UserSnapshot(user)
+        cache.set(user_id, snapshot)
+    return snapshot
+
+
+def _revalidate_admin(cache, snapshot):
+    """The admin snapshot, or None when another process changed the user since it was taken"""
+    now = time.monotonic()
+    if now - snapshot.checked_at < current_app.config.get('USER_CACHE_ADMIN_TTL', 30):
+        return snapshot
+    generation = db.session.execute(select(User.auth_generation).where(User.id == snapshot.id)).scalar()
+    if generation != snapshot.auth_generation:
+        cache.delete(snapshot.id)
+        return None
+    snapshot.checked_at = now
+    return snapshot
+
+
+def invalidate_user(user_id):
+    """Drop the cached snapshot for user_id"""
+    if has_app_context():
+        cache = current_app.extensions.get('user_cache')
+        if cache is not None:
+            cache.delete(user_id)
+
+
+@event.listens_for(User, 'before_update')
+def _bump_auth_generation(mapper, connection, user):
+    state = db.inspect(user)
+    if any(state.attrs[field].history.has_changes() for field in AUTH_FIELDS):
+        user.auth_generation = User.auth_generation + 1  # In SQL, so concurrent bumps never collide
+
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, user):
+    invalidate_user(user.id)
+
+
+@event.listens_for(User, 'after_delete')
+def _user_deleted(mapper, connection, user):
+    invalidate_user(user.id)
@@ -0,0 +1,176 @@
+"""Pixel-level comparison of two image versions.
+
+Both payloads are decoded to RGBA arrays (the second is resized to the first
+when their dimensions differ) and compared with vectorized NumPy: per-pixel
+maximum channel delta, PSNR over all channels, and bounding boxes of the
+regions whose delta exceeds ``DIFF_THRESHOLD``. The delta map is rendered as a
+heatmap PNG no larger than ``DIFF_HEATMAP_MAX_SIZE``, using a block maximum so
+single-pixel changes stay visible when downscaled.
+
+Results depend only on the two payloads, so they are cached on disk under the
+pair of content hashes.
+"""
+import io
+import json
+import math
+import os
+from collections import deque
+
+from flask import current_app
+
+from .blob_store import read_payload
+from .transcode import TranscodeCache
+
+# Changed regions are found on a coarse grid of at most this many cells per side
+REGION_GRID = 256
+MAX_REGIONS = 50
+
+
+def init_diff_cache(app):
+    """Create the on-disk cache of diff results"""
+    directory = app.config.get('DIFF_CACHE_DIR') or os.path.join(app.instance_path, 'diff_cache')
+    cache = TranscodeCache(directory, int(app.config.get('DIFF_CACHE_MAX_MB', 256) * 1024 * 1024))
+    app.extensions['diff_cache'] = cache
+    return cache
+
+
+def _decode(data, size=None):
+    """RGBA array of an image, resized to size when given; also returns the original size"""
+    import numpy as np  # Imported on first use; only diffing needs NumPy
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        original_size = img.size
+        img = img.convert('RGBA')
+        if size is not None and img.size != size:
+            img = img.resize(size, Image.Resampling.BILINEAR)
+        return np.asarray(img), original_size
+
+
+def _heatmap_colors():
+    """256-entry black -> red -> yellow -> white lookup table"""
+    import numpy as np
+
+    ramp = np.linspace(0, 3, 256)
+    return (np.clip(np.stack([ramp, ramp - 1, ramp - 2], axis=1), 0, 1) * 255).astype(np.uint8)
+
+
+def _block_max(delta, block):
+    """Downscale a 2-D array by taking the maximum of each block x block cell"""
+    import numpy as np
+
+    height, width = delta.shape
+    padded = np.zeros((-(-height // block) * block, -(-width // block) * block), dtype=delta.dtype)
+    padded[:height, :width] = delta
+    # Separable strided maxima are much faster than reducing a reshaped 4-D view
+    rows = padded[0::block].copy()
+    for offset in range(1, block):
+        np.maximum(rows, padded[offset::block], out=rows)
+    result = rows[:, 0::block].copy()
+    for offset in range(1, block):
+        np.maximum(result, rows[:, offset::block], out=result)
+    return result
+
+
+def _squared_error(absolute, rows=512):
+    """Sum of squared differences, widened to uint16 a band of rows at a time"""
+    import numpy as np
+
+    total = 0
+    for top in range(0, absolute.shape[0], rows):
+        band = absolute[top:top + rows].astype(np.uint16)
+        np.multiply(band, band, out=band)
+        total += int(band.sum(dtype=np.uint64))
+    return total
+
+
+def _changed_regions(mask):
+    """Bounding boxes of 8-connected changed areas, largest first"""
+    import numpy as np
+
+    height, width = mask.shape
+    cell = max(1, -(-max(height, width) // REGION_GRID))
+    grid = _block_max(mask, cell)
+    seen = np.zeros(grid.shape, dtype=bool)
+    regions = []
+    for start in map(tuple, np.argwhere(grid)):
+        if seen[start]:
+            continue
+        seen[start] = True
+        queue = deque([start])
+        top, left, bottom, right = start[0], start[1], start[0], start[1]
+        while queue:
+            y, x = queue.popleft()
+            top, left, bottom, right = min(top, y), min(left, x), max(bottom, y), max(right, x)
+            for ny in (y - 1, y, y + 1):
+                for nx in (x - 1, x, x + 1):
+                    if 0 <= ny < grid.shape[0] and 0 <= nx < grid.shape[1] and grid[ny, nx] and not seen[ny, nx]:
+                        seen[ny, nx] = True
+                        queue.append((ny, nx))
+
+        # Tighten the cell-aligned box to the changed pixels inside it
+        y0, x0 = top * cell, left * cell
+        window = mask[y0:(bottom + 1) * cell, x0:(right + 1) * cell]
+        rows = np.flatnonzero(window.any(axis=1))
+        cols = np.flatnonzero(window.any(axis=0))
+        regions.append({'x': int(x0 + cols[0]), 'y': int(y0 + rows[0]),
+                        'width': int(cols[-1] - cols[0] + 1), 'height': int(rows[-1] - rows[0] + 1)})
+
+    regions.sort(key=lambda region: region['width'] * region['height'], reverse=True)
+    return regions[:MAX_REGIONS]
+
+
+def compare_images(base_data, other_data, threshold=8, heatmap_max_size=1024):
+    """Compare two image payloads; returns (summary dict, heatmap PNG bytes)"""
+    import numpy as np
+    from PIL import Image
+
+    base, (width, height) = _decode(base_data)
+    other, other_size = _decode(other_data, size=(width, height))
+
+    # |a - b| without widening the full arrays
+    absolute = np.maximum(base, other) - np.minimum(base, other)
+    delta = np.maximum(np.maximum(absolute[..., 0], absolute[..., 1]),
+                       np.maximum(absolute[..., 2], absolute[..., 3]))
+    mse = _squared_error(absolute) / absolute.size
+    psnr = None if mse == 0 else round(10 * math.log10(255 ** 2 / mse), 2)
+    mask = delta > threshold
+    changed = int(np.count_nonzero(mask))
+
+    block = max(1, -(-max(width, height) // heatmap_max_size))
+    preview = _block_max(delta, block) if block > 1 else delta
+    peak = int(delta.max())
+    scaled = (preview.astype(np.uint16) * 255 // peak).astype(np.uint8) if peak else preview
+    output = io.BytesIO()
+    Image.fromarray(_heatmap_colors()[scaled]).save(output, format='PNG', compress_level=1)
+
+    summary = {
+        'width': width,
+        'height': height,
+        'resized': other_size != (width, height),
+        'psnr': psnr,
+        'max_delta': peak,
+        'threshold': threshold,
+        'changed_pixels': changed,
+        'changed_ratio': round(changed / (width * height), 6),
+        'regions': _changed_regions(mask) if changed else [],
+    }
+    return summary, output.getvalue()
+
+
+def diff_versions(base, other):
+    """Summary and heatmap for two versions, computed once per content-hash pair"""
+    cache = current_app.extensions.get('diff_cache')
+    threshold = current_app.config.get('DIFF_THRESHOLD', 8)
+    key = f'{base.content_hash}_{other.content_hash}_{threshold}'
+    if cache is not None and base.content_hash and other.content_hash:
+        summary, heatmap = cache.get(f'{key}.json'), cache.get(f'{key}.png')
+        if summary is not None and heatmap is not None:
+            return json.loads(summary), heatmap
+
+    summary, heatmap = compare_images(read_payload(base), read_payload(other), threshold=threshold,
+                                      heatmap_max_size=current_app.config.get('DIFF_HEATMAP_MAX_SIZE', 1024))
+    if cache is not None and base.content_hash and other.content_hash:
+        cache.put(f'{key}.json', json.dumps(summary).encode())
+        cache.put(f'{key}.png', heatmap)
+    return summary, heatmap
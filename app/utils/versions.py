@@ -0,0 +1,21 @@
+"""Current-version bookkeeping.
+
+``TextureImage.current_version_id`` points at an image's current version so
+lookups are a primary-key fetch. ``ImageVersion.is_current`` is kept as well for
+set-based queries over many images (retention, sprites, transfers);
+``set_current_version`` is the one place that changes either, touching only
+the previous and the new current version.
+"""
+
+
+def set_current_version(image, version):
+    """Make version the current version of image; the caller commits.
+
+    version may be new (not yet flushed). The previous current version is
+    found through the pointer, so no other version row is read or written.
+    """
+    previous = image.current_version
+    if previous is not None and previous is not version:
+        previous.is_current = False
+    version.is_current = True
+    image.current_version = version
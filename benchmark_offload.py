@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Worker-occupancy benchmark: payloads sent by the app vs by the front server.
+
+Starts the app on a threaded WSGI server behind a small local reverse proxy
+that, like nginx, streams upstream bodies to the client and honours
+X-Accel-Redirect by sending the named file from BLOB_ORIGIN_DIR with
+os.sendfile(). One large texture is then downloaded through the proxy in two
+modes:
+
+  app      - SENDFILE_MODE off; the worker reads the payload and writes every
+             byte to the proxy
+  offload  - SENDFILE_MODE = 'x-accel-redirect'; the worker only checks
+             permissions and returns a header
+
+Worker occupancy is the time from the WSGI call until the response iterable
+is closed, i.e. how long a worker is unavailable to other requests. Use
+--client-mbps to simulate slow clients, which hold app workers for the whole
+transfer but never hold an offloaded one.
+
+Usage: python benchmark_offload.py [--requests 20] [--size-mb 24] [--concurrency 4] [--client-mbps 0]
+"""
+
+import os
+import sys
+import time
+import argparse
+import http.client
+import io
+import logging
+import statistics
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+ACCEL_PREFIX = '/_blobs/'
+CHUNK = 64 * 1024
+HOP_HEADERS = {'connection', 'keep-alive', 'transfer-encoding', 'x-accel-redirect', 'content-length'}
+
+class Occupancy:
+    """WSGI middleware recording how long each request holds a worker and the bytes it wrote"""
+
+    def __init__(self, app):
+        self.app = app
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        started = time.perf_counter()
+        body = self.app(environ, start_response)
+        written = 0
+        try:
+            for chunk in body:
+                written += len(chunk)
+                yield chunk
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+            with self._lock:
+                self.samples.append((time.perf_counter() - started, written))
+
+    def take(self):
+        with self._lock:
+            samples, self.samples = self.samples, []
+        return samples
+
+def make_proxy(upstream_port, origin_dir):
+    class ProxyHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            upstream = http.client.HTTPConnection('127.0.0.1', upstream_port)
+            headers = {'Cookie': self.headers['Cookie']} if self.headers['Cookie'] else {}
+            upstream.request('GET', self.path, headers=headers)
+            response = upstream.getresponse()
+            accel = response.getheader('X-Accel-Redirect')
+            if accel and accel.startswith(ACCEL_PREFIX):
+                response.read()
+                path = os.path.join(origin_dir, accel[len(ACCEL_PREFIX):])
+                with open(path, 'rb') as f:
+                    size = os.fstat(f.fileno()).st_size
+                    self.send_response(200)
+                    self.send_header('Content-Type', response.getheader('Content-Type'))
+                    self.send_header('Content-Length', str(size))
+                    self.end_headers()
+                    self.wfile.flush()
+                    offset = 0
+                    while offset < size:
+                        offset += os.sendfile(self.connection.fileno(), f.fileno(), offset, size - offset)
+            else:
+                self.send_response(response.status)
+                for name, value in response.getheaders():
+                    if name.lower() not in HOP_HEADERS:
+                        self.send_header(name, value)
+                self.send_header('Content-Length', response.getheader('Content-Length') or '0')
+                self.end_headers()
+                # Streamed as it arrives (proxy_buffering off), so the worker waits on the client
+                while True:
+                    chunk = response.read(CHUNK)
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+            upstream.close()
+
+    return ThreadingHTTPServer(('127.0.0.1', 0), ProxyHandler)
+
+def _serve(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+def _noise_png(size_mb):
+    from PIL import Image
+
+    side = int((size_mb * 1024 * 1024 / 3) ** 0.5)
+    output = io.BytesIO()
+    Image.frombytes('RGB', (side, side), os.urandom(side * side * 3)).save(output, format='PNG', compress_level=0)
+    return output.getvalue()
+
+def _download(port, path, cookie, client_mbps):
+    started = time.perf_counter()
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    connection.request('GET', path, headers={'Cookie': cookie})
+    response = connection.getresponse()
+    received = 0
+    while True:
+        chunk = response.read(CHUNK)
+        if not chunk:
+            break
+        received += len(chunk)
+        if client_mbps:
+            time.sleep(len(chunk) / (client_mbps * 1024 * 1024))
+    connection.close()
+    return time.perf_counter() - started, response.status, received
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare worker occupancy with and without X-Accel-Redirect')
+    parser.add_argument('--requests', type=int, default=20, help='Downloads per mode (default: 20)')
+    parser.add_argument('--size-mb', type=float, default=24, help='Payload size in MB (default: 24)')
+    parser.add_argument('--concurrency', type=int, default=4, help='Parallel downloads (default: 4)')
+    parser.add_argument('--client-mbps', type=float, default=0, help='Per-client read rate in MB/s, 0 = unlimited')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        origin_dir = os.path.join(tmp, 'origin')
+        from config import config
+        settings = config['production']
+        for key, value in {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                           'AUTO_CREATE_TABLES': True, 'REQUEST_METRICS_ENABLED': False, 'PAYLOAD_CACHE_MB': 0,
+                           'BLOB_ORIGIN': 'directory', 'BLOB_ORIGIN_DIR': origin_dir,
+                           'SENDFILE_ACCEL_PREFIX': ACCEL_PREFIX}.items():
+            setattr(settings, key, value)
+        from werkzeug.serving import make_server
+        from app import create_app, db
+        from app.models import User, Collection, TextureImage, ImageVersion
+        from app.utils.versions import set_current_version
+
+        app = create_app('production')
+        data = _noise_png(args.size_mb)
+        with app.app_context():
+            user = User(username='bench', email='bench@example.com', is_admin=True, password_hash='x')
+            db.session.add(user)
+            db.session.flush()
+            collection = Collection(name='Bench', description='', created_by=user.id)
+            db.session.add(collection)
+            db.session.flush()
+            image = TextureImage(filename='noise.png', original_filepath='noise.png', file_size=len(data),
+                                 collection_id=collection.id, uploaded_by=user.id)
+            db.session.add(image)
+            db.session.flush()
+            set_current_version(image, ImageVersion(image_id=image.id, version_number=1, filepath='noise.png',
+                                                    uploaded_by=user.id, data=data))
+            db.session.commit()
+            path = f'/image/{image.id}/serve'
+
+        occupancy = Occupancy(app.wsgi_app)
+        app.wsgi_app = occupancy
+        logging.getLogger('werkzeug').setLevel(logging.ERROR)
+        app_server = make_server('127.0.0.1', 0, app, threaded=True)
+        _serve(app_server)
+        proxy = make_proxy(app_server.server_port, origin_dir)
+        _serve(proxy)
+
+        login = http.client.HTTPConnection('127.0.0.1', proxy.server_port)
+        login.request('GET', '/auth/bypass_login0110')
+        response = login.getresponse()
+        response.read()
+        cookie = '; '.join(value.split(';')[0] for name, value in response.getheaders() if name.lower() == 'set-cookie')
+
+        print(f'{len(data) / 1048576:.1f} MB payload, {args.requests} downloads per mode, '
+              f'concurrency {args.concurrency}, client rate {args.client_mbps or "unlimited"} MB/s')
+        print(f"{'mode':<9}{'worker ms':>11}{'client ms':>11}{'MB via app':>12}{'total s':>10}   (medians)")
+        for mode, setting in (('app', None), ('offload', 'x-accel-redirect')):
+            app.config['SENDFILE_MODE'] = setting
+            _download(proxy.server_port, path, cookie, 0)  # Warm the page cache
+            occupancy.take()
+            started = time.perf_counter()
+            with ThreadPoolExecutor(args.concurrency) as pool:
+                results = list(pool.map(lambda _: _download(proxy.server_port, path, cookie, args.client_mbps),
+                                        range(args.requests)))
+            elapsed = time.perf_counter() - started
+            assert all(status == 200 and received == len(data) for _, status, received in results)
+            samples = occupancy.take()
+            print(f"{mode:<9}{statistics.median(s for s, _ in samples) * 1000:>11.1f}"
+                  f"{statistics.median(r[0] for r in results) * 1000:>11.1f}"
+                  f"{sum(w for _, w in samples) / 1048576:>12.1f}{elapsed:>10.2f}")
+
+        proxy.shutdown()
+        app_server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark: process start to first HTTP response.
+
+Each run starts a fresh Python process that imports the app, calls
+create_app() and serves GET /auth/login through the test client, so import
+cost, table creation, route registration and the first template render are
+all included. Two setups are compared:
+
+  eager  - every route module imported up front, db.create_all() on start,
+           templates compiled from source
+  fast   - lazy route loading, no create_all(), Jinja bytecode cache
+
+Usage: python benchmark_startup.py [--runs 7]
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+CHILD = r'''
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+from config import config
+settings = config['production']
+for key, value in {overrides!r}.items():
+    setattr(settings, key, value)
+from app import create_app
+imported = time.perf_counter()
+app = create_app('production')
+created = time.perf_counter()
+response = app.test_client().get('/auth/login')
+assert response.status_code == 200, response.status_code
+finished = time.perf_counter()
+print(json.dumps({{
+    'import': imported - started,
+    'create_app': created - imported,
+    'first_response': finished - created,
+    'total': finished - started,
+}}))
+'''
+
+SETUPS = {
+    'eager': {'LAZY_ROUTES': False, 'AUTO_CREATE_TABLES': True, 'JINJA_BYTECODE_CACHE': False},
+    'fast': {'LAZY_ROUTES': True, 'AUTO_CREATE_TABLES': False, 'JINJA_BYTECODE_CACHE': True},
+}
+
+def run_once(overrides, env):
+    root = os.path.dirname(os.path.abspath(__file__))
+    code = CHILD.format(root=root, overrides=overrides)
+    output = subprocess.run([sys.executable, '-c', code], cwd=root, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import-to-first-response time')
+    parser.add_argument('--runs', type=int, default=7, help='Runs per setup (default: 7)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        # Create the schema once, as init_database.py would before a deployment
+        run_once(SETUPS['eager'], env)
+
+        print(f"{'setup':<8}{'import':>10}{'create_app':>12}{'first req':>12}{'total':>10}   (median ms of {args.runs})")
+        for name, overrides in SETUPS.items():
+            # One untimed run warms the OS file cache and the Jinja bytecode cache
+            run_once(overrides, env)
+            samples = [run_once(overrides, env) for _ in range(args.runs)]
+            medians = {key: statistics.median(s[key] for s in samples) * 1000 for key in samples[0]}
+            print(f"{name:<8}{medians['import']:>10.1f}{medians['create_app']:>12.1f}"
+                  f"{medians['first_response']:>12.1f}{medians['total']:>10.1f}")
+
+if __name__ == '__main__':
+    main()
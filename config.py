@@ -12,15 +12,136 @@ class Config:
     
     # Allowed file extensions
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'tiff', 'webp'}
+    
+    # Per-request timing and SQL query instrumentation
+    REQUEST_METRICS_ENABLED = True
+    REQUEST_METRICS_SAMPLE_SIZE = 500  # Recent samples kept per endpoint for percentiles
+    
+    # N+1 query detection (logs repeated query shapes within one request)
+    N_PLUS_ONE_DETECTION = False
+    N_PLUS_ONE_THRESHOLD = 5  # Repeats of one query shape allowed per request
+    N_PLUS_ONE_RAISE = False  # Fail the request with NPlusOneError instead of logging
+    
+    # Rendered fragment cache for the dashboard and discover pages
+    FRAGMENT_CACHE_ENABLED = True
+    FRAGMENT_CACHE_MAX_ENTRIES = 256
+    FRAGMENT_CACHE_TTL = 60  # Seconds; bounds staleness of time-based stats
+    
+    # Process-local cache of logged-in users (skips the users query per request)
+    USER_CACHE_ENABLED = True
+    USER_CACHE_MAX_ENTRIES = 1024
+    USER_CACHE_TTL = 300  # Seconds; edits through the app invalidate this process immediately
+    USER_CACHE_ADMIN_TTL = 30  # Seconds before an admin's auth_generation is re-checked (other processes)
+    
+    # Startup: route modules import on first request, templates compile once
+    LAZY_ROUTES = True
+    AUTO_CREATE_TABLES = True  # Run db.create_all() at startup; otherwise use init_database.py
+    JINJA_BYTECODE_CACHE = True  # Compiled templates kept under instance/jinja_cache
+    
+    # Orphaned upload cleanup (see gc_uploads.py); 0 disables the background job.
+    # Like the deletion worker it runs in one process only: purge_deletions.py, or run.py / the desktop app.
+    UPLOAD_GC_INTERVAL_HOURS = 0
+    UPLOAD_GC_GRACE_HOURS = 24  # Files younger than this are never removed
+    UPLOAD_GC_WORKERS = 8
+    
+    # Default upload quotas on deduplicated bytes; None means unlimited.
+    # Collections and users can override these from the admin storage page.
+    STORAGE_QUOTA_COLLECTION_MB = None
+    STORAGE_QUOTA_USER_MB = None
+    
+    # Background version compaction for collections with a retention policy; 0 disables.
+    # Runs in the deletion worker's process only.
+    RETENTION_COMPACT_INTERVAL_MINUTES = 0
+    RETENTION_BATCH_SIZE = 100  # Versions deleted per transaction
+    RETENTION_BATCH_PAUSE = 0.25  # Seconds between batches so other writers get the lock
+    
+    # Collections are hidden at once on delete and purged by a background worker in chunks.
+    # The worker runs in one process only: purge_deletions.py, or run.py / the desktop app.
+    DELETION_WORKER_ENABLED = True  # Off purges inline in the request
+    DELETION_CHUNK_SIZE = 200  # Rows deleted per transaction
+    DELETION_CHUNK_PAUSE = 0.05  # Seconds between chunks so other writers get the lock
+    DELETION_POLL_SECONDS = 15  # Rescan for tombstones left by other processes
+    
+    # Payload storage for multi-node deployments. 'database' reads image_version.data;
+    # 'directory' reads content-addressed files from BLOB_ORIGIN_DIR (a shared mount)
+    BLOB_ORIGIN = 'database'
+    BLOB_ORIGIN_DIR = None
+    BLOB_CACHE_ENABLED = False  # Per-node disk cache of payloads in front of the origin
+    BLOB_CACHE_DIR = None  # Defaults to instance/blob_cache
+    BLOB_CACHE_MAX_MB = 4096
+    BLOB_CACHE_VERIFY_READS = True  # Check cached bytes against their sha256 on every read
+    
+    # In-memory LRU of recently served payloads, shared by all request threads. Off by
+    # default (the desktop build runs the development config); production enables it.
+    PAYLOAD_CACHE_MB = 0
+    PAYLOAD_CACHE_MAX_ITEM_MB = 16  # Larger payloads are never kept, so one cannot flush the rest
+    
+    # Let the front web server send original payloads from BLOB_ORIGIN_DIR: 'x-accel-redirect'
+    # (nginx, internal location SENDFILE_ACCEL_PREFIX aliased to BLOB_ORIGIN_DIR) or 'x-sendfile'
+    SENDFILE_MODE = None
+    SENDFILE_ACCEL_PREFIX = '/_blobs/'
+    
+    # Publishing copies origin files with reflink/copy_file_range/sendfile where available.
+    # Hardlinking is cheaper still but the published file then shares the origin's inode.
+    PUBLISH_HARDLINK = False
+    
+    # Formats browsers cannot display (BMP, TIFF) are served as AVIF/WebP/PNG per Accept
+    TRANSCODE_ENABLED = True
+    TRANSCODE_CACHE_DIR = None  # Defaults to instance/transcode_cache
+    TRANSCODE_CACHE_MAX_MB = 1024
+    TRANSCODE_QUALITY = 90  # AVIF/WebP quality; PNG output is lossless
+    
+    # Deep-zoom tiles for large images
+    TILES_ENABLED = True
+    TILE_CACHE_DIR = None  # Defaults to instance/tile_cache
+    TILE_CACHE_MAX_MB = 2048
+    TILE_QUALITY = 85  # JPEG quality for opaque images; images with alpha use PNG tiles
+    TILE_VIEWER_MIN_SIZE = 2048  # Longest edge above which view_image uses the tiled viewer
+    
+    # Version comparison
+    DIFF_THRESHOLD = 8  # Channel delta above which a pixel counts as changed
+    DIFF_HEATMAP_MAX_SIZE = 1024  # Longest edge of the rendered heatmap
+    DIFF_CACHE_DIR = None  # Defaults to instance/diff_cache
+    DIFF_CACHE_MAX_MB = 256
+    
+    # Thumbnail sprite sheets for collection pages
+    SPRITE_CELL_SIZE = 120  # Square cell per image; shown at 60px, so sharp on 2x displays
+    SPRITE_PAGE_SIZE = 200  # Images per sheet
+    SPRITE_QUALITY = 80
+    SPRITE_CACHE_DIR = None  # Defaults to instance/sprite_cache
+    SPRITE_CACHE_MAX_MB = 256
+    
+    # JSON API
+    API_PAGE_LIMIT = 500  # Largest ?limit= for image listings
+    API_BATCH_LIMIT = 500  # Most ids, updates or grants in one batch request
+    
+    # Page sizes and thumbnails
+    DISCOVER_PAGE_SIZE = 24
+    ADMIN_PAGE_SIZE = 50
+    TRANSFER_TARGET_PAGE_SIZE = 50  # Move/copy targets listed at once; more are found by searching
+    THUMBNAIL_SIZE = 256  # Longest edge in pixels
 
 class DevelopmentConfig(Config):
     DEBUG = True
+    N_PLUS_ONE_DETECTION = True
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    N_PLUS_ONE_DETECTION = True
+    N_PLUS_ONE_RAISE = True
+    LAZY_ROUTES = False  # Import every view so broken modules fail the suite
+    JINJA_BYTECODE_CACHE = False
+    DELETION_WORKER_ENABLED = False  # Purge inline so tests see the result
 
 class ProductionConfig(Config):
     DEBUG = False
+    PAYLOAD_CACHE_MB = 256
+    AUTO_CREATE_TABLES = False  # Schema changes are an explicit deployment step
 
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Texture Vault Payload Deduplicator
+
+This command-line tool finds version payloads stored more than once (by
+sha256) in a database created before deduplication, keeps one stored copy of
+each and turns the rest into shared references. New uploads and imports are
+deduplicated as they arrive, so this only needs to run once.
+
+The tool prints a dry-run report first and only rewrites rows after
+confirmation. SQLite keeps the freed pages until the file is vacuumed; pass
+--vacuum to shrink it afterwards.
+
+Usage: python dedupe_payloads.py [options]
+"""
+
+import os
+import sys
+import argparse
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+
+from app import create_app, db
+from app.utils.dedup import dedupe_existing, BATCH_SIZE
+
+def main():
+    """Main function - parse arguments and run the deduplication"""
+    parser = argparse.ArgumentParser(
+        description="Store each distinct version payload once",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Report how much would be reclaimed
+  python dedupe_payloads.py --dry-run
+
+  # Deduplicate without prompting, then shrink the SQLite file
+  python dedupe_payloads.py --yes --vacuum
+        """
+    )
+
+    parser.add_argument('--config', default=os.environ.get('FLASK_CONFIG', 'development'),
+                       help='Configuration name (default: FLASK_CONFIG or development)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                       help=f'Distinct payloads rewritten per transaction (default: {BATCH_SIZE})')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='Only report duplicate payloads')
+    parser.add_argument('--vacuum', action='store_true',
+                       help='Run VACUUM afterwards so SQLite returns the space to the filesystem')
+    parser.add_argument('--yes', '-y', action='store_true',
+                       help='Skip confirmation prompt and deduplicate')
+
+    args = parser.parse_args()
+
+    app = create_app(args.config)
+
+    with app.app_context():
+        report = dedupe_existing(dry_run=True)
+        print(f"🔍 {report.summary()}")
+
+        if args.dry_run or not report.versions:
+            return
+
+        if not args.yes:
+            try:
+                response = input(f"\nDeduplicate {report.versions} payloads? (y/N): ").strip().lower()
+            except KeyboardInterrupt:
+                response = ''
+            if response not in ['y', 'yes']:
+                print("❌ Cancelled")
+                return
+
+        # Re-scan so versions added since the report are included
+        report = dedupe_existing(batch_size=args.batch_size)
+        print(f"♻️  {report.summary().replace('reclaimable', 'reclaimed')}")
+
+        if args.vacuum and db.engine.dialect.name == 'sqlite':
+            print("🧹 Vacuuming the database...")
+            with db.engine.connect() as connection:
+                connection.execution_options(isolation_level='AUTOCOMMIT').execute(text('VACUUM'))
+            print("✅ Done")
+
+if __name__ == '__main__':
+    main()
@@ -16,6 +16,9 @@ from urllib.parse import urlparse
 
 # Import your Flask app
 from app import create_app
+from app.utils.deletion import init_deletion_worker
+from app.utils.upload_gc import init_upload_gc
+from app.utils.retention import init_retention_compactor
 
 class TextureVaultDesktop:
     def __init__(self):
@@ -81,6 +84,10 @@ class TextureVaultDesktop:
         def run_flask():
             try:
                 self.flask_app = create_app('development')
+                # The only process of the desktop build runs the background jobs
+                init_deletion_worker(self.flask_app)
+                init_upload_gc(self.flask_app)
+                init_retention_compactor(self.flask_app)
                 self.flask_app.run(host='127.0.0.1', port=self.port, debug=False, use_reloader=False)
             except Exception as e:
                 self.root.after(0, lambda: self.status_label.config(text=f"Flask server error: {str(e)}"))
@@ -0,0 +1,53 @@
+"""
+Shared fixtures for the test_*.py scripts: encoded image payloads and
+factories for the users, collections and images most tests start from.
+
+The factories add and flush inside the caller's app context; the caller commits.
+"""
+
+import io
+
+from PIL import Image
+
+from app import db
+from app.models import User, Collection, TextureImage, ImageVersion
+from app.utils.versions import set_current_version
+
+def image_bytes(color='orange', size=(16, 16), format='PNG'):
+    """Encoded bytes of a solid-colour RGB image"""
+    output = io.BytesIO()
+    Image.new('RGB', size, color).save(output, format=format)
+    return output.getvalue()
+
+def add_user(username, is_admin=False, **fields):
+    """A user with an unusable password and an email derived from the username"""
+    user = User(username=username, email=f'{username}@example.com', is_admin=is_admin, password_hash='x',
+                **fields)
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+def add_collection(owner, name, **fields):
+    collection = Collection(name=name, description='', created_by=owner.id, **fields)
+    db.session.add(collection)
+    db.session.flush()
+    return collection
+
+def add_image(collection, payloads, filename='tex.png', **fields):
+    """An image uploaded by the collection's owner with one version per payload, the last one current.
+
+    Returns (image, versions).
+    """
+    fields.setdefault('original_filepath', filename)
+    image = TextureImage(filename=filename, collection_id=collection.id, uploaded_by=collection.created_by,
+                         **fields)
+    db.session.add(image)
+    db.session.flush()
+    versions = [ImageVersion(image_id=image.id, version_number=number, filepath=filename,
+                             uploaded_by=collection.created_by, data=data)
+                for number, data in enumerate(payloads, start=1)]
+    db.session.add_all(versions)
+    if versions:
+        set_current_version(image, versions[-1])
+    db.session.flush()
+    return image, versions
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Texture Vault Upload Garbage Collector
+
+This command-line tool removes files from the upload folder that are no longer
+referenced by any image or image version (left behind by deleted collections,
+images and versions, or by uploads that failed before their rows were saved).
+With BLOB_ORIGIN = 'directory' it also removes payload files from
+BLOB_ORIGIN_DIR whose hash no version references any more.
+
+Files modified within the grace period are always kept so uploads in flight
+are never touched. The tool prints a dry-run report first and only deletes
+after confirmation.
+
+Usage: python gc_uploads.py [options]
+"""
+
+import os
+import sys
+import argparse
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.utils.upload_gc import collect_orphaned_uploads, collect_orphaned_blobs
+
+def main():
+    """Main function - parse arguments and run the collector"""
+    parser = argparse.ArgumentParser(
+        description="Delete unreferenced files from the upload folder",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Report what would be deleted
+  python gc_uploads.py --dry-run
+
+  # Delete orphans older than 48 hours without prompting
+  python gc_uploads.py --grace-hours 48 --yes
+        """
+    )
+
+    parser.add_argument('--config', default=os.environ.get('FLASK_CONFIG', 'development'),
+                       help='Configuration name (default: FLASK_CONFIG or development)')
+    parser.add_argument('--grace-hours', type=float, default=None,
+                       help='Keep files modified within this many hours (default: UPLOAD_GC_GRACE_HOURS)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Parallel unlink workers (default: UPLOAD_GC_WORKERS)')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='Only report orphaned files')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                       help='List every orphaned file')
+    parser.add_argument('--yes', '-y', action='store_true',
+                       help='Skip confirmation prompt and delete')
+
+    args = parser.parse_args()
+
+    app = create_app(args.config)
+    upload_folder = app.config['UPLOAD_FOLDER']
+    grace_hours = args.grace_hours if args.grace_hours is not None else app.config.get('UPLOAD_GC_GRACE_HOURS', 24)
+    workers = args.workers or app.config.get('UPLOAD_GC_WORKERS', 8)
+
+    sweeps = [('Uploads', collect_orphaned_uploads, upload_folder)]
+    if app.config.get('BLOB_ORIGIN') == 'directory':
+        sweeps.append(('Blob origin', collect_orphaned_blobs, app.config['BLOB_ORIGIN_DIR']))
+
+    with app.app_context():
+        reports = []
+        for label, collect, root in sweeps:
+            report = collect(root, grace_seconds=grace_hours * 3600, dry_run=True)
+            print(f"🔍 {label}: {report.summary()}")
+            if args.verbose:
+                for path in report.orphaned:
+                    print(f"   {path}")
+            reports.append(report)
+
+        total = sum(len(report.orphaned) for report in reports)
+        if args.dry_run or not total:
+            return
+
+        if not args.yes:
+            try:
+                response = input(f"\nDelete {total} orphaned files? (y/N): ").strip().lower()
+            except KeyboardInterrupt:
+                response = ''
+            if response not in ['y', 'yes']:
+                print("❌ Cancelled")
+                return
+
+        # Re-scan so files referenced since the report are kept
+        for label, collect, root in sweeps:
+            report = collect(root, grace_seconds=grace_hours * 3600, dry_run=False, workers=workers)
+            print(f"🗑️  {label}: {report.summary()}")
+            for error in report.errors:
+                print(f"   ❌ {error}")
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,13 @@ The specified user becomes the owner of the collection.
 Only processes image files with supported formats (PNG, JPEG, GIF, BMP, TIFF, WEBP).
 Automatically skips folders: .git, node_modules, Game Source, Game XML
 
+With --link, files are not copied into the database: each version records the
+source path, size, mtime and hash, and is served from the source file. A file
+that later changes or disappears is snapshotted into the vault when next read.
+
+Files whose content is already in the vault (by sha256) are stored once and
+referenced, in either mode; the summary reports how much was deduplicated.
+
 Usage: python import_collection.py [options]
 """
 import os
@@ -24,6 +31,10 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app, db
 from app.models import User, Collection, CollectionPermission, TextureImage, ImageVersion
+from app.models.storage import content_hash
+from app.utils.versions import set_current_version
+from app.utils.links import file_fingerprint
+from app.utils.blob_store import payload_location
 
 class CollectionImporter:
     """Main class for importing collections from folders
@@ -32,8 +43,9 @@ class CollectionImporter:
     Automatically skips: .git, node_modules, Game Source, Game XML folders
     """
     
-    def __init__(self, app):
+    def __init__(self, app, link=False):
         self.app = app
+        self.link = link  # Reference source files in place instead of copying them
         self.supported_formats = {
             '.png': 'PNG',
             '.jpg': 'JPEG',
@@ -49,6 +61,9 @@ class CollectionImporter:
             'files_imported': 0,
             'files_skipped': 0,
             'total_size': 0,
+            'files_linked': 0,
+            'files_deduplicated': 0,
+            'deduplicated_size': 0,
             'errors': []
         }
     
@@ -139,9 +154,19 @@ class CollectionImporter:
                 self.stats['errors'].append(f"Cannot read image info: {filepath}")
                 return False
             
-            # Read binary data
-            binary_data = self.read_image_as_binary(filepath)
-            if not binary_data:
+            # Read binary data, or just fingerprint the file when linking
+            if self.link:
+                try:
+                    size, mtime_ns, digest = file_fingerprint(filepath)
+                except OSError as e:
+                    size = 0
+                    print(f"⚠️  Error reading file {filepath}: {e}")
+                binary_data = b''
+            else:
+                binary_data = self.read_image_as_binary(filepath)
+                size = len(binary_data or b'')
+                digest = content_hash(binary_data) if size else None
+            if not size:
                 print(f"⚠️  Cannot read binary data for: {filepath}")
                 self.stats['files_skipped'] += 1
                 self.stats['errors'].append(f"Cannot read binary data: {filepath}")
@@ -169,6 +194,9 @@ class CollectionImporter:
             db.session.add(texture_image)
             db.session.flush()  # Get the image ID
             
+            # Checked before the insert, which stores new payloads in the origin itself
+            location = payload_location(digest)
+
             # Create version with binary data
             uuid_prefix = str(uuid.uuid4())[:8]
             version_filename = f"{uuid_prefix}_{filename}"
@@ -180,20 +208,37 @@ class CollectionImporter:
                 filepath=version_filepath,
                 uploaded_by=owner_user.id,
                 uploaded_at=datetime.utcnow(),
-                is_current=True,
                 data=binary_data
             )
+            if self.link:
+                image_version.size = size
+                image_version.content_hash = digest
+                if location == 'origin':
+                    image_version.payload_in_origin = True  # Already in the vault; no need to depend on the file
+                elif location == 'database':
+                    image_version.payload_shared = True
+                else:
+                    image_version.link_path = os.path.abspath(filepath)
+                    image_version.link_mtime_ns = mtime_ns
             
             # Update the current filepath in the image
             texture_image.current_filepath = version_filepath
             
             db.session.add(image_version)
+            set_current_version(texture_image, image_version)
             db.session.commit()
             
             self.stats['files_imported'] += 1
-            self.stats['total_size'] += len(binary_data)
+            self.stats['total_size'] += size
+            if image_version.link_path:
+                self.stats['files_linked'] += 1
+            if location:
+                # Same bytes as a version already in the vault; stored once, referenced here
+                self.stats['files_deduplicated'] += 1
+                self.stats['deduplicated_size'] += size
             
-            print(f"✅ Imported: {filename} ({image_info['width']}x{image_info['height']}, {len(binary_data)/1024:.1f}KB)")
+            action = 'Deduplicated' if location else 'Linked' if self.link else 'Imported'
+            print(f"✅ {action}: {filename} ({image_info['width']}x{image_info['height']}, {size/1024:.1f}KB)")
             return True
             
         except Exception as e:
@@ -266,6 +311,7 @@ class CollectionImporter:
         print(f"📋 Collection name: {collection_name}")
         print(f"👤 Owner: {owner_username}")
         print(f"🔄 Recursive: {recursive}")
+        print(f"🔗 Mode: {'link (files stay in place)' if self.link else 'copy into the vault'}")
         print("=" * 60)
         
         start_time = datetime.now()
@@ -326,6 +372,11 @@ class CollectionImporter:
             print(f"   ✅ Files imported: {self.stats['files_imported']}")
             print(f"   ⏭️  Files skipped: {self.stats['files_skipped']}")
             print(f"   💾 Total data size: {self.stats['total_size'] / (1024*1024):.1f}MB")
+            if self.link:
+                print(f"   🔗 Files linked in place (not copied): {self.stats['files_linked']}")
+            if self.stats['files_deduplicated']:
+                print(f"   ♻️  Duplicates stored once: {self.stats['files_deduplicated']} files, "
+                      f"{self.stats['deduplicated_size'] / (1024*1024):.1f}MB saved")
             
             if self.stats['errors']:
                 print(f"   ⚠️  Errors: {len(self.stats['errors'])}")
@@ -368,6 +419,9 @@ Examples:
   # Import with custom description and non-recursive scan
   python import_collection.py --folder "./images" --name "My Collection" --owner john_doe --description "Custom texture pack" --no-recursive
 
+  # Reference a read-only mods folder in place instead of copying it
+  python import_collection.py --folder "C:/Steam/steamapps/common/RimWorld/Mods/MyMod" --name "MyMod" --owner admin_1 --link
+
   # List available users
   python import_collection.py --list-users
         """
@@ -388,6 +442,9 @@ Examples:
     parser.add_argument('--list-users', 
                        action='store_true',
                        help='List available users and exit')
+    parser.add_argument('--link',
+                       action='store_true',
+                       help='Reference files in place instead of copying them into the database')
     parser.add_argument('--yes', '-y',
                        action='store_true',
                        help='Skip confirmation prompt and proceed automatically')
@@ -421,7 +478,7 @@ Examples:
             return
         
         # Create importer and run
-        importer = CollectionImporter(app)
+        importer = CollectionImporter(app, link=args.link)
         success = importer.import_folder(
             folder_path=folder_path,
             collection_name=args.name,
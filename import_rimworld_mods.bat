@@ -37,6 +37,7 @@ for %%m in (%MODS%) do echo   - %%m
 echo.
 echo This will create %MOD_COUNT% new collections in the Texture Reference Vault.
 echo Each collection will be owned by: %OWNER%
+echo Files are linked in place (--link), so the mods are not copied into the vault.
 echo.
 
 REM Ask for confirmation
@@ -63,7 +64,7 @@ for %%m in (%MODS%) do (
     
     REM Check if folder exists
     if exist "%BASE_PATH%\%%m" (
-        python import_collection.py --folder "%BASE_PATH%\%%m" --name "RimWorld - %%m Mod" --owner "%OWNER%" --description "Textures and images from the %%m RimWorld mod" --yes
+        python import_collection.py --folder "%BASE_PATH%\%%m" --name "RimWorld - %%m Mod" --owner "%OWNER%" --description "Textures and images from the %%m RimWorld mod" --link --yes
         
         if errorlevel 1 (
             echo WARNING: Import failed for %%m
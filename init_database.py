@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Create any missing database tables and indexes.
+
+Production configs do not run db.create_all() on startup (AUTO_CREATE_TABLES
+is off), so run this once per deployment before starting the workers, then
+apply any migrate_*.py scripts an existing database still needs.
+
+Usage: python init_database.py [--config production]
+"""
+
+import os
+import sys
+import argparse
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+
+def main():
+    parser = argparse.ArgumentParser(description='Create missing Texture Vault database tables')
+    parser.add_argument('--config', default=os.environ.get('FLASK_CONFIG', 'production'),
+                        help='Configuration name (default: FLASK_CONFIG or production)')
+    args = parser.parse_args()
+
+    app = create_app(args.config)
+    with app.app_context():
+        db.create_all()
+        print(f"✓ Database tables created for {app.config['SQLALCHEMY_DATABASE_URI']}")
+
+if __name__ == '__main__':
+    main()
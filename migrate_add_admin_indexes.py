@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the indexes behind the sortable admin tables
+"""
+
+import sqlite3
+import os
+
+# Get the database path
+db_path = os.path.join('instance', 'texture_vault.db')
+
+if not os.path.exists(db_path):
+    print(f"Database file not found at {db_path}")
+    exit(1)
+
+INDEXES = [
+    ("ix_user_created", "user", "created_at, id"),
+    ("ix_collection_created", "collection", "created_at, id"),
+    ("ix_collection_name", "collection", "name, id"),
+    ("ix_collection_members", "collection", "member_count, id"),
+]
+
+try:
+    # Connect to the database
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    # member_count is added by migrate_add_discovery_indexes.py
+    cursor.execute("PRAGMA table_info(collection)")
+    columns = [column[1] for column in cursor.fetchall()]
+    if 'member_count' not in columns:
+        print("Run migrate_add_discovery_indexes.py first (collection.member_count is missing)")
+        conn.close()
+        exit(1)
+    
+    for name, table, columns in INDEXES:
+        print(f"Creating index {name} on {table}({columns})...")
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({columns})')
+    
+    cursor.execute("ANALYZE")
+    
+    # Commit the changes
+    conn.commit()
+    print("Successfully added admin indexes")
+    
+    # Close the connection
+    conn.close()
+    
+except sqlite3.Error as e:
+    print(f"Error: {e}")
+    if 'conn' in locals():
+        conn.rollback()
+        conn.close()
+    exit(1)
+
+print("Migration completed successfully!")
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Migration script to add API tokens for the JSON API
+"""
+
+import sqlite3
+import os
+
+# Get the database path
+db_path = os.path.join('instance', 'texture_vault.db')
+
+if not os.path.exists(db_path):
+    print(f"Database file not found at {db_path}")
+    exit(1)
+
+try:
+    # Connect to the database
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    print("Creating api_token table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS api_token (
+            id INTEGER NOT NULL PRIMARY KEY,
+            user_id INTEGER NOT NULL REFERENCES user (id),
+            name VARCHAR(80) NOT NULL,
+            token_hash VARCHAR(64) NOT NULL UNIQUE,
+            hint VARCHAR(12) NOT NULL,
+            created_at DATETIME,
+            last_used_at DATETIME
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_api_token_user_id ON api_token (user_id)")
+    
+    conn.commit()
+    conn.close()
+    
+except sqlite3.Error as e:
+    print(f"Error: {e}")
+    if 'conn' in locals():
+        conn.close()
+    exit(1)
+
+print("Migration completed successfully!")
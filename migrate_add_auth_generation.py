@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Migration script to add user.auth_generation, which tells other processes to reload cached logins
+"""
+
+import sqlite3
+import os
+
+# Get the database path
+db_path = os.path.join('instance', 'texture_vault.db')
+
+if not os.path.exists(db_path):
+    print(f"Database file not found at {db_path}")
+    exit(1)
+
+try:
+    # Connect to the database
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    cursor.execute('PRAGMA table_info("user")')
+    if 'auth_generation' in [row[1] for row in cursor.fetchall()]:
+        print("user.auth_generation already exists")
+    else:
+        print("Adding user.auth_generation...")
+        cursor.execute('ALTER TABLE "user" ADD COLUMN auth_generation INTEGER NOT NULL DEFAULT 0')
+    
+    conn.commit()
+    conn.close()
+    
+except sqlite3.Error as e:
+    print(f"Error: {e}")
+    if 'conn' in locals():
+        conn.close()
+    exit(1)
+
+print("Migration completed successfully!")
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the cache_generation table that keeps fragment cache counters shared between processes
+"""
+
+import sqlite3
+import os
+
+# Get the database path
+db_path = os.path.join('instance', 'texture_vault.db')
+
+if not os.path.exists(db_path):
+    print(f"Database file not found at {db_path}")
+    exit(1)
+
+try:
+    # Connect to the database
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    print("Creating cache_generation table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cache_generation (
+            scope VARCHAR(16) NOT NULL,
+            scope_id INTEGER NOT NULL,
+            generation INTEGER NOT NULL,
+            PRIMARY KEY (scope, scope_id)
+        )
+    """)
+    
+    conn.commit()
+    conn.close()
+    
+except sqlite3.Error as e:
+    print(f"Error: {e}")
+    if 'conn' in locals():
+        conn.close()
+    exit(1)
+
+print("Migration completed successfully!")
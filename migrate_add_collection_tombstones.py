@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the deleted_at tombstone used by background collection deletion
+"""
+
+import sqlite3
+import os
+
+# Get the database path
+db_path = os.path.join('instance', 'texture_vault.db')
+
+if not os.path.exists(db_path):
+    print(f"Database file not found at {db_path}")
+    exit(1)
+
+try:
+    # Connect to the database
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    cursor.execute('PRAGMA table_info("collection")')
+    if 'deleted_at' in [row[1] for row in cursor.fetchall()]:
+        print("collection.deleted_at already exists")
+    else:
+        print("Adding collection.deleted_at...")
+        cursor.execute('ALTER TABLE collection ADD COLUMN deleted_at DATETIME')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_collection_deleted_at ON collection (deleted_at)')
+    
+    conn.commit()
+    conn.close()
+    
+except sqlite3.Error as e:
+    print(f"Error: {e}")
+    if 'conn' in locals():
+        conn.close()
+    exit(1)
+
+print("Migration completed successfully!")
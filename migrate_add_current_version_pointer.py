@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Migration script to add texture_image.current_version_id and backfill it from
+image_version.is_current (or the highest version number where no version is flagged)
+"""
+
+import sqlite3
+import os
+
+# Get the database path
+db_path = os.path.join('instance', 'texture_vault.db')
+
+if not os.path.exists(db_path):
+    print(f"Database file not found at {db_path}")
+    exit(1)
+
+try:
+    # Connect to the database
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    cursor.execute('PRAGMA table_info("texture_image")')
+    if 'current_version_id' in [row[1] for row in cursor.fetchall()]:
+        print("texture_image.current_version_id already exists")
+    else:
+        print("Adding texture_image.current_version_id...")
+        cursor.execute('ALTER TABLE texture_image ADD COLUMN current_version_id INTEGER '
+                       'REFERENCES image_version (id) ON DELETE SET NULL')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_texture_image_current_version_id '
+                   'ON texture_image (current_version_id)')
+    
+    print("Backfilling current versions...")
+    cursor.execute('''
+        UPDATE texture_image SET current_version_id = COALESCE(
+            (SELECT MAX(v.id) FROM image_version v WHERE v.image_id = texture_image.id AND v.is_current = 1),
+            (SELECT v.id FROM image_version v WHERE v.image_id = texture_image.id
+             ORDER BY v.version_number DESC, v.id DESC LIMIT 1)
+        )
+        WHERE current_version_id IS NULL
+    ''')
+    print(f"  {cursor.rowcount} images updated")
+    
+    # Leave exactly the pointed-at version flagged; only rows that disagree are rewritten
+    cursor.execute('''
+        UPDATE image_version
+        SET is_current = (id IN (SELECT current_version_id FROM texture_image WHERE current_version_id IS NOT NULL))
+        WHERE COALESCE(is_current, 0) != (id IN (SELECT current_version_id FROM texture_image
+                                                 WHERE current_version_id IS NOT NULL))
+    ''')
+    print(f"  {cursor.rowcount} version flags corrected")
+    
+    conn.commit()
+    conn.close()
+    
+except sqlite3.Error as e:
+    print(f"Error: {e}")
+    if 'conn' in locals():
+        conn.close()
+    exit(1)
+
+print("Migration completed successfully!")
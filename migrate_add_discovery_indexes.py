@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Migration script to add Collection.member_count and the indexes used by the
+paginated discover page
+"""
+
+import sqlite3
+import os
+
+# Get the database path
+db_path = os.path.join('instance', 'texture_vault.db')
+
+if not os.path.exists(db_path):
+    print(f"Database file not found at {db_path}")
+    exit(1)
+
+INDEXES = [
+    ("ix_collection_created_by", "collection", "created_by"),
+    ("ix_collection_public_created", "collection", "is_public, created_at, id"),
+    ("ix_collection_public_members", "collection", "is_public, member_count, id"),
+    ("ix_collection_public_owner", "collection", "is_public, created_by"),
+    ("ix_collection_permission_collection_id", "collection_permission", "collection_id"),
+    ("ix_permission_user_collection", "collection_permission", "user_id, collection_id"),
+    ("ix_texture_image_collection_id", "texture_image", "collection_id"),
+]
+
+try:
+    # Connect to the database
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    # Check if the column already exists
+    cursor.execute("PRAGMA table_info(collection)")
+    columns = [column[1] for column in cursor.fetchall()]
+    
+    if 'member_count' in columns:
+        print("member_count column already exists in collection table")
+    else:
+        print("Adding member_count column to collection table...")
+        cursor.execute("ALTER TABLE collection ADD COLUMN member_count INTEGER DEFAULT 0 NOT NULL")
+    
+    # Backfill member counts from existing permissions
+    print("Backfilling member counts...")
+    cursor.execute("""
+        UPDATE collection SET member_count = (
+            SELECT COUNT(*) FROM collection_permission
+            WHERE collection_permission.collection_id = collection.id
+        )
+    """)
+    
+    for name, table, columns in INDEXES:
+        print(f"Creating index {name} on {table}({columns})...")
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+    
+    cursor.execute("ANALYZE")
+    
+    # Commit the changes
+    conn.commit()
+    print("Successfully added discovery indexes")
+    
+    # Close the connection
+    conn.close()
+    
+except sqlite3.Error as e:
+    print(f"Error: {e}")
+    if 'conn' in locals():
+        conn.rollback()
+        conn.close()
+    exit(1)
+
+print("Migration completed successfully!")
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Migration script to record which image a copied image came from
+"""
+
+import sqlite3
+import os
+
+# Get the database path
+db_path = os.path.join('instance', 'texture_vault.db')
+
+if not os.path.exists(db_path):
+    print(f"Database file not found at {db_path}")
+    exit(1)
+
+try:
+    # Connect to the database
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    cursor.execute('PRAGMA table_info("texture_image")')
+    if 'copied_from_id' in [row[1] for row in cursor.fetchall()]:
+        print("texture_image.copied_from_id already exists")
+    else:
+        print("Adding texture_image.copied_from_id...")
+        cursor.execute('ALTER TABLE texture_image ADD COLUMN copied_from_id INTEGER '
+                       'REFERENCES texture_image (id) ON DELETE SET NULL')
+    
+    conn.commit()
+    conn.close()
+    
+except sqlite3.Error as e:
+    print(f"Error: {e}")
+    if 'conn' in locals():
+        conn.close()
+    exit(1)
+
+print("Migration completed successfully!")
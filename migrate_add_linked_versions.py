@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the source link columns used by import_collection.py --link
+"""
+
+import sqlite3
+import os
+
+# Get the database path
+db_path = os.path.join('instance', 'texture_vault.db')
+
+if not os.path.exists(db_path):
+    print(f"Database file not found at {db_path}")
+    exit(1)
+
+try:
+    # Connect to the database
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    cursor.execute('PRAGMA table_info("image_version")')
+    columns = [row[1] for row in cursor.fetchall()]
+    for name, column_type in (('link_path', 'VARCHAR(1000)'), ('link_mtime_ns', 'BIGINT')):
+        if name in columns:
+            print(f"image_version.{name} already exists")
+        else:
+            print(f"Adding image_version.{name}...")
+            cursor.execute(f'ALTER TABLE image_version ADD COLUMN {name} {column_type}')
+    
+    conn.commit()
+    conn.close()
+    
+except sqlite3.Error as e:
+    print(f"Error: {e}")
+    if 'conn' in locals():
+        conn.close()
+    exit(1)
+
+print("Migration completed successfully!")
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the payload_in_origin flag used by the directory blob origin
+"""
+
+import sqlite3
+import os
+
+# Get the database path
+db_path = os.path.join('instance', 'texture_vault.db')
+
+if not os.path.exists(db_path):
+    print(f"Database file not found at {db_path}")
+    exit(1)
+
+try:
+    # Connect to the database
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    cursor.execute('PRAGMA table_info("image_version")')
+    if 'payload_in_origin' in [row[1] for row in cursor.fetchall()]:
+        print("image_version.payload_in_origin already exists")
+    else:
+        print("Adding image_version.payload_in_origin...")
+        cursor.execute('ALTER TABLE image_version ADD COLUMN payload_in_origin BOOLEAN NOT NULL DEFAULT 0')
+    
+    conn.commit()
+    conn.close()
+    
+except sqlite3.Error as e:
+    print(f"Error: {e}")
+    if 'conn' in locals():
+        conn.close()
+    exit(1)
+
+print("Migration completed successfully!")
+print("With BLOB_ORIGIN = 'directory', run 'python move_payloads_to_origin.py' to move stored payloads there.")
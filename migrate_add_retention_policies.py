@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Migration script to add per-collection version retention policies
+"""
+
+import sqlite3
+import os
+
+# Get the database path
+db_path = os.path.join('instance', 'texture_vault.db')
+
+if not os.path.exists(db_path):
+    print(f"Database file not found at {db_path}")
+    exit(1)
+
+NEW_COLUMNS = [
+    ("collection", "retention_keep_last", "INTEGER"),
+    ("collection", "retention_keep_days", "INTEGER"),
+    ("collection", "retention_keep_published", "BOOLEAN DEFAULT 1 NOT NULL"),
+    ("image_version", "published_at", "DATETIME"),
+]
+
+try:
+    # Connect to the database
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    for table, column, column_type in NEW_COLUMNS:
+        cursor.execute(f'PRAGMA table_info("{table}")')
+        if column in [row[1] for row in cursor.fetchall()]:
+            print(f"{table}.{column} already exists")
+        else:
+            print(f"Adding {table}.{column}...")
+            cursor.execute(f'ALTER TABLE "{table}" ADD COLUMN {column} {column_type}')
+    
+    # Retention ranks versions per image
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_image_version_image_id ON image_version (image_id)")
+    
+    # The current version of each published image counts as published
+    cursor.execute("""
+        UPDATE image_version SET published_at = CURRENT_TIMESTAMP
+        WHERE published_at IS NULL AND is_current = 1
+          AND image_id IN (SELECT id FROM texture_image WHERE is_published = 1)
+    """)
+    print(f"Marked {cursor.rowcount} current versions of published images as published")
+    
+    conn.commit()
+    conn.close()
+    
+except sqlite3.Error as e:
+    print(f"Error: {e}")
+    if 'conn' in locals():
+        conn.close()
+    exit(1)
+
+print("Migration completed successfully!")
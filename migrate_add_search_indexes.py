@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the lower() expression indexes behind the admin user and collection searches
+"""
+
+import sqlite3
+import os
+
+# Get the database path
+db_path = os.path.join('instance', 'texture_vault.db')
+
+if not os.path.exists(db_path):
+    print(f"Database file not found at {db_path}")
+    exit(1)
+
+INDEXES = [
+    ("ix_user_username_lower", "user", "lower(username)"),
+    ("ix_user_email_lower", "user", "lower(email)"),
+    ("ix_collection_name_lower", "collection", "lower(name)"),
+]
+
+try:
+    # Connect to the database
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    for name, table, columns in INDEXES:
+        print(f"Creating index {name} on {table}({columns})...")
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" ({columns})')
+    
+    # Statistics let the planner prefer the name index over the tombstone index
+    cursor.execute("ANALYZE")
+    
+    conn.commit()
+    conn.close()
+    
+except sqlite3.Error as e:
+    print(f"Error: {e}")
+    if 'conn' in locals():
+        conn.close()
+    exit(1)
+
+print("Migration completed successfully!")
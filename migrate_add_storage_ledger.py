@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Migration script to add the storage-usage ledger and upload quotas.
+
+Adds size and content_hash to image_version (backfilled by reading each blob
+once), storage_quota to user and collection, creates the storage_usage and
+storage_blob_ref tables and fills them from the existing versions.
+"""
+
+import sqlite3
+import hashlib
+import os
+
+# Get the database path
+db_path = os.path.join('instance', 'texture_vault.db')
+
+if not os.path.exists(db_path):
+    print(f"Database file not found at {db_path}")
+    exit(1)
+
+NEW_COLUMNS = [
+    ("image_version", "size", "INTEGER"),
+    ("image_version", "content_hash", "VARCHAR(64)"),
+    ("user", "storage_quota", "BIGINT"),
+    ("collection", "storage_quota", "BIGINT"),
+]
+
+LEDGER_SCOPES = [
+    ("collection", "ti.collection_id"),
+    ("user", "v.uploaded_by"),
+]
+
+try:
+    # Connect to the database
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    for table, column, column_type in NEW_COLUMNS:
+        cursor.execute(f'PRAGMA table_info("{table}")')
+        if column in [row[1] for row in cursor.fetchall()]:
+            print(f"{table}.{column} already exists")
+        else:
+            print(f"Adding {table}.{column}...")
+            cursor.execute(f'ALTER TABLE "{table}" ADD COLUMN {column} {column_type}')
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_image_version_content_hash ON image_version (content_hash)")
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS storage_usage (
+            scope VARCHAR(16) NOT NULL,
+            scope_id INTEGER NOT NULL,
+            logical_bytes BIGINT NOT NULL DEFAULT 0,
+            physical_bytes BIGINT NOT NULL DEFAULT 0,
+            version_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (scope, scope_id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS ix_storage_usage_physical ON storage_usage (scope, physical_bytes)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS storage_blob_ref (
+            scope VARCHAR(16) NOT NULL,
+            scope_id INTEGER NOT NULL,
+            content_hash VARCHAR(64) NOT NULL,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            size BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (scope, scope_id, content_hash)
+        )
+    """)
+    conn.commit()
+
+    # Hash existing versions in batches so only one batch of blobs is in memory
+    hashed = 0
+    while True:
+        cursor.execute("SELECT id, data FROM image_version WHERE content_hash IS NULL LIMIT 200")
+        rows = cursor.fetchall()
+        if not rows:
+            break
+        cursor.executemany(
+            "UPDATE image_version SET size = ?, content_hash = ? WHERE id = ?",
+            [(len(data or b''), hashlib.sha256(data or b'').hexdigest(), version_id) for version_id, data in rows]
+        )
+        conn.commit()
+        hashed += len(rows)
+    print(f"Hashed {hashed} existing versions")
+
+    # Rebuild the ledger from scratch
+    cursor.execute("DELETE FROM storage_blob_ref")
+    cursor.execute("DELETE FROM storage_usage")
+    for scope, key in LEDGER_SCOPES:
+        cursor.execute(f"""
+            INSERT INTO storage_blob_ref (scope, scope_id, content_hash, ref_count, size)
+            SELECT ?, {key}, v.content_hash, COUNT(*), MAX(v.size)
+            FROM image_version v JOIN texture_image ti ON ti.id = v.image_id
+            WHERE v.content_hash IS NOT NULL
+            GROUP BY {key}, v.content_hash
+        """, (scope,))
+        cursor.execute(f"""
+            INSERT INTO storage_usage (scope, scope_id, logical_bytes, physical_bytes, version_count)
+            SELECT ?, {key}, SUM(v.size),
+                   (SELECT SUM(r.size) FROM storage_blob_ref r WHERE r.scope = ? AND r.scope_id = {key}),
+                   COUNT(*)
+            FROM image_version v JOIN texture_image ti ON ti.id = v.image_id
+            WHERE v.content_hash IS NOT NULL
+            GROUP BY {key}
+        """, (scope, scope))
+    conn.commit()
+
+    cursor.execute("SELECT scope, COUNT(*), SUM(physical_bytes) FROM storage_usage GROUP BY scope")
+    for scope, count, physical in cursor.fetchall():
+        print(f"Ledger: {count} {scope} rows, {(physical or 0) / (1024 * 1024):.1f} MB physical")
+
+    # Close the connection
+    conn.close()
+
+except sqlite3.Error as e:
+    print(f"Error: {e}")
+    if 'conn' in locals():
+        conn.close()
+    exit(1)
+
+print("Migration completed successfully!")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Texture Vault Payload Mover
+
+With BLOB_ORIGIN = 'directory', new payloads are stored only as files in
+BLOB_ORIGIN_DIR. This command-line tool moves the payloads of versions created
+before the switch out of the database: each distinct payload is written to the
+origin (and synced) before the rows storing it are emptied, so no version is
+ever without its bytes. Run it once after switching to the directory origin.
+
+The tool prints a dry-run report first and only rewrites rows after
+confirmation. SQLite keeps the freed pages until the file is vacuumed; pass
+--vacuum to shrink it afterwards.
+
+Usage: python move_payloads_to_origin.py [options]
+"""
+
+import os
+import sys
+import argparse
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+
+from app import create_app, db
+from app.utils.blob_store import move_payloads_to_origin
+from app.utils.dedup import BATCH_SIZE
+
+def main():
+    """Main function - parse arguments and move the payloads"""
+    parser = argparse.ArgumentParser(
+        description="Move version payloads from the database to the directory blob origin",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Report how much is still stored in the database
+  python move_payloads_to_origin.py --config production --dry-run
+
+  # Move without prompting, then shrink the SQLite file
+  python move_payloads_to_origin.py --config production --yes --vacuum
+        """
+    )
+
+    parser.add_argument('--config', default=os.environ.get('FLASK_CONFIG', 'development'),
+                       help='Configuration name (default: FLASK_CONFIG or development)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                       help=f'Distinct payloads moved per transaction (default: {BATCH_SIZE})')
+    parser.add_argument('--dry-run', action='store_true',
+                       help='Only report payloads still stored in the database')
+    parser.add_argument('--vacuum', action='store_true',
+                       help='Run VACUUM afterwards so SQLite returns the space to the filesystem')
+    parser.add_argument('--yes', '-y', action='store_true',
+                       help='Skip confirmation prompt and move')
+
+    args = parser.parse_args()
+
+    app = create_app(args.config)
+    if app.config.get('BLOB_ORIGIN') != 'directory':
+        print("❌ Set BLOB_ORIGIN = 'directory' and BLOB_ORIGIN_DIR first")
+        sys.exit(1)
+
+    with app.app_context():
+        report = move_payloads_to_origin(dry_run=True)
+        print(f"🔍 {report.summary()}")
+
+        if args.dry_run or not report.hashes:
+            return
+
+        if not args.yes:
+            try:
+                response = input(f"\nMove {report.hashes} payloads to {app.config['BLOB_ORIGIN_DIR']}? (y/N): ").strip().lower()
+            except KeyboardInterrupt:
+                response = ''
+            if response not in ['y', 'yes']:
+                print("❌ Cancelled")
+                return
+
+        # Re-scan so versions added since the report are included
+        report = move_payloads_to_origin(batch_size=args.batch_size)
+        print(f"📦 Moved {report.summary()}")
+
+        if args.vacuum and db.engine.dialect.name == 'sqlite':
+            print("🧹 Vacuuming the database...")
+            with db.engine.connect() as connection:
+                connection.execution_options(isolation_level='AUTOCOMMIT').execute(text('VACUUM'))
+            print("✅ Done")
+
+if __name__ == '__main__':
+    main()
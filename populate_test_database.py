@@ -28,6 +28,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app, db
 from app.models import User, Collection, CollectionPermission, TextureImage, ImageVersion, CollectionInvitation
+from app.utils.versions import set_current_version
 
 fake = Faker()
 
@@ -798,6 +799,7 @@ class DatabasePopulator:
                     # Update image's current_filepath if this is the current version
                     if version_num == num_versions:
                         image.current_filepath = f"uploads/{version_filename}"
+                        set_current_version(image, version)
                     
                     current_batch.append(version)
                     total_versions += 1
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Texture Vault Deletion Worker
+
+Purges deleted collections and images in chunks (see app/utils/deletion.py).
+Web workers only mark them as deleted; run exactly one copy of this tool next
+to a multi-process deployment (gunicorn, several nodes) so each purge happens
+once. Unless --once is given it also runs the background upload GC and
+retention compactor when their intervals are configured, which web workers
+never start.
+run.py and the desktop app run these jobs in their own process and do not need it.
+
+Usage: python purge_deletions.py [options]
+"""
+
+import os
+import sys
+import argparse
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.utils.deletion import run_deletion_worker
+from app.utils.upload_gc import init_upload_gc
+from app.utils.retention import init_retention_compactor
+
+def main():
+    """Main function - parse arguments and run the worker"""
+    parser = argparse.ArgumentParser(
+        description="Purge deleted collections and images",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Run as the deployment's deletion worker
+  python purge_deletions.py --config production
+
+  # Purge what is pending now and exit (cron)
+  python purge_deletions.py --once
+        """
+    )
+
+    parser.add_argument('--config', default=os.environ.get('FLASK_CONFIG', 'development'),
+                       help='Configuration name (default: FLASK_CONFIG or development)')
+    parser.add_argument('--once', action='store_true',
+                       help='Purge pending deletions and exit instead of polling')
+
+    args = parser.parse_args()
+
+    app = create_app(args.config)
+    print("🗑️  Purging deleted collections and images" + ("" if args.once else
+          f" every {app.config.get('DELETION_POLL_SECONDS', 60)}s (Ctrl+C to stop)"))
+    if not args.once:
+        init_upload_gc(app)
+        init_retention_compactor(app)
+    try:
+        run_deletion_worker(app, once=args.once)
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopped")
+
+if __name__ == '__main__':
+    main()
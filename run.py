@@ -1,10 +1,18 @@
 #!/usr/bin/env python3
 import os
 from app import create_app
+from app.utils.deletion import init_deletion_worker
+from app.utils.upload_gc import init_upload_gc
+from app.utils.retention import init_retention_compactor
 
 # Get configuration from environment or default to development
 config_name = os.environ.get('FLASK_CONFIG', 'development')
 app = create_app(config_name)
 
 if __name__ == '__main__':
+    # The reloader runs this file in a watcher and a server process; only the server runs background jobs
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        init_deletion_worker(app)
+        init_upload_gc(app)
+        init_retention_compactor(app)
     app.run(debug=True)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the token-authenticated JSON API
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import Collection, CollectionPermission, TextureImage, ApiToken
+from fixtures import add_user, add_collection, add_image
+
+def _setup():
+    app = create_app('testing')
+    with app.app_context():
+        owner, other = add_user('api_owner'), add_user('api_other')
+        mine, theirs = add_collection(owner, 'Mine'), add_collection(other, 'Theirs')
+        for collection in (mine, mine, mine, theirs):
+            add_image(collection, [], original_filepath='Textures/tex.png')
+        token, raw = ApiToken.issue(owner.id, 'pipeline')
+        db.session.add(token)
+        db.session.commit()
+        ids = {
+            'owner': owner.id, 'other': other.id, 'mine': mine.id, 'theirs': theirs.id,
+            'my_images': [image.id for image in mine.images], 'their_image': theirs.images[0].id,
+        }
+    return app, {'Authorization': f'Bearer {raw}'}, ids
+
+def test_token_auth_listing_and_etags():
+    """Listings are token-authenticated, paged by cursor and revalidated by ETag"""
+    app, auth, ids = _setup()
+    client = app.test_client()
+    assert client.get('/api/v1/images').status_code == 401
+    assert client.get('/api/v1/images', headers={'Authorization': 'Bearer nope'}).status_code == 401
+    print("✓ Requests without a valid token are rejected")
+
+    first = client.get('/api/v1/images?limit=2&fields=filename', headers=auth)
+    page = first.get_json()
+    assert [item['id'] for item in page['items']] == ids['my_images'][:2]
+    assert set(page['items'][0]) == {'id', 'filename'}
+    rest = client.get(f"/api/v1/images?limit=2&cursor={page['next_cursor']}", headers=auth).get_json()
+    assert [item['id'] for item in rest['items']] == ids['my_images'][2:] and rest['next_cursor'] is None
+    print("✓ Only readable images listed, with field selection and cursors")
+
+    again = client.get('/api/v1/images?limit=2&fields=filename',
+                       headers=dict(auth, **{'If-None-Match': first.headers['ETag']}))
+    assert again.status_code == 304 and again.data == b''
+    assert client.get('/api/v1/images?fields=secret', headers=auth).status_code == 400
+    assert client.get(f"/api/v1/images?collection_id={ids['theirs']}", headers=auth).status_code == 403
+    print("✓ Unchanged listing answers 304")
+
+    wanted = ids['my_images'][:2] + [ids['their_image'], 999999]
+    batch = client.get(f"/api/v1/images/batch?ids={','.join(map(str, wanted))}", headers=auth).get_json()
+    assert [item['id'] for item in batch['items']] == ids['my_images'][:2]
+    assert batch['not_found'] == [ids['their_image'], 999999]
+    print("✓ Batch fetch hides images the token cannot read")
+
+    writes = []
+    with app.app_context():
+        assert ApiToken.query.one().last_used_at is not None
+        event.listen(db.engine, 'before_cursor_execute',
+                     lambda conn, cursor, statement, *args: writes.append(statement) if 'UPDATE' in statement else None)
+    for _ in range(3):
+        assert client.get('/api/v1/images?limit=1', headers=auth).status_code == 200
+    assert writes == []
+    print("✓ last_used_at is written at most once a minute")
+
+def test_batch_edits_and_grants():
+    """Batch edits and permission grants are all-or-nothing"""
+    app, auth, ids = _setup()
+    client = app.test_client()
+
+    updates = [{'id': image_id, 'filename': f'renamed_{n}.png'} for n, image_id in enumerate(ids['my_images'])]
+    rejected = client.patch('/api/v1/images/batch', headers=auth,
+                            json={'updates': updates + [{'id': ids['their_image'], 'filename': 'x.png'}]})
+    assert rejected.status_code == 400 and str(ids['their_image']) in rejected.get_json()['errors']
+    with app.app_context():
+        assert not TextureImage.query.filter(TextureImage.filename.like('renamed_%')).count()
+    print("✓ Batch edit rejected as a whole when one image is not writable")
+
+    updates[0]['original_filepath'] = 'Textures/new/renamed_0.png'
+    response = client.patch('/api/v1/images/batch', headers=auth, json={'updates': updates})
+    assert response.status_code == 200 and response.get_json()['updated'] == sorted(ids['my_images'])
+    with app.app_context():
+        image = db.session.get(TextureImage, ids['my_images'][0])
+        assert (image.filename, image.original_filepath) == ('renamed_0.png', 'Textures/new/renamed_0.png')
+    print("✓ Filenames and publish paths updated in one batch")
+
+    response = client.patch('/api/v1/images/batch', headers=auth,
+                            json={'updates': [{'id': True, 'filename': 'flag.png'}]})
+    assert response.status_code == 400 and 'error' in response.get_json()
+    print("✓ Boolean image ids rejected with 400")
+
+    response = client.post('/api/v1/permissions/batch', headers=auth,
+                           json={'grants': [{'collection_id': ids['mine'], 'username': 'api_other', 'level': 'read'}]})
+    assert response.get_json() == {'created': 1, 'updated': 0}
+    response = client.post('/api/v1/permissions/batch', headers=auth,
+                           json={'grants': [{'collection_id': ids['mine'], 'user_id': ids['other'], 'level': 'write'}]})
+    assert response.get_json() == {'created': 0, 'updated': 1}
+    denied = client.post('/api/v1/permissions/batch', headers=auth,
+                         json={'grants': [{'collection_id': ids['theirs'], 'user_id': ids['owner'], 'level': 'admin'}]})
+    assert denied.status_code == 400
+    for malformed in ({'collection_id': [ids['mine']], 'user_id': ids['other'], 'level': 'read'},
+                      {'collection_id': ids['mine'], 'user_id': {'id': ids['other']}, 'level': 'read'},
+                      {'collection_id': ids['mine'], 'username': ['api_other'], 'level': 'read'},
+                      {'collection_id': True, 'user_id': ids['other'], 'level': 'read'},
+                      {'collection_id': ids['mine'], 'user_id': True, 'level': 'read'}):
+        response = client.post('/api/v1/permissions/batch', headers=auth, json={'grants': [malformed]})
+        assert response.status_code == 400 and 'error' in response.get_json()
+    with app.app_context():
+        permission = CollectionPermission.query.filter_by(collection_id=ids['mine']).one()
+        assert permission.permission_level == 'write'
+        assert db.session.get(Collection, ids['mine']).member_count == 1
+    print("✓ Permission grants upserted and member counts kept; malformed ids rejected with 400")
+
+def test_token_management_page():
+    """Tokens are created and revoked from the profile page"""
+    app, auth, ids = _setup()
+    client = app.test_client()
+    client.get('/auth/bypass_login0110')
+    response = client.post('/auth/api_tokens', data={'name': 'laptop'})
+    assert b'tv_' in response.data and b'will not be shown again' in response.data
+    with app.app_context():
+        token_id = ApiToken.query.filter_by(name='laptop').one().id
+    client.post(f'/auth/api_tokens/{token_id}/revoke')
+    with app.app_context():
+        assert ApiToken.query.filter_by(name='laptop').count() == 0
+    print("✓ Token shown once and revocable")
+
+if __name__ == '__main__':
+    test_token_auth_listing_and_etags()
+    test_batch_edits_and_grants()
+    test_token_management_page()
+    print("\n🎉 All JSON API tests passed!")
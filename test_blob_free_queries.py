@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Test script to verify metadata pages never read version payloads
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app import create_app, db
+from fixtures import add_user, add_collection, add_image
+
+@contextmanager
+def _payload_reads(app):
+    """Collect every statement that selects image_version.data"""
+    reads = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT') and 'image_version.data' in statement:
+            reads.append(statement)
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield reads
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+def _setup():
+    app = create_app('testing')
+    with app.app_context():
+        collection = add_collection(add_user('blob_user'), 'Blobs')
+        image, _ = add_image(collection, [b'\x89PNG' + bytes([number]) * 64 for number in (1, 2, 3)],
+                             file_size=10)
+        db.session.commit()
+        return app, {'collection': collection.id, 'image': image.id}
+
+def test_metadata_views_skip_payloads():
+    """Listings, history, dashboard and profile read metadata only"""
+    app, ids = _setup()
+    client = app.test_client()
+    client.get('/auth/bypass_login0110')
+
+    with _payload_reads(app) as reads:
+        for url in (f"/image/{ids['image']}", f"/collection/{ids['collection']}", '/dashboard', '/auth/profile'):
+            response = client.get(url)
+            assert response.status_code == 200, url
+        assert b'v3' in client.get(f"/image/{ids['image']}").data
+    assert reads == []
+    print("✓ Image history, collection, dashboard and profile load no payloads")
+
+    with _payload_reads(app) as reads:
+        response = client.get(f"/image/{ids['image']}/serve")
+        assert response.data == b'\x89PNG' + bytes([3]) * 64
+    assert len(reads) == 1
+    print("✓ Serving loads the payload on demand")
+
+if __name__ == '__main__':
+    test_metadata_views_skip_payloads()
+    print("\n🎉 All blob-free query tests passed!")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the shared blob origin and the per-node payload cache
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.models import ImageVersion
+from app.utils.blob_store import BlobStore, DirectoryOrigin, move_payloads_to_origin
+from app.utils.transcode import TranscodeCache
+from fixtures import image_bytes, add_user, add_collection, add_image
+
+class _NoDatabase:
+    def get(self, digest, version_id):
+        raise AssertionError('origin miss fell back to the database')
+
+def test_read_through_cache():
+    """Payloads are stored in the origin only and served from the node's disk cache"""
+    data = image_bytes('green')
+    digest = hashlib.sha256(data).hexdigest()
+    with tempfile.TemporaryDirectory() as root:
+        app = create_app('testing')
+        app.config.update(BLOB_ORIGIN='directory', BLOB_ORIGIN_DIR=os.path.join(root, 'origin'),
+                          BLOB_CACHE_ENABLED=True, BLOB_CACHE_DIR=os.path.join(root, 'node1'))
+        from app.utils.blob_store import init_blob_store
+        store = init_blob_store(app)
+        with app.app_context():
+            collection = add_collection(add_user('blob_node', is_admin=True), 'Nodes')
+            image, _ = add_image(collection, [data], filename='grass.png', file_size=len(data))
+            db.session.commit()
+            image_id = image.id
+        origin_file = os.path.join(root, 'origin', digest[:2], digest)
+        assert os.path.exists(origin_file)
+        with app.app_context():
+            version = db.session.get(ImageVersion, 1)
+            assert version.payload_in_origin and version.data == b'' and version.size == len(data)
+        print("✓ New payloads are written to the shared origin, not the database")
+
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+        for _ in range(3):
+            assert client.get(f'/image/{image_id}/serve').data == data
+        assert store.origin_reads == 1 and store.cache.hits == 2
+        print("✓ Repeat reads come from the local disk cache")
+
+        with open(os.path.join(root, 'node1', digest), 'wb') as f:
+            f.write(b'garbage')
+        assert client.get(f'/image/{image_id}/serve').data == data
+        assert store.corrupt == 1 and store.origin_reads == 2
+        print("✓ Corrupt cached copies are detected and refetched")
+
+        # A version stored before the switch to the directory origin
+        older = image_bytes('red')
+        older_digest = hashlib.sha256(older).hexdigest()
+        with app.app_context():
+            versions = ImageVersion.__table__
+            db.session.execute(versions.insert().values(
+                image_id=image_id, version_number=0, filepath='grass.png', uploaded_by=1, data=older,
+                size=len(older), content_hash=older_digest))
+            db.session.commit()
+            old_version = ImageVersion.query.filter_by(version_number=0).one()
+            assert store.read(old_version) == older
+            assert os.path.exists(os.path.join(root, 'origin', older_digest[:2], older_digest))
+            print("✓ Payloads not yet moved are backfilled from the database")
+
+            report = move_payloads_to_origin(dry_run=True)
+            assert (report.hashes, report.versions, report.bytes) == (1, 1, len(older))
+            move_payloads_to_origin()
+            db.session.expire_all()
+            old_version = ImageVersion.query.filter_by(version_number=0).one()
+            assert old_version.payload_in_origin and old_version.data == b''
+            assert move_payloads_to_origin(dry_run=True).hashes == 0
+            store.cache.discard(older_digest)
+            assert store.read(old_version) == older
+            print("✓ Stored payloads move to the origin and are read from there")
+
+        # A second node shares the origin but not the cache
+        other = BlobStore(DirectoryOrigin(os.path.join(root, 'origin'), fallback=_NoDatabase()),
+                          TranscodeCache(os.path.join(root, 'node2'), 1024 * 1024))
+        with app.app_context():
+            assert other.read(db.session.get(ImageVersion, 1)) == data
+        assert other.cache.get(digest) == data
+        print("✓ Any node can serve any payload from the shared origin")
+
+if __name__ == '__main__':
+    test_read_through_cache()
+    print("\n🎉 All blob store tests passed!")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the current-version pointer stays in step with uploads, restores and copies
+"""
+
+import io
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.models import TextureImage, ImageVersion
+from app.utils.transfer import transfer_images
+from fixtures import image_bytes, add_user, add_collection
+
+def _current(image_id):
+    """(pointer, ids of versions flagged current)"""
+    image = db.session.get(TextureImage, image_id)
+    flagged = [v.id for v in ImageVersion.query.filter_by(image_id=image_id, is_current=True)]
+    return image.current_version_id, flagged
+
+def test_pointer_follows_uploads_restores_and_copies():
+    """Every bump moves the pointer and leaves exactly one version flagged"""
+    red, blue = image_bytes('red', (8, 8)), image_bytes('blue', (8, 8))
+    with tempfile.TemporaryDirectory() as upload_root:
+        app = create_app('testing')
+        app.config['UPLOAD_FOLDER'] = upload_root
+        with app.app_context():
+            user = add_user('pointer_user', is_admin=True)
+            source, target = add_collection(user, 'Source'), add_collection(user, 'Target')
+            db.session.commit()
+            source_id, target_id = source.id, target.id
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+
+        client.post(f'/image/collection/{source_id}/upload',
+                    data={'file': (io.BytesIO(red), 'tex.png')}, content_type='multipart/form-data')
+        with app.app_context():
+            image_id = TextureImage.query.one().id
+            pointer, flagged = _current(image_id)
+            assert pointer is not None and flagged == [pointer]
+            first_version = pointer
+        print("✓ New images point at their first version")
+
+        client.post(f'/image/{image_id}/upload_version',
+                    data={'file': (io.BytesIO(blue), 'tex.png')}, content_type='multipart/form-data')
+        with app.app_context():
+            pointer, flagged = _current(image_id)
+            assert pointer != first_version and flagged == [pointer]
+            assert db.session.get(ImageVersion, pointer).version_number == 2
+        assert client.get(f'/image/{image_id}/serve').data == blue
+        print("✓ Uploading a version moves the pointer")
+
+        client.get(f'/image/version/{first_version}/restore')
+        with app.app_context():
+            pointer, flagged = _current(image_id)
+            assert flagged == [pointer] and db.session.get(ImageVersion, pointer).version_number == 3
+        assert client.get(f'/image/{image_id}/serve').data == red
+        print("✓ Restoring moves the pointer")
+
+        with app.app_context():
+            transfer_images(source_id, target_id, copy=True)
+            copy = TextureImage.query.filter_by(collection_id=target_id).one()
+            pointer, flagged = _current(copy.id)
+            assert flagged == [pointer] and db.session.get(ImageVersion, pointer).image_id == copy.id
+            assert db.session.get(ImageVersion, pointer).version_number == 3
+        print("✓ Copies point at their own current version")
+
+if __name__ == '__main__':
+    test_pointer_follows_uploads_restores_and_copies()
+    print("\n🎉 All current-version tests passed!")
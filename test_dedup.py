@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script to verify vault-wide payload deduplication
+"""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, select
+
+from app import create_app, db
+from app.models import User, TextureImage, ImageVersion
+from app.models.storage import content_hash
+from app.utils import deletion
+from app.utils.dedup import dedupe_existing, version_payload
+from import_collection import CollectionImporter
+from fixtures import image_bytes, add_user, add_collection
+
+def _stored_bytes():
+    return db.session.execute(select(func.sum(func.length(ImageVersion.data)))).scalar() or 0
+
+def _setup(upload_root):
+    app = create_app('testing')
+    app.config['UPLOAD_FOLDER'] = upload_root
+    with app.app_context():
+        collection = add_collection(add_user('dedup_user', is_admin=True), 'Icons')
+        db.session.commit()
+        return app, collection.id
+
+def test_uploads_and_imports_are_deduplicated():
+    """Identical payloads are stored once however they arrive"""
+    red, blue = image_bytes('red', (8, 8)), image_bytes('blue', (8, 8))
+    with tempfile.TemporaryDirectory() as root:
+        app, collection_id = _setup(root)
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+        client.post(f'/image/collection/{collection_id}/upload',
+                    data={'file': (io.BytesIO(red), 'icon.png')}, content_type='multipart/form-data')
+        response = client.post(f'/image/collection/{collection_id}/upload', follow_redirects=True,
+                               data={'file': (io.BytesIO(red), 'icon_copy.png')}, content_type='multipart/form-data')
+        assert 'so it was deduplicated' in response.get_data(as_text=True)
+        assert len(os.listdir(root)) == 1  # No second copy in the upload folder
+        with app.app_context():
+            assert _stored_bytes() == len(red)
+            versions = ImageVersion.query.order_by(ImageVersion.id).all()
+            assert [v.payload_shared for v in versions] == [False, True]
+            assert versions[1].filepath == versions[0].filepath and os.path.isfile(versions[1].filepath)
+            assert versions[1].image.current_filepath == versions[0].filepath
+            assert version_payload(versions[1]) == red
+        copy_id = versions[1].image_id
+        assert client.get(f'/image/{copy_id}/serve').data == red
+        print("✓ A repeated upload is stored once and served from the stored copy")
+
+        folder = os.path.join(root, 'mod')
+        os.makedirs(os.path.join(folder, 'ui'))
+        for name, data in (('a.png', red), ('b.png', blue), ('ui/b_again.png', blue)):
+            with open(os.path.join(folder, name), 'wb') as f:
+                f.write(data)
+        with app.app_context():
+            importer = CollectionImporter(app)
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                assert importer.import_folder(folder, 'Mod', '', 'dedup_user', auto_yes=True)
+            assert importer.stats['files_deduplicated'] == 2
+            assert importer.stats['deduplicated_size'] == len(red) + len(blue)
+            assert 'Duplicates stored once: 2 files' in output.getvalue()
+            assert _stored_bytes() == len(red) + len(blue)
+        print("✓ The importer stores duplicates once and reports the savings")
+
+def test_deleting_the_stored_copy_keeps_shared_payloads():
+    """Bytes move to a surviving version before their stored copy is deleted"""
+    red = image_bytes('red', (8, 8))
+    with tempfile.TemporaryDirectory() as root:
+        app, collection_id = _setup(root)
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+        for name in ('first.png', 'second.png', 'third.png'):
+            client.post(f'/image/collection/{collection_id}/upload',
+                        data={'file': (io.BytesIO(red), name)}, content_type='multipart/form-data')
+        with app.app_context():
+            first, second, third = [image.id for image in TextureImage.query.order_by(TextureImage.id)]
+
+        client.post(f'/image/{first}/delete')
+        with app.app_context():
+            shared = [v.payload_shared for v in ImageVersion.query.order_by(ImageVersion.id)]
+            assert shared == [False, True] and _stored_bytes() == len(red)
+        assert client.get(f'/image/{second}/serve').data == red
+        assert client.get(f'/image/{third}/serve').data == red
+        print("✓ Deleting the stored copy rehomes its bytes to a shared version")
+
+def test_sharer_added_after_rehome_keeps_the_payload():
+    """A version that starts sharing a payload after rehoming ran stops its holder from being deleted"""
+    red = image_bytes('red', (8, 8))
+    with tempfile.TemporaryDirectory() as root:
+        app, collection_id = _setup(root)
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+        for name in ('holder.png', 'late.png'):
+            client.post(f'/image/collection/{collection_id}/upload',
+                        data={'file': (io.BytesIO(red if name == 'holder.png' else image_bytes('blue', (8, 8))), name)},
+                        content_type='multipart/form-data')
+        with app.app_context():
+            holder_id, late_id = [image.id for image in TextureImage.query.order_by(TextureImage.id)]
+
+        rehome = deletion.rehome_payloads
+        calls = []
+
+        def rehome_then_upload(ids):
+            moved = rehome(ids)
+            if not calls:
+                # The upload commits between the purge's rehoming and its DELETE
+                db.session.add(ImageVersion(image_id=late_id, version_number=2, filepath='', data=red,
+                                            uploaded_by=User.query.first().id))
+                db.session.flush()
+            calls.append(list(ids))
+            return moved
+
+        deletion.rehome_payloads = rehome_then_upload
+        try:
+            client.post(f'/image/{holder_id}/delete')
+        finally:
+            deletion.rehome_payloads = rehome
+        assert len(calls) == 2
+        with app.app_context():
+            late = ImageVersion.query.filter_by(image_id=late_id, version_number=2).one()
+            assert not late.payload_shared and late.data == red
+            assert db.session.get(TextureImage, holder_id) is None
+        print("✓ The holder is spared until the late sharer is rehomed")
+
+def test_dedupe_existing_database():
+    """The one-off pass converts duplicates stored before deduplication"""
+    red = image_bytes('red', (8, 8))
+    with tempfile.TemporaryDirectory() as root:
+        app, collection_id = _setup(root)
+        with app.app_context():
+            user_id = User.query.first().id
+            images = TextureImage.__table__
+            versions = ImageVersion.__table__
+            for number in range(3):
+                image_id = db.session.execute(images.insert().values(
+                    filename=f'old{number}.png', original_filepath='', collection_id=collection_id,
+                    uploaded_by=user_id)).inserted_primary_key[0]
+                # Written with Core, as rows from before deduplication were
+                db.session.execute(versions.insert().values(
+                    image_id=image_id, version_number=1, filepath='', uploaded_by=user_id, is_current=True,
+                    data=red, size=len(red), content_hash=content_hash(red)))
+            db.session.commit()
+            assert _stored_bytes() == 3 * len(red)
+
+            report = dedupe_existing(dry_run=True)
+            assert (report.hashes, report.versions, report.bytes) == (1, 2, 2 * len(red))
+            assert _stored_bytes() == 3 * len(red)
+            dedupe_existing()
+            assert _stored_bytes() == len(red)
+            assert all(version_payload(v) == red for v in ImageVersion.query.all())
+            assert dedupe_existing().versions == 0
+        print("✓ Existing duplicates are converted in place, and a rerun finds nothing")
+
+if __name__ == '__main__':
+    test_uploads_and_imports_are_deduplicated()
+    test_deleting_the_stored_copy_keeps_shared_payloads()
+    test_sharer_added_after_rehome_keeps_the_payload()
+    test_dedupe_existing_database()
+    print("\n🎉 All dedup tests passed!")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Test script to verify chunked background deletion of collections and images
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from datetime import datetime
+
+from app import create_app, db
+from app.models import User, Collection, CollectionPermission, TextureImage, ImageVersion, StorageUsage
+from app.models.storage import rebuild_storage_ledger
+from app.utils.deletion import purge_pending_collections, purge_pending_images
+from app.utils.helpers import get_member_collection_ids
+from app.utils.transfer import transfer_images
+from fixtures import add_user, add_collection, add_image
+
+def _usage(scope, scope_id):
+    row = db.session.get(StorageUsage, (scope, scope_id))
+    return (row.logical_bytes, row.physical_bytes, row.version_count) if row else (0, 0, 0)
+
+def _setup(images=5):
+    app = create_app('testing')
+    app.config['DELETION_CHUNK_SIZE'] = 4  # Several chunks, within the N+1 detector's limit
+    app.config['DELETION_CHUNK_PAUSE'] = 0
+    with app.app_context():
+        user, member = add_user('deletion_user'), add_user('deletion_member')
+        doomed = add_collection(user, 'Doomed', is_public=True)
+        kept = add_collection(user, 'Kept')
+        db.session.add(CollectionPermission(user_id=member.id, collection_id=doomed.id, permission_level='read'))
+        image_ids = [add_image(doomed, [f'payload-{n}-{number}'.encode() * 10 for number in (1, 2, 3)],
+                               filename=f'tex{n}.png', file_size=1)[0].id
+                     for n in range(images)]
+        db.session.commit()
+        return app, {'user': user.id, 'member': member.id, 'doomed': doomed.id, 'kept': kept.id, 'images': image_ids}
+
+def test_collection_deleted_in_chunks():
+    """Everything in the collection goes, the ledger stays exact and copies survive"""
+    app, ids = _setup()
+    client = app.test_client()
+    client.get('/auth/bypass_login0110')
+    with app.app_context():
+        transfer_images(ids['doomed'], ids['kept'], ids['images'][:1], copy=True)
+
+    response = client.get(f"/collection/{ids['doomed']}/delete", follow_redirects=True)
+    assert b'is being deleted' in response.data
+    with app.app_context():
+        assert db.session.get(Collection, ids['doomed']) is None
+        assert TextureImage.query.filter_by(collection_id=ids['doomed']).count() == 0
+        assert CollectionPermission.query.filter_by(collection_id=ids['doomed']).count() == 0
+        assert ImageVersion.query.count() == 3
+        copy = TextureImage.query.filter_by(collection_id=ids['kept']).one()
+        assert copy.copied_from_id is None
+        print("✓ Versions, images and permissions removed; the copy keeps its history")
+
+        assert _usage('collection', ids['doomed']) == (0, 0, 0)
+        assert _usage('user', ids['user'])[2] == 3
+        incremental = [_usage('user', ids['user']), _usage('collection', ids['kept'])]
+        rebuild_storage_ledger(db.session.connection())
+        assert [_usage('user', ids['user']), _usage('collection', ids['kept'])] == incremental
+        db.session.commit()
+        print("✓ Ledger matches a rebuild")
+
+    status = client.get(f"/collection/{ids['doomed']}/deletion_status").get_json()
+    assert status['state'] == 'done'
+    assert status['versions_deleted'] == status['versions_total'] == 15
+    assert status['images_deleted'] == status['images_total'] == 5
+    print("✓ Progress reported")
+
+def test_tombstone_hides_collection():
+    """A tombstoned collection disappears before its rows are purged"""
+    app, ids = _setup(images=2)
+    client = app.test_client()
+    client.get('/auth/bypass_login0110')
+    with app.app_context():
+        db.session.get(Collection, ids['doomed']).deleted_at = datetime.utcnow()
+        db.session.commit()
+        assert get_member_collection_ids(db.session.get(User, ids['member'])) == []
+
+    response = client.get(f"/collection/{ids['doomed']}", follow_redirects=True)
+    assert b'You do not have permission' in response.data
+    assert b'Doomed' not in client.get('/dashboard').data
+    status = client.get(f"/collection/{ids['doomed']}/deletion_status").get_json()
+    assert status['images_remaining'] == 2 and status['versions_remaining'] == 6
+    print("✓ Tombstoned collection hidden and still pending")
+
+    with app.app_context():
+        assert purge_pending_collections(chunk_size=4, pause=0) == {ids['doomed']: (6, 2)}
+        assert db.session.get(Collection, ids['doomed']) is None
+        print("✓ Pending deletions resumed")
+
+def test_delete_single_image():
+    """Deleting one image removes its versions and updates the ledger"""
+    app, ids = _setup(images=2)
+    client = app.test_client()
+    client.get('/auth/bypass_login0110')
+    image_id = ids['images'][0]
+
+    response = client.post(f'/image/{image_id}/delete', follow_redirects=True)
+    assert b'Deleted tex0.png' in response.data
+    with app.app_context():
+        assert db.session.get(TextureImage, image_id) is None
+        assert ImageVersion.query.filter_by(image_id=image_id).count() == 0
+        assert _usage('collection', ids['doomed'])[2] == 3
+        incremental = [_usage('collection', ids['doomed']), _usage('user', ids['user'])]
+        rebuild_storage_ledger(db.session.connection())
+        assert [_usage('collection', ids['doomed']), _usage('user', ids['user'])] == incremental
+        db.session.commit()
+        print("✓ Image deleted with its versions")
+
+def test_image_tombstone_purged_by_worker():
+    """With a worker, deleting an image only hides it; the worker removes its rows"""
+    app, ids = _setup(images=2)
+    app.config['DELETION_WORKER_ENABLED'] = True
+    client = app.test_client()
+    client.get('/auth/bypass_login0110')
+    image_id = ids['images'][0]
+    with app.app_context():
+        version_id = ImageVersion.query.filter_by(image_id=image_id).first().id
+
+    response = client.post(f'/image/{image_id}/delete', follow_redirects=True)
+    assert b'Deleted tex0.png' in response.data
+    assert client.get(f'/image/{image_id}').status_code == 404
+    assert client.get(f'/image/version/{version_id}/serve').status_code == 404
+    assert b'tex0.png' not in client.get(f"/collection/{ids['doomed']}").data
+    with app.app_context():
+        assert ImageVersion.query.filter_by(image_id=image_id).count() == 3
+        print("✓ Deleted image hidden before it is purged")
+
+        assert purge_pending_images(chunk_size=4, pause=0) == {image_id: 3}
+        assert ImageVersion.query.filter_by(image_id=image_id).count() == 0
+        assert db.session.execute(db.select(TextureImage.__table__.c.id)
+                                  .where(TextureImage.__table__.c.id == image_id)).first() is None
+        incremental = [_usage('collection', ids['doomed']), _usage('user', ids['user'])]
+        rebuild_storage_ledger(db.session.connection())
+        assert [_usage('collection', ids['doomed']), _usage('user', ids['user'])] == incremental
+        db.session.commit()
+        print("✓ Worker purged the image and kept the ledger exact")
+
+def test_concurrent_purge_keeps_ledger():
+    """Rows removed by another purge between SELECT and DELETE are not counted twice"""
+    from app.utils import deletion
+    app, ids = _setup(images=2)
+    with app.app_context():
+        versions = ImageVersion.__table__
+        rehome = deletion.rehome_payloads
+
+        def racing_rehome(version_ids):
+            # Another worker deletes (and accounts for) half of this chunk first
+            taken = version_ids[:len(version_ids) // 2]
+            removed = db.session.execute(versions.delete().where(versions.c.id.in_(taken))
+                                         .returning(versions.c.uploaded_by, versions.c.content_hash,
+                                                    versions.c.size)).all()
+            from app.models.storage import apply_storage_deltas
+            apply_storage_deltas(db.session.connection(),
+                                 {('user', uploaded_by, digest): [-1, size] for uploaded_by, digest, size in removed})
+            return rehome(version_ids)
+
+        deletion.rehome_payloads = racing_rehome
+        try:
+            db.session.get(Collection, ids['doomed']).deleted_at = datetime.utcnow()
+            db.session.commit()
+            assert purge_pending_collections(chunk_size=4, pause=0) == {ids['doomed']: (3, 2)}
+        finally:
+            deletion.rehome_payloads = rehome
+        assert _usage('user', ids['user']) == (0, 0, 0)
+        rebuild_storage_ledger(db.session.connection())
+        assert _usage('user', ids['user']) == (0, 0, 0)
+        db.session.commit()
+        print("✓ Ledger counts only the rows each purge deleted")
+
+if __name__ == '__main__':
+    test_collection_deleted_in_chunks()
+    test_tombstone_hides_collection()
+    test_delete_single_image()
+    test_image_tombstone_purged_by_worker()
+    test_concurrent_purge_keeps_ledger()
+    print("\n🎉 All deletion tests passed!")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the dashboard fragment cache and its invalidation
+"""
+
+import os
+import sys
+import time
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.models import User, Collection, CacheGeneration
+from app.utils.cache import LRUCache
+
+def test_lru_eviction_and_ttl():
+    """Least recently used entries are evicted and expired entries are misses"""
+    cache = LRUCache(max_entries=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.stats()['evictions'] == 1
+    print("✓ LRU eviction works")
+    
+    short = LRUCache(max_entries=2, ttl=0.01)
+    short.set('a', 1)
+    time.sleep(0.02)
+    assert short.get('a') is None
+    print("✓ TTL expiry works")
+
+def test_dashboard_served_from_cache():
+    """Repeat dashboard loads hit the cache until a collection changes"""
+    app = create_app('testing')
+    with app.app_context():
+        user = User(username='cache_user', email='cache@example.com')
+        user.set_password('test123')
+        db.session.add(user)
+        db.session.flush()
+        collection = Collection(name='Cached Collection', description='', created_by=user.id)
+        db.session.add(collection)
+        db.session.commit()
+        collection_id = collection.id
+    
+    client = app.test_client()
+    client.get('/auth/bypass_login0110')
+    
+    client.get('/dashboard')
+    second = client.get('/dashboard')
+    assert b'Cached Collection' in second.data
+    with app.app_context():
+        stats = app.extensions['fragment_cache'].stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1
+    print("✓ Second dashboard load served from cache")
+    
+    client.post(f'/collection/{collection_id}/edit', data={'name': 'Renamed Collection'})
+    
+    third = client.get('/dashboard')
+    assert b'Renamed Collection' in third.data
+    print("✓ Collection edit invalidates the cached dashboard")
+    
+    # Another worker process renames the collection and bumps the shared counter
+    with app.app_context():
+        collections = Collection.__table__
+        generations = CacheGeneration.__table__
+        db.session.execute(collections.update().where(collections.c.id == collection_id)
+                           .values(name='Renamed Elsewhere'))
+        db.session.execute(generations.update().where(generations.c.scope == 'collection',
+                                                      generations.c.scope_id == collection_id)
+                           .values(generation=generations.c.generation + 1))
+        db.session.commit()
+    
+    fourth = client.get('/dashboard')
+    assert b'Renamed Elsewhere' in fourth.data
+    print("✓ A bump made by another process invalidates the cached dashboard")
+
+if __name__ == '__main__':
+    test_lru_eviction_and_ttl()
+    test_dashboard_served_from_cache()
+    print("\n🎉 Fragment cache tests passed!")
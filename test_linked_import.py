@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script to verify in-place (--link) imports and their drift handling
+"""
+
+import io
+import os
+import sys
+import tempfile
+import contextlib
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import func, select
+
+from app import create_app, db
+from app.models import User, TextureImage, ImageVersion
+from app.utils.blob_store import init_payload_cache, read_payload
+from app.utils.links import read_linked, LinkedSourceError
+from import_collection import CollectionImporter
+from fixtures import image_bytes
+
+def _write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+
+def _import(app, folder):
+    with app.app_context():
+        db.session.add(User(username='modder', email='modder@example.com', is_admin=True, password_hash='x'))
+        db.session.commit()
+        importer = CollectionImporter(app, link=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert importer.import_folder(folder, 'Mods', '', 'modder', auto_yes=True)
+        assert importer.stats['files_linked'] == 2
+        return {image.filename: image.id for image in TextureImage.query.all()}
+
+def test_link_import_and_drift():
+    """Linked files are served in place until they change, then snapshotted"""
+    red, blue, green = image_bytes('red'), image_bytes('blue'), image_bytes('green', (24, 24))
+    with tempfile.TemporaryDirectory() as root:
+        _write(os.path.join(root, 'red.png'), red)
+        _write(os.path.join(root, 'blue.png'), blue)
+        app = create_app('testing')
+        ids = _import(app, root)
+
+        with app.app_context():
+            stored = db.session.execute(select(func.sum(func.length(ImageVersion.data)))).scalar()
+            versions = ImageVersion.query.all()
+            assert stored == 0
+            assert {v.size for v in versions} == {len(red), len(blue)}
+            assert all(v.link_path and v.link_mtime_ns and v.content_hash for v in versions)
+        print("✓ --link records path, size, mtime and hash without copying the bytes")
+
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+        assert client.get(f"/image/{ids['red.png']}/serve").data == red
+        print("✓ Linked payloads are served from the source file")
+
+        os.utime(os.path.join(root, 'red.png'), ns=(1, 1))
+        assert client.get(f"/image/{ids['red.png']}/serve").data == red
+        with app.app_context():
+            assert db.session.get(TextureImage, ids['red.png']).current_version.link_mtime_ns == 1
+        print("✓ A touched but unchanged source is re-recorded, not snapshotted")
+
+        _write(os.path.join(root, 'red.png'), green)
+        response = client.get(f"/image/{ids['red.png']}/serve", follow_redirects=True)
+        assert 'content is lost' in response.get_data(as_text=True)
+        assert 'saved as version 2' in response.get_data(as_text=True)
+        assert client.get(f"/image/{ids['red.png']}/serve").data == green
+        with app.app_context():
+            image = db.session.get(TextureImage, ids['red.png'])
+            assert image.current_version.version_number == 2 and not image.current_version.link_path
+            assert (image.width, image.height) == (24, 24)
+        client.get(f"/image/{ids['red.png']}/serve", follow_redirects=True)
+        with app.app_context():
+            assert ImageVersion.query.filter_by(image_id=ids['red.png']).count() == 2
+        print("✓ Changed sources are snapshotted once as a new current version")
+
+        app.config['PAYLOAD_CACHE_MB'] = 1
+        init_payload_cache(app)
+        assert client.get(f"/image/{ids['blue.png']}/serve").data == blue
+        os.unlink(os.path.join(root, 'blue.png'))
+        with app.app_context():
+            version = db.session.get(TextureImage, ids['blue.png']).current_version
+            pending = TextureImage(filename='pending.png', original_filepath='',
+                                   collection_id=version.image.collection_id, uploaded_by=version.uploaded_by)
+            db.session.add(pending)
+            assert read_linked(version) == blue
+            assert pending in db.session.new  # The snapshot neither flushed nor committed the caller's session
+            db.session.rollback()
+            version = db.session.get(ImageVersion, version.id)
+            assert version.link_path is None and read_payload(version) == blue
+            assert TextureImage.query.filter_by(filename='pending.png').count() == 0
+        print("✓ A vanished source is recovered from the payload cache and snapshotted")
+
+        with app.app_context():
+            first = ImageVersion.query.filter_by(image_id=ids['red.png'], version_number=1).one()
+            try:
+                read_linked(first)
+                assert False, 'expected LinkedSourceError'
+            except LinkedSourceError:
+                pass
+        print("✓ Unrecoverable linked versions raise LinkedSourceError")
+
+def test_publish_snapshots_linked_sources():
+    """Publishing over a linked source stores the old bytes first"""
+    red, blue = image_bytes('red'), image_bytes('blue')
+    with tempfile.TemporaryDirectory() as root:
+        _write(os.path.join(root, 'red.png'), red)
+        _write(os.path.join(root, 'blue.png'), blue)
+        app = create_app('testing')
+        ids = _import(app, root)
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+
+        response = client.get(f"/image/{ids['red.png']}/publish", follow_redirects=True)
+        assert 'already at its original path' in response.get_data(as_text=True)
+
+        with app.app_context():
+            image = db.session.get(TextureImage, ids['red.png'])
+            image.original_filepath = os.path.join(root, 'blue.png')  # Publish red over blue's source
+            db.session.commit()
+        response = client.get(f"/image/{ids['red.png']}/publish", follow_redirects=True)
+        text = response.get_data(as_text=True)
+        assert 'written by' in text and 'written by buffered' not in text  # Copied from the source file
+        with open(os.path.join(root, 'blue.png'), 'rb') as f:
+            assert f.read() == red
+        assert client.get(f"/image/{ids['blue.png']}/serve").data == blue
+        with app.app_context():
+            assert db.session.get(TextureImage, ids['blue.png']).current_version.link_path is None
+        print("✓ Versions linked to a publish target are snapshotted before it is replaced")
+
+if __name__ == '__main__':
+    test_link_import_and_drift()
+    test_publish_snapshots_linked_sources()
+    print("\n🎉 All linked import tests passed!")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the N+1 query detector catches repeated lazy loads
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.models import User, Collection
+from app.utils.nplusone import NPlusOneError, fingerprint
+
+def test_fingerprint():
+    """Statements that differ only in parameters share one fingerprint"""
+    a = fingerprint('SELECT * FROM collection\n WHERE collection.id IN (?, ?, ?)')
+    b = fingerprint('SELECT * FROM collection WHERE collection.id IN (?, ?)')
+    assert a == b
+    print(f"✓ Fingerprint: {a}")
+
+def create_collections(count):
+    """Create an admin user and several collections for them"""
+    admin = User(username='nplusone_admin', email='nplusone@example.com', is_admin=True)
+    admin.set_password('test123')
+    db.session.add(admin)
+    db.session.flush()
+    for i in range(count):
+        db.session.add(Collection(name=f'N+1 Collection {i}', description='', created_by=admin.id))
+    db.session.commit()
+    return admin
+
+def test_detector_reports_call_site():
+    """Lazy loads in a loop are detected and attributed to the calling line"""
+    app = create_app('testing')
+    with app.app_context():
+        create_collections(8)
+        detector = app.extensions['nplusone']
+        
+        with app.test_request_context('/'):
+            for collection in Collection.query.all():
+                len(collection.images)  # Lazy load per collection
+            
+            violations = detector.violations()
+            assert len(violations) == 1
+            assert violations[0]['count'] == 8
+            assert violations[0]['call_site'].startswith('test_nplusone.py:')
+            print(f"✓ Detected {violations[0]['count']}x at {violations[0]['call_site']}")
+            
+            try:
+                detector.check()
+                assert False, 'NPlusOneError not raised'
+            except NPlusOneError as e:
+                print("✓ NPlusOneError raised in testing mode")
+
+if __name__ == '__main__':
+    test_fingerprint()
+    test_detector_reports_call_site()
+    print("\n🎉 N+1 detector tests passed!")
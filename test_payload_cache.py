@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the in-memory LRU of served payloads
+"""
+
+import os
+import sys
+import threading
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.utils.blob_store import init_payload_cache
+from app.utils.cache import ByteLRUCache
+from fixtures import image_bytes, add_user, add_collection, add_image
+
+def test_byte_budget_and_counters():
+    """Entries are evicted by total size, oversized values are skipped"""
+    cache = ByteLRUCache(max_bytes=100, max_item_bytes=60)
+    cache.set('a', b'x' * 40)
+    cache.set('b', b'x' * 40)
+    assert cache.get('a') is not None  # a is now the most recently used
+    cache.set('c', b'x' * 40)
+    assert cache.get('b') is None and cache.get('a') is not None and cache.get('c') is not None
+    cache.set('huge', b'x' * 61)
+    assert cache.get('huge') is None
+    assert cache.stats() == {'entries': 2, 'bytes': 80, 'max_bytes': 100, 'hits': 3, 'misses': 2, 'evictions': 1}
+    print("✓ Byte budget enforced with hit/miss/eviction counters")
+
+    def hammer(n):
+        for i in range(500):
+            cache.set(f'{n}-{i % 7}', b'y' * (i % 30 + 1))
+            cache.get(f'{n}-{(i + 3) % 7}')
+    threads = [threading.Thread(target=hammer, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    stats = cache.stats()
+    assert stats['bytes'] <= 100 and stats['hits'] + stats['misses'] == 5 + 8 * 500
+    print("✓ Consistent under concurrent access")
+
+def test_served_payloads_skip_the_database():
+    """Repeat requests for a texture are answered from memory"""
+    app = create_app('testing')
+    assert 'payload_cache' not in app.extensions  # Off unless configured
+    app.config['PAYLOAD_CACHE_MB'] = 1
+    cache = init_payload_cache(app)
+    data = image_bytes('purple')
+    with app.app_context():
+        collection = add_collection(add_user('payload_user', is_admin=True), 'Hot')
+        image, _ = add_image(collection, [data], filename='cover.png', file_size=len(data))
+        db.session.commit()
+        image_id = image.id
+
+    reads = []
+    from sqlalchemy import event
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if 'image_version.data' in statement:
+            reads.append(statement)
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+        for _ in range(4):
+            assert client.get(f'/image/{image_id}/serve').data == data
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert len(reads) == 1
+    assert cache.stats()['hits'] == 3 and cache.stats()['misses'] == 1
+    print("✓ Payload read from the database once, then served from memory")
+
+if __name__ == '__main__':
+    test_byte_budget_and_counters()
+    test_served_payloads_skip_the_database()
+    print("\n🎉 All payload cache tests passed!")
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Test script to verify per-request timing and SQL query instrumentation
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app
+from app.utils.instrumentation import RequestMetrics, get_request_metrics
+
+def test_request_metrics_summary():
+    """Percentiles and histogram buckets are computed from recorded samples"""
+    metrics = RequestMetrics(sample_size=100)
+    for wall_ms in range(1, 101):
+        metrics.record('images.serve_image', float(wall_ms), wall_ms / 2.0, 3, 0, 1024)
+    metrics.record('main.index', 1.0, 0.0, 0, 0, 10)
+    
+    rows = metrics.summaries()
+    assert rows[0]['endpoint'] == 'images.serve_image'
+    assert rows[0]['p95_ms'] == 95.0
+    assert rows[0]['p50_ms'] == 50.0
+    assert rows[0]['avg_queries'] == 3
+    assert sum(count for _, count in rows[0]['histogram']) == 100
+    print("✓ Endpoint summaries computed correctly")
+
+def test_server_timing_header():
+    """Responses carry a Server-Timing header and are recorded per endpoint"""
+    app = create_app('development')
+    client = app.test_client()
+    
+    response = client.get('/')
+    assert 'Server-Timing' in response.headers
+    assert 'app;dur=' in response.headers['Server-Timing']
+    print(f"✓ Server-Timing: {response.headers['Server-Timing']}")
+    
+    metrics = get_request_metrics(app)
+    endpoints = {row['endpoint']: row for row in metrics.summaries()}
+    assert endpoints['main.index']['count'] == 1
+    print("✓ Request recorded for main.index")
+
+if __name__ == '__main__':
+    test_request_metrics_summary()
+    test_server_timing_header()
+    print("\n🎉 Request metrics tests passed!")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script to verify version retention previews and compaction
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.models import Collection, ImageVersion, StorageUsage
+from app.utils.retention import RetentionPolicy, preview_retention, compact_collection
+from fixtures import add_user, add_collection, add_image
+
+def _setup():
+    """One image with five versions: v1 published, v2 and v3 share a payload, v5 current"""
+    app = create_app('testing')
+    with app.app_context():
+        user = add_user('retention_user', is_admin=True)
+        collection = add_collection(user, 'Retention')
+        image, _ = add_image(collection, [], filename='a.png')
+        old = datetime.utcnow() - timedelta(days=30)
+        payloads = [b'v1' * 50, b'shared' * 50, b'shared' * 50, b'v4' * 50, b'v5' * 50]
+        for number, data in enumerate(payloads, start=1):
+            db.session.add(ImageVersion(
+                image_id=image.id, version_number=number, filepath=f'v{number}.png', uploaded_by=user.id,
+                data=data, is_current=number == 5,
+                uploaded_at=old if number < 4 else datetime.utcnow(),
+                published_at=old if number == 1 else None
+            ))
+        db.session.commit()
+        return app, collection.id, payloads
+
+def test_preview_and_compact():
+    """Only versions no rule keeps are previewed and then removed"""
+    app, collection_id, payloads = _setup()
+    with app.app_context():
+        policy = RetentionPolicy(keep_last=2, keep_days=None, keep_published=True)
+        preview = preview_retention(collection_id, policy)
+        assert preview == {'versions': 2, 'images': 1,
+                           'logical_bytes': 2 * len(payloads[1]), 'physical_bytes': len(payloads[1])}
+        assert ImageVersion.query.count() == 5
+        print("✓ Preview counts v2 and v3 and dedupes their shared payload")
+
+        assert preview_retention(collection_id, RetentionPolicy(keep_last=2, keep_days=60))['versions'] == 0
+        print("✓ Versions inside the keep_days window are kept")
+
+        deleted, freed = compact_collection(collection_id, policy, batch_size=1, pause=0)
+        assert (deleted, freed) == (2, 2 * len(payloads[1]))
+        remaining = sorted(v.version_number for v in ImageVersion.query.all())
+        assert remaining == [1, 4, 5]
+        usage = db.session.get(StorageUsage, ('collection', collection_id))
+        assert usage.version_count == 3
+        assert usage.physical_bytes == len(payloads[0]) + len(payloads[3]) + len(payloads[4])
+        print("✓ Compaction removed v2 and v3 in batches and updated the ledger")
+
+def test_preview_endpoint():
+    """The preview endpoint evaluates unsaved form values"""
+    app, collection_id, _ = _setup()
+    client = app.test_client()
+    client.get('/auth/bypass_login0110')
+    response = client.get(f'/collection/{collection_id}/retention/preview?keep_last=1&keep_published=')
+    assert response.get_json()['versions'] == 4
+    response = client.get(f'/collection/{collection_id}/retention/preview')
+    assert response.get_json()['enabled'] is False
+    print("✓ Preview endpoint reports unsaved and saved policies")
+
+def test_edit_keeps_policy_without_retention_fields():
+    """Editing a collection changes retention only when the retention fields were submitted"""
+    app, collection_id, _ = _setup()
+    client = app.test_client()
+    client.get('/auth/bypass_login0110')
+    client.post(f'/collection/{collection_id}/edit',
+                data={'name': 'Retention', 'retention_form': '1', 'keep_last': '3', 'keep_published': '1'})
+    client.post(f'/collection/{collection_id}/edit', data={'name': 'Renamed'})
+    with app.app_context():
+        collection = db.session.get(Collection, collection_id)
+        assert collection.name == 'Renamed'
+        assert (collection.retention_keep_last, collection.retention_keep_published) == (3, True)
+    client.post(f'/collection/{collection_id}/edit', data={'name': 'Renamed', 'retention_form': '1'})
+    with app.app_context():
+        collection = db.session.get(Collection, collection_id)
+        assert (collection.retention_keep_last, collection.retention_keep_published) == (None, False)
+    print("✓ Posts without the retention fields leave the policy alone")
+
+if __name__ == '__main__':
+    test_preview_and_compact()
+    test_preview_endpoint()
+    test_edit_keeps_policy_without_retention_fields()
+    print("\n🎉 All retention tests passed!")
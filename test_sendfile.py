@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test script to verify that payload bytes can be offloaded to the front web server
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.models import User
+from app.utils.blob_store import init_blob_store
+from fixtures import image_bytes, add_user, add_collection, add_image
+
+def _setup(app, data):
+    with app.app_context():
+        collection = add_collection(add_user('sendfile_owner'), 'Offloaded')
+        outsider = add_user('sendfile_outsider')
+        image, (version,) = add_image(collection, [data], filename='brick.png', file_size=len(data))
+        db.session.commit()
+        return image.id, version.id, outsider.id
+
+def test_offloaded_responses():
+    """Views answer with an internal-redirect header once permissions pass"""
+    data = image_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    with tempfile.TemporaryDirectory() as root:
+        origin = os.path.join(root, 'origin')
+        app = create_app('testing')
+        app.config.update(BLOB_ORIGIN='directory', BLOB_ORIGIN_DIR=origin,
+                          SENDFILE_MODE='x-accel-redirect', SENDFILE_ACCEL_PREFIX='/_blobs/')
+        store = init_blob_store(app)
+        image_id, version_id, outsider_id = _setup(app, data)
+
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')  # The collection owner
+        for url in (f'/image/{image_id}/serve', f'/image/version/{version_id}/serve'):
+            response = client.get(url)
+            assert response.status_code == 200 and response.data == b''
+            assert response.headers['X-Accel-Redirect'] == f'/_blobs/{digest[:2]}/{digest}'
+            assert response.mimetype == 'image/png'
+        assert store.offloaded == 2 and store.origin_reads == 0
+        print("✓ X-Accel-Redirect names the payload under the internal location")
+
+        app.config['SENDFILE_MODE'] = 'x-sendfile'
+        response = client.get(f'/image/{image_id}/serve')
+        assert response.headers['X-Sendfile'] == os.path.join(os.path.abspath(origin), digest[:2], digest)
+        assert os.path.exists(response.headers['X-Sendfile'])
+        print("✓ X-Sendfile gives the absolute path of the origin file")
+
+        with app.app_context():
+            outsider = db.session.get(User, outsider_id)
+            outsider_client = app.test_client()
+            with outsider_client.session_transaction() as session:
+                session['_user_id'] = str(outsider.id)
+                session['_fresh'] = True
+        response = outsider_client.get(f'/image/{image_id}/serve')
+        assert response.status_code == 302 and 'X-Sendfile' not in response.headers
+        print("✓ Permission checks still run before anything is offloaded")
+
+        app.config['SENDFILE_MODE'] = None
+        response = client.get(f'/image/{image_id}/serve')
+        assert response.data == data and 'X-Sendfile' not in response.headers
+        print("✓ Without SENDFILE_MODE the app serves the bytes itself")
+
+if __name__ == '__main__':
+    test_offloaded_responses()
+    print("\n🎉 All sendfile tests passed!")
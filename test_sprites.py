@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script to verify collection thumbnail sprite sheets
+"""
+
+import io
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+from app import create_app, db
+from app.models import TextureImage, ImageVersion
+from app.utils.versions import set_current_version
+from app.utils.sprites import init_sprite_cache
+from fixtures import image_bytes, add_user, add_collection, add_image
+
+COLORS = ['red', 'lime', 'blue']
+
+def test_sprite_sheet_for_a_page():
+    """One map and one sheet cover a page; cells are reused when a single image changes"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        app = create_app('testing')
+        app.config['SPRITE_CACHE_DIR'] = cache_dir
+        cache = init_sprite_cache(app)
+        with app.app_context():
+            user = add_user('sprite_user', is_admin=True)
+            collection = add_collection(user, 'Sprites')
+            image_ids = [add_image(collection, [image_bytes(color, (300, 150))], filename=f'{color}.png',
+                                   file_size=1)[0].id
+                         for color in COLORS]
+            db.session.commit()
+            collection_id, user_id = collection.id, user.id
+
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+        page = client.get(f'/collection/{collection_id}')
+        assert b'sprite-thumb' in page.data and b'/serve"' not in page.data
+        print("✓ Collection page no longer requests every full image")
+
+        ids = ','.join(map(str, image_ids + [999999]))
+        response = client.get(f'/collection/{collection_id}/sprites?ids={ids}')
+        sheet = response.get_json()
+        assert sheet['cell'] == 120 and (sheet['width'], sheet['height']) == (360, 120)
+        assert set(sheet['sprites']) == {str(i) for i in image_ids}
+        etag = response.headers['ETag']
+        assert client.get(f'/collection/{collection_id}/sprites?ids={ids}',
+                          headers={'If-None-Match': etag}).status_code == 304
+        print("✓ Coordinate map covers the page and revalidates by ETag")
+
+        response = client.get(sheet['sheet_url'])
+        assert response.status_code == 200 and response.mimetype == 'image/webp'
+        assert 'immutable' in response.headers['Cache-Control']
+        with Image.open(io.BytesIO(response.data)) as img:
+            img = img.convert('RGB')
+            assert img.size == (360, 120)
+            for image_id, color in zip(image_ids, COLORS):
+                position = sheet['sprites'][str(image_id)]
+                pixel = img.getpixel((position['x'] + 60, position['y'] + 60))
+                expected = Image.new('RGB', (1, 1), color).getpixel((0, 0))
+                assert all(abs(a - b) < 24 for a, b in zip(pixel, expected)), (pixel, color)
+        print("✓ Sheet packs each image at its mapped cell")
+
+        with app.app_context():
+            set_current_version(db.session.get(TextureImage, image_ids[0]),
+                                ImageVersion(image_id=image_ids[0], version_number=2, filepath='red.png',
+                                             uploaded_by=user_id, data=image_bytes('yellow', (90, 90))))
+            db.session.commit()
+        assert client.get(sheet['sheet_url']).status_code == 404
+        changed = client.get(f'/collection/{collection_id}/sprites?ids={ids}').get_json()
+        assert changed['sheet_url'] != sheet['sheet_url']
+        misses = cache.stats()['misses']
+        assert client.get(changed['sheet_url']).status_code == 200
+        # The new sheet and the changed image's cell are missing; the other two cells are reused
+        assert cache.stats()['misses'] == misses + 2
+        print("✓ New version changes the sheet key and rebuilds only its own cell")
+
+        assert client.get(f'/collection/{collection_id}/sprites').status_code == 400
+        assert client.get(f'/collection/{collection_id}/sprites?ids=a,b').status_code == 400
+
+if __name__ == '__main__':
+    test_sprite_sheet_for_a_page()
+    print("\n🎉 All sprite sheet tests passed!")
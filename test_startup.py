@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script to verify lazy route loading and the fast-startup settings
+"""
+
+import os
+import sys
+import json
+import subprocess
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+CHILD = r'''
+import json, sys
+from app import create_app, db
+app = create_app('production')
+loaded = lambda name: name in sys.modules
+before = {
+    'view_module': loaded('app.routes.images.upload_image'),
+    'pil': loaded('PIL.Image'),
+}
+with app.app_context():
+    before['tables'] = db.inspect(db.engine).get_table_names()
+response = app.test_client().get('/auth/login')
+after = {'status': response.status_code, 'login_module': loaded('app.routes.auth.login')}
+print(json.dumps({'before': before, 'after': after}))
+'''
+
+def test_production_startup_is_lazy():
+    """Production startup imports no view modules or PIL and creates no tables"""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'startup.db')}")
+        output = subprocess.run([sys.executable, '-c', CHILD], cwd=ROOT, env=env,
+                                capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+
+    assert result['before']['view_module'] is False
+    assert result['before']['pil'] is False
+    print("✓ View modules and PIL are not imported at startup")
+
+    assert result['before']['tables'] == []
+    print("✓ Production startup leaves schema creation to init_database.py")
+
+    assert result['after'] == {'status': 200, 'login_module': True}
+    print("✓ View module is imported on its first request")
+
+def test_all_routes_resolve():
+    """Every lazy route entry points at an importable view function"""
+    from app import create_app
+    from app.routes import ROUTES, LazyView
+    for route in ROUTES:
+        assert callable(LazyView(route[2]).view), route[2]
+    app = create_app('testing')
+    assert {route[1] for route in ROUTES} <= set(app.view_functions)
+    print(f"✓ All {len(ROUTES)} routes resolve to view functions")
+
+if __name__ == '__main__':
+    test_production_startup_is_lazy()
+    test_all_routes_resolve()
+    print("\n🎉 All startup tests passed!")
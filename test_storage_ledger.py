@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the storage-usage ledger and upload quotas
+"""
+
+import io
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.models import Collection, TextureImage, ImageVersion, StorageUsage
+from app.models.storage import rebuild_storage_ledger
+from fixtures import image_bytes, add_user, add_collection
+
+def _usage(scope, scope_id):
+    row = db.session.get(StorageUsage, (scope, scope_id))
+    return (row.logical_bytes, row.physical_bytes, row.version_count) if row else (0, 0, 0)
+
+def _setup(upload_root):
+    app = create_app('testing')
+    app.config['UPLOAD_FOLDER'] = upload_root
+    with app.app_context():
+        user = add_user('ledger_user', is_admin=True)
+        collection = add_collection(user, 'Ledger')
+        db.session.commit()
+        return app, user.id, collection.id
+
+def test_ledger_tracks_uploads_restores_and_deletes():
+    """Logical, physical and version counts follow every change"""
+    red, blue = image_bytes('red', (8, 8)), image_bytes('blue', (8, 8))
+    with tempfile.TemporaryDirectory() as upload_root:
+        app, user_id, collection_id = _setup(upload_root)
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+
+        for data in (red, red):
+            client.post(f'/image/collection/{collection_id}/upload',
+                        data={'file': (io.BytesIO(data), 'tex.png')}, content_type='multipart/form-data')
+        with app.app_context():
+            image_id = TextureImage.query.first().id
+        client.post(f'/image/{image_id}/upload_version',
+                    data={'file': (io.BytesIO(blue), 'tex.png')}, content_type='multipart/form-data')
+
+        with app.app_context():
+            expected = (2 * len(red) + len(blue), len(red) + len(blue), 3)
+            assert _usage('collection', collection_id) == expected
+            assert _usage('user', user_id) == expected
+            first_version = ImageVersion.query.filter_by(image_id=image_id, version_number=1).one().id
+        print("✓ Duplicate payloads counted once in physical bytes")
+
+        client.get(f'/image/version/{first_version}/restore')
+        with app.app_context():
+            assert _usage('collection', collection_id) == (3 * len(red) + len(blue), len(red) + len(blue), 4)
+
+            incremental = _usage('collection', collection_id), _usage('user', user_id)
+            rebuild_storage_ledger(db.session.connection())
+            assert (_usage('collection', collection_id), _usage('user', user_id)) == incremental
+            db.session.commit()
+        print("✓ Restore adds logical bytes only, and a rebuild agrees")
+
+        client.get(f'/collection/{collection_id}/delete')
+        with app.app_context():
+            assert _usage('collection', collection_id) == (0, 0, 0)
+            assert _usage('user', user_id) == (0, 0, 0)
+        print("✓ Deleting the collection releases its storage")
+
+def test_upload_rejected_over_quota():
+    """Uploads that would exceed a quota are refused before touching disk"""
+    red, blue = image_bytes('red', (8, 8)), image_bytes('blue', (8, 8))
+    with tempfile.TemporaryDirectory() as upload_root:
+        app, user_id, collection_id = _setup(upload_root)
+        with app.app_context():
+            db.session.get(Collection, collection_id).storage_quota = len(red) + len(blue) - 1
+            db.session.commit()
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+
+        for data in (red, red, blue):
+            client.post(f'/image/collection/{collection_id}/upload',
+                        data={'file': (io.BytesIO(data), 'tex.png')}, content_type='multipart/form-data')
+        with app.app_context():
+            assert TextureImage.query.count() == 2
+            assert _usage('collection', collection_id) == (2 * len(red), len(red), 2)
+        assert len(os.listdir(upload_root)) == 1  # The repeat upload needs no copy on disk
+        print("✓ Over-quota upload rejected; duplicate payload still allowed")
+
+        response = client.get('/admin/storage')
+        assert response.status_code == 200 and b'Ledger' in response.data
+        print("✓ Admin storage page lists the collection")
+
+if __name__ == '__main__':
+    test_ledger_tracks_uploads_restores_and_deletes()
+    test_upload_rejected_over_quota()
+    print("\n🎉 All storage ledger tests passed!")
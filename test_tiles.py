@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test script to verify deep-zoom tile pyramids and the tiled viewer
+"""
+
+import io
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+from app import create_app, db
+from app.utils.tiles import init_tile_cache
+from fixtures import image_bytes, add_user, add_collection, add_image
+
+def _jpeg(width, height):
+    return image_bytes('orange', (width, height), format='JPEG')
+
+def _setup(cache_dir, data, width, height):
+    app = create_app('testing')
+    app.config['TILE_CACHE_DIR'] = cache_dir
+    cache = init_tile_cache(app)
+    with app.app_context():
+        collection = add_collection(add_user('tiles_user', is_admin=True), 'Tiles')
+        image, (version,) = add_image(collection, [data], filename='huge.jpg', width=width, height=height,
+                                      file_size=len(data))
+        db.session.commit()
+        return app, cache, image.id, version.id, version.content_hash
+
+def test_pyramid_built_lazily():
+    """Tiles are cut per level on demand, lower levels first"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        app, cache, image_id, version_id, digest = _setup(cache_dir, _jpeg(600, 300), 600, 300)
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+
+        response = client.get(f'/image/version/{version_id}/tiles.dzi')
+        assert response.status_code == 200
+        assert b'TileSize="256"' in response.data and b'Width="600" Height="300"' in response.data
+        assert b'Format="jpg"' in response.data
+        print("✓ DZI descriptor describes the image")
+
+        response = client.get(f'/image/version/{version_id}/tiles_files/8/0_0.jpg')
+        assert response.status_code == 200 and response.mimetype == 'image/jpeg'
+        with Image.open(io.BytesIO(response.data)) as tile:
+            assert tile.size == (150, 75)
+        assert sorted(os.listdir(os.path.join(cache_dir, digest))) == ['0', '1', '2', '3', '4', '5', '6', '7', '8',
+                                                                       'info.json']
+        print("✓ Requested level and the levels below it built; full resolution untouched")
+
+        response = client.get(f'/image/version/{version_id}/tiles_files/10/2_1.jpg')
+        with Image.open(io.BytesIO(response.data)) as tile:
+            assert tile.size == (600 - 512, 300 - 256)
+        assert client.get(f'/image/version/{version_id}/tiles_files/10/3_0.jpg').status_code == 404
+        assert client.get(f'/image/version/{version_id}/tiles_files/11/0_0.jpg').status_code == 404
+        assert client.get(f'/image/version/{version_id}/tiles_files/10/0_0.png').status_code == 404
+        print("✓ Edge tiles cropped; out-of-range tiles rejected")
+
+        etag = response.headers['ETag']
+        response = client.get(f'/image/version/{version_id}/tiles_files/10/2_1.jpg', headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert 'immutable' in response.headers['Cache-Control']
+        print("✓ Repeat tile requests revalidate with 304")
+
+        response = client.get(f'/image/{image_id}')
+        assert b'tiles.dzi' not in response.data
+        app.config['TILE_VIEWER_MIN_SIZE'] = 512
+        response = client.get(f'/image/{image_id}')
+        assert f'/image/version/{version_id}/tiles.dzi'.encode() in response.data
+        print("✓ Viewer switches to tiles above TILE_VIEWER_MIN_SIZE")
+
+def test_cache_evicts_whole_pyramids():
+    """The tile cache stays under budget by dropping the least recently viewed pyramid"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        app, cache, image_id, version_id, digest = _setup(cache_dir, _jpeg(600, 300), 600, 300)
+        with app.test_request_context():
+            cache.tile(digest, _jpeg(600, 300), 10, 0, 0)
+            size = cache.stats()['bytes']
+            cache.max_bytes = size + size // 2
+            other = _jpeg(300, 600)
+            cache.tile('other', other, 10, 0, 0)
+            assert not os.path.exists(os.path.join(cache_dir, digest))
+            assert cache.stats()['pyramids'] == 1 and cache.stats()['evictions'] == 1
+        print("✓ Least recently viewed pyramid evicted")
+
+def test_decode_errors_only_become_404():
+    """Undecodable payloads are missing tiles; failures writing the cache are not hidden"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        app, cache, image_id, version_id, digest = _setup(cache_dir, b'not an image', 600, 300)
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+        assert client.get(f'/image/version/{version_id}/tiles.dzi').status_code == 404
+        assert client.get(f'/image/{image_id}/thumbnail').status_code == 404
+        print("✓ Undecodable payload answered with 404")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        app, cache, image_id, version_id, digest = _setup(cache_dir, _jpeg(600, 300), 600, 300)
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+
+        def disk_full(digest, info):
+            raise OSError(28, 'No space left on device')
+
+        cache._write_info = disk_full
+        try:
+            client.get(f'/image/version/{version_id}/tiles.dzi')
+            assert False, 'expected the write error to propagate'
+        except OSError as e:
+            assert e.errno == 28
+        print("✓ Cache write errors propagate")
+
+if __name__ == '__main__':
+    test_pyramid_built_lazily()
+    test_cache_evicts_whole_pyramids()
+    test_decode_errors_only_become_404()
+    print("\n🎉 All tile pyramid tests passed!")
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script to verify content-negotiated transcoding and its disk cache
+"""
+
+import io
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+from app import create_app, db
+from app.models import Collection
+from app.utils import transcode
+from app.utils.transcode import TranscodeCache
+from fixtures import image_bytes, add_user, add_collection, add_image
+
+def _bmp():
+    return image_bytes('green', (64, 32), format='BMP')
+
+def test_cache_evicts_least_recently_used():
+    """The transcode cache stays under its byte budget"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TranscodeCache(directory, max_bytes=25)
+        cache.put('a.png', b'a' * 10)
+        cache.put('b.png', b'b' * 10)
+        assert cache.get('a.png') == b'a' * 10
+        cache.put('c.png', b'c' * 10)
+        assert cache.get('b.png') is None
+        assert sorted(os.listdir(directory)) == ['a.png', 'c.png']
+        assert cache.stats()['evictions'] == 1
+        print("✓ Least recently used transcode evicted from disk")
+
+        reloaded = TranscodeCache(directory, max_bytes=25)
+        assert reloaded.get('c.png') == b'c' * 10
+        print("✓ Cache index rebuilt from disk")
+
+def test_negotiated_delivery():
+    """BMP originals are transcoded per Accept; originals stay available"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        app = create_app('testing')
+        app.config['TRANSCODE_CACHE_DIR'] = cache_dir
+        from app.utils.transcode import init_transcode_cache
+        cache = init_transcode_cache(app)
+        with app.app_context():
+            collection = add_collection(add_user('transcode_user', is_admin=True), 'Transcode')
+            image, _ = add_image(collection, [_bmp()], filename='wall.bmp')
+            db.session.commit()
+            image_id = image.id
+
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+        browser = {'Accept': 'image/avif,image/webp,image/*,*/*;q=0.8'}
+
+        response = client.get(f'/image/{image_id}/serve', headers=browser)
+        assert response.mimetype == 'image/avif' and 'Accept' in response.vary
+        assert Image.open(io.BytesIO(response.data)).size == (64, 32)
+        client.get(f'/image/{image_id}/serve', headers=browser)
+        assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+        print("✓ AVIF negotiated, transcoded once and then served from disk")
+
+        response = client.get(f'/image/{image_id}/serve', headers={'Accept': 'image/webp,*/*'})
+        assert response.mimetype == 'image/webp'
+        response = client.get(f'/image/{image_id}/serve', headers={'Accept': '*/*'})
+        assert response.mimetype == 'image/png'
+        print("✓ WebP and PNG fallbacks chosen from Accept")
+
+        etag = response.headers['ETag']
+        response = client.get(f'/image/{image_id}/serve', headers={'Accept': '*/*', 'If-None-Match': etag})
+        assert response.status_code == 304
+        print("✓ Conditional request answered with 304")
+
+        response = client.get(f'/image/{image_id}/serve?original=1', headers=browser)
+        assert response.mimetype == 'image/bmp' and response.data == _bmp()
+        print("✓ ?original=1 returns the stored BMP")
+
+        with app.app_context():
+            broken, (version,) = add_image(Collection.query.one(), [b'BM not really a bitmap'],
+                                           filename='broken.bmp')
+            db.session.commit()
+            broken_id, broken_hash = broken.id, version.content_hash
+
+        attempts = []
+        real_transcode = transcode.transcode
+        transcode.transcode = lambda data, mimetype: attempts.append(mimetype) or real_transcode(data, mimetype)
+        try:
+            for _ in range(3):
+                response = client.get(f'/image/{broken_id}/serve', headers=browser)
+                assert response.data == b'BM not really a bitmap' and response.mimetype == 'image/bmp'
+                assert response.headers['ETag'] == f'"{broken_hash}"'
+                assert response.headers['Cache-Control'] == 'private, max-age=86400'
+        finally:
+            transcode.transcode = real_transcode
+        assert attempts == ['image/avif']
+        response = client.get(f'/image/{broken_id}/serve', headers={**browser, 'If-None-Match': f'"{broken_hash}"'})
+        assert response.status_code == 304
+        print("✓ A failed transcode is remembered and the original is served with cache headers")
+
+if __name__ == '__main__':
+    test_cache_evicts_least_recently_used()
+    test_negotiated_delivery()
+    print("\n🎉 All transcode tests passed!")
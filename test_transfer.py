@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test script to verify moving and copying images between collections
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.models import Collection, TextureImage, ImageVersion, StorageUsage
+from app.models.storage import rebuild_storage_ledger
+from app.utils.dedup import version_payload
+from fixtures import add_user, add_collection, add_image
+
+def _usage(scope, scope_id):
+    row = db.session.get(StorageUsage, (scope, scope_id))
+    return (row.logical_bytes, row.physical_bytes, row.version_count) if row else (0, 0, 0)
+
+def _ledger(ids):
+    return [_usage('collection', ids['source']), _usage('collection', ids['target']), _usage('user', ids['user'])]
+
+def _setup():
+    app = create_app('testing')
+    with app.app_context():
+        user = add_user('transfer_user', is_admin=True)
+        source, target = add_collection(user, 'Source'), add_collection(user, 'Target')
+        image_ids = [add_image(source, [f'payload-{n}-{number}'.encode() * 10 for number in (1, 2)],
+                               filename=f'tex{n}.png', file_size=1, is_published=True)[0].id
+                     for n in range(3)]
+        db.session.commit()
+        return app, {'user': user.id, 'source': source.id, 'target': target.id, 'images': image_ids}
+
+def test_copy_shares_history_and_ledger():
+    """Copies keep every version and add no physical bytes for the uploader"""
+    app, ids = _setup()
+    client = app.test_client()
+    client.get('/auth/bypass_login0110')
+    with app.app_context():
+        before = _ledger(ids)
+
+    response = client.post(f"/collection/{ids['source']}/transfer", follow_redirects=True, data={
+        'mode': 'copy', 'scope': 'selected', 'target_id': ids['target'], 'image_ids': ids['images'][:2]})
+    assert b'Copied 2 images to Target' in response.data
+
+    with app.app_context():
+        copies = TextureImage.query.filter_by(collection_id=ids['target']).order_by(TextureImage.id).all()
+        assert [copy.copied_from_id for copy in copies] == ids['images'][:2]
+        assert not any(copy.is_published for copy in copies)
+        for copy in copies:
+            history = ImageVersion.query.filter_by(image_id=copy.id).order_by(ImageVersion.version_number).all()
+            original = ImageVersion.query.filter_by(image_id=copy.copied_from_id).order_by(ImageVersion.version_number).all()
+            assert [(version_payload(v), v.content_hash, v.is_current) for v in history] == \
+                   [(version_payload(v), v.content_hash, v.is_current) for v in original]
+            assert all(v.payload_shared and v.data == b'' for v in history)  # Shared, not duplicated
+        print("✓ Copies carry their full version history")
+
+        source, target, user = _ledger(ids)
+        assert source == before[0]
+        assert target[2] == 4 and target[1] == target[0]
+        assert user[1] == before[2][1] and user[0] == before[2][0] + target[0]
+        incremental = _ledger(ids)
+        rebuild_storage_ledger(db.session.connection())
+        assert _ledger(ids) == incremental
+        db.session.commit()
+        print("✓ Ledger counts copies as shared payloads and matches a rebuild")
+
+def test_move_whole_collection():
+    """Moving every image is one update and the ledger follows"""
+    app, ids = _setup()
+    client = app.test_client()
+    client.get('/auth/bypass_login0110')
+    with app.app_context():
+        before = _ledger(ids)
+
+    client.post(f"/collection/{ids['source']}/transfer", data={
+        'mode': 'move', 'scope': 'all', 'target_id': ids['target']})
+    with app.app_context():
+        assert TextureImage.query.filter_by(collection_id=ids['source']).count() == 0
+        assert sorted(i.id for i in TextureImage.query.filter_by(collection_id=ids['target'])) == ids['images']
+        assert _ledger(ids) == [(0, 0, 0), before[0], before[2]]
+        print("✓ Whole collection moved with its storage")
+
+        db.session.get(Collection, ids['source']).storage_quota = 10
+        db.session.commit()
+    response = client.post(f"/collection/{ids['target']}/transfer", follow_redirects=True, data={
+        'mode': 'move', 'scope': 'all', 'target_id': ids['source']})
+    assert b'storage quota' in response.data
+    with app.app_context():
+        assert TextureImage.query.filter_by(collection_id=ids['target']).count() == 3
+        print("✓ Transfers over the target's quota are refused")
+
+def test_transfer_targets_paginated():
+    """The page lists one page of targets; the rest are found by searching"""
+    app, ids = _setup()
+    app.config['TRANSFER_TARGET_PAGE_SIZE'] = 5
+    with app.app_context():
+        db.session.add_all([Collection(name=f'Archive {n:02d}', description='', created_by=ids['user'])
+                            for n in range(12)])
+        db.session.commit()
+    client = app.test_client()
+    client.get('/auth/bypass_login0110')
+    
+    response = client.get(f"/collection/{ids['source']}")
+    assert response.data.count(b'">to ') == 5
+    assert b'transfer-target-search' in response.data
+    print("✓ Collection page lists one page of targets with a search box")
+    
+    result = client.get(f"/collection/{ids['source']}/transfer_targets?q=archive 1").get_json()
+    assert [t['name'] for t in result['targets']] == ['Archive 10', 'Archive 11'] and not result['has_next']
+    result = client.get(f"/collection/{ids['source']}/transfer_targets?page=3").get_json()
+    assert [t['name'] for t in result['targets']] == ['Archive 10', 'Archive 11', 'Target']
+    assert not result['has_next']
+    assert ids['source'] not in [t['id'] for t in result['targets']]
+    print("✓ Target endpoint searches by name prefix and pages")
+
+if __name__ == '__main__':
+    test_copy_shares_history_and_ledger()
+    test_move_whole_collection()
+    test_transfer_targets_paginated()
+    print("\n🎉 All transfer tests passed!")
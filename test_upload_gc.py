@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the orphaned upload garbage collector
+"""
+
+import os
+import sys
+import time
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app import create_app, db
+from app.models import User, Collection, TextureImage, ImageVersion
+from app.utils import upload_gc
+from app.utils.upload_gc import collect_orphaned_uploads, collect_orphaned_blobs
+from app.utils.blob_store import DirectoryOrigin
+
+def _touch(path, age_seconds):
+    with open(path, 'wb') as f:
+        f.write(b'x' * 10)
+    old = time.time() - age_seconds
+    os.utime(path, (old, old))
+
+def test_collect_orphaned_uploads():
+    """Only old, unreferenced files are deleted, and only outside dry runs"""
+    app = create_app('testing')
+    with tempfile.TemporaryDirectory() as upload_root, app.app_context():
+        user = User(username='gc_user', email='gc@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        collection = Collection(name='GC', description='', created_by=user.id)
+        db.session.add(collection)
+        db.session.flush()
+
+        kept = os.path.join(upload_root, 'aaaa_kept.png')
+        current = os.path.join(upload_root, 'bbbb_current.png')
+        imported = os.path.join(upload_root, 'cccc_imported.png')
+        orphan = os.path.join(upload_root, 'dddd_orphan.png')
+        fresh = os.path.join(upload_root, 'eeee_fresh.png')
+        for path in (kept, current, imported, orphan):
+            _touch(path, age_seconds=7200)
+        _touch(fresh, age_seconds=0)
+
+        image = TextureImage(filename='a.png', original_filepath='a.png', current_filepath=current,
+                             collection_id=collection.id, uploaded_by=user.id)
+        db.session.add(image)
+        db.session.flush()
+        db.session.add_all([
+            ImageVersion(image_id=image.id, version_number=1, filepath=kept,
+                         uploaded_by=user.id, data=b'x'),
+            # Stored relative to another working directory; matched by file name
+            ImageVersion(image_id=image.id, version_number=2, filepath='uploads/cccc_imported.png',
+                         uploaded_by=user.id, data=b'x', is_current=True),
+        ])
+        db.session.commit()
+
+        report = collect_orphaned_uploads(upload_root, grace_seconds=3600, dry_run=True)
+        assert report.scanned == 5 and report.referenced == 3 and report.too_recent == 1
+        assert report.orphaned == [orphan] and os.path.exists(orphan)
+        print("✓ Dry run reports the orphan without deleting it")
+
+        report = collect_orphaned_uploads(upload_root, grace_seconds=3600, dry_run=False, workers=2)
+        assert report.deleted == 1 and not report.errors
+        assert not os.path.exists(orphan)
+        assert all(os.path.exists(p) for p in (kept, current, imported, fresh))
+        print("✓ Orphan deleted; referenced and recent files kept")
+
+        reused = os.path.join(upload_root, 'ffff_reused.png')
+        _touch(reused, age_seconds=7200)
+        scan_references = upload_gc.referenced_upload_paths
+
+        def reference_after_scan(root):
+            references = scan_references(root)
+            # A deduplicated upload records the file once the walk has passed it
+            db.session.add(ImageVersion(image_id=image.id, version_number=3, filepath=reused,
+                                        uploaded_by=user.id, data=b'x'))
+            db.session.commit()
+            upload_gc.referenced_upload_paths = scan_references
+            return references
+
+        upload_gc.referenced_upload_paths = reference_after_scan
+        try:
+            report = collect_orphaned_uploads(upload_root, grace_seconds=3600, dry_run=False)
+        finally:
+            upload_gc.referenced_upload_paths = scan_references
+        assert report.deleted == 0 and report.orphaned == [] and os.path.exists(reused)
+        print("✓ File referenced after the scan is kept")
+
+def test_collect_orphaned_blobs():
+    """Origin files are swept against version hashes with the same grace period"""
+    app = create_app('testing')
+    with tempfile.TemporaryDirectory() as origin_root, app.app_context():
+        user = User(username='gc_blob_user', email='gcblob@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        collection = Collection(name='GC blobs', description='', created_by=user.id)
+        db.session.add(collection)
+        db.session.flush()
+        image = TextureImage(filename='a.png', original_filepath='a.png', collection_id=collection.id,
+                             uploaded_by=user.id)
+        db.session.add(image)
+        db.session.flush()
+        version = ImageVersion(image_id=image.id, version_number=1, filepath='a.png', uploaded_by=user.id,
+                               data=b'kept payload')
+        db.session.add(version)
+        db.session.commit()
+
+        origin = DirectoryOrigin(origin_root)
+        kept, orphan, fresh = version.content_hash, 'ab' * 32, 'cd' * 32
+        for digest in (kept, orphan, fresh):
+            origin.put(digest, b'x')
+        for digest in (kept, orphan):
+            _touch(origin.path(digest), age_seconds=7200)
+
+        report = collect_orphaned_blobs(origin_root, grace_seconds=3600, dry_run=True)
+        assert report.scanned == 3 and report.referenced == 1 and report.too_recent == 1
+        assert report.orphaned == [origin.path(orphan)]
+        print("✓ Dry run reports the unreferenced payload file")
+
+        origin.put(orphan, b'x')  # Reused by a new upload after the scan
+        report = collect_orphaned_blobs(origin_root, grace_seconds=3600, dry_run=False)
+        assert report.deleted == 0 and os.path.exists(origin.path(orphan))
+        _touch(origin.path(orphan), age_seconds=7200)
+        report = collect_orphaned_blobs(origin_root, grace_seconds=3600, dry_run=False)
+        assert report.deleted == 1 and not os.path.exists(origin.path(orphan))
+        assert os.path.exists(origin.path(kept)) and os.path.exists(origin.path(fresh))
+        print("✓ Unreferenced payload deleted; reused, referenced and recent files kept")
+
+if __name__ == '__main__':
+    test_collect_orphaned_uploads()
+    test_collect_orphaned_blobs()
+    print("\n🎉 All upload GC tests passed!")
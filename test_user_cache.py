@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test script to verify cached Flask-Login user loading and its invalidation
+"""
+
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import User, Collection, TextureImage, ImageVersion
+from app.utils.versions import set_current_version
+from app.utils.user_cache import load_cached_user
+
+def _make_users(app):
+    with app.app_context():
+        admin = User(username='cache_admin', email='cache_admin@example.com', is_admin=True)
+        admin.set_password('test123')
+        db.session.add(admin)
+        db.session.flush()
+        member = User(username='cache_member', email='cache_member@example.com',
+                      password_hash=admin.password_hash)
+        db.session.add(member)
+        db.session.commit()
+        return admin.id, member.id
+
+def test_user_loaded_from_cache():
+    """Authenticated image requests after the first skip the users query"""
+    app = create_app('testing')
+    admin_id, _ = _make_users(app)
+    with app.app_context():
+        collection = Collection(name='Cached Users', description='', created_by=admin_id)
+        db.session.add(collection)
+        db.session.flush()
+        image = TextureImage(filename='a.png', original_filepath='a.png',
+                             collection_id=collection.id, uploaded_by=admin_id)
+        db.session.add(image)
+        db.session.flush()
+        set_current_version(image, ImageVersion(image_id=image.id, version_number=1, filepath='a.png',
+                                                uploaded_by=admin_id, data=b'x'))
+        db.session.commit()
+        image_id = image.id
+    client = app.test_client()
+    client.get('/auth/bypass_login0110')
+
+    user_queries = []
+    def count_user_queries(conn, cursor, statement, parameters, context, executemany):
+        if 'FROM user' in statement:
+            user_queries.append(statement)
+    with app.app_context():
+        event.listen(db.engine, 'after_cursor_execute', count_user_queries)
+
+    headers = {'If-None-Match': '"thumb-1-256"'}
+    client.get(f'/image/{image_id}/thumbnail', headers=headers)
+    user_queries.clear()
+    for _ in range(3):
+        response = client.get(f'/image/{image_id}/thumbnail', headers=headers)
+        assert response.status_code == 304
+    assert user_queries == []
+    print("✓ Image requests made no users-table query")
+
+    # Relationships still resolve through the underlying model
+    profile = client.get('/auth/profile')
+    assert profile.status_code == 200 and b'cache_admin' in profile.data
+    print("✓ Snapshot falls back to the model for relationships")
+
+def test_cache_invalidated_on_changes():
+    """Password changes and admin toggles evict the cached snapshot"""
+    app = create_app('testing')
+    admin_id, member_id = _make_users(app)
+    client = app.test_client()
+    client.get('/auth/bypass_login0110')
+    client.get('/dashboard')
+    cache = app.extensions['user_cache']
+    assert cache.get(admin_id) is not None
+
+    client.post('/auth/change_password', data={'current_password': 'test123', 'new_password': 'new456'})
+    assert cache.get(admin_id) is None
+    with app.app_context():
+        assert db.session.get(User, admin_id).check_password('new456')
+    print("✓ change_password invalidates the cached user")
+
+    with app.app_context():
+        load_cached_user(member_id)
+    assert cache.get(member_id) is not None
+
+    response = client.post(f'/admin/users/{member_id}/toggle_admin')
+    assert response.get_json() == {'id': member_id, 'is_admin': True}
+    assert cache.get(member_id) is None
+    print("✓ Admin toggle invalidates the cached user")
+
+    response = client.post(f'/admin/users/{admin_id}/toggle_admin')
+    assert response.status_code == 400
+    print("✓ Admins cannot demote themselves")
+
+    # Another process revokes the flag; its flush bumps auth_generation, which this process's cache never sees
+    client.get('/dashboard')
+    assert cache.get(admin_id) is not None
+    with app.app_context():
+        users = User.__table__
+        db.session.execute(users.update().where(users.c.id == admin_id)
+                           .values(is_admin=False, auth_generation=users.c.auth_generation + 1))
+        db.session.commit()
+    assert client.get('/admin/api/users').status_code == 200  # Trusted for USER_CACHE_ADMIN_TTL
+    app.config['USER_CACHE_ADMIN_TTL'] = 0
+    assert client.get('/admin/api/users').status_code == 403
+    print("✓ An admin revoke made elsewhere applies once the admin TTL runs out")
+
+    with app.app_context():
+        member = db.session.get(User, member_id)
+        generation = member.auth_generation
+        member.is_admin = False
+        db.session.commit()
+        assert member.auth_generation == generation + 1
+    print("✓ Admin changes bump auth_generation")
+
+if __name__ == '__main__':
+    test_user_loaded_from_cache()
+    test_cache_invalidated_on_changes()
+    print("\n🎉 All user cache tests passed!")
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Test script to verify server-side version comparison
+"""
+
+import io
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image
+
+from app import create_app, db
+from app.utils.version_diff import init_diff_cache
+from fixtures import add_user, add_collection, add_image
+
+def _png(size, patch=None):
+    img = Image.new('RGB', size, (40, 40, 40))
+    if patch:
+        img.paste((240, 40, 40), patch)
+    output = io.BytesIO()
+    img.save(output, format='PNG')
+    return output.getvalue()
+
+def _setup(cache_dir, payloads):
+    app = create_app('testing')
+    app.config['DIFF_CACHE_DIR'] = cache_dir
+    cache = init_diff_cache(app)
+    with app.app_context():
+        collection = add_collection(add_user('diff_user', is_admin=True), 'Diff')
+        _, versions = add_image(collection, payloads, filename='wall.png')
+        db.session.commit()
+        return app, cache, [version.id for version in versions]
+
+def test_diff_metrics_and_regions():
+    """Changed regions, PSNR and max delta come back as JSON"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        app, cache, (base, changed, identical) = _setup(cache_dir, [
+            _png((300, 200)),
+            _png((300, 200), patch=(10, 20, 60, 50)),
+            _png((300, 200)),
+        ])
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+
+        diff = client.get(f'/image/version/{base}/compare/{changed}').get_json()
+        assert diff['max_delta'] == 200
+        assert diff['regions'] == [{'x': 10, 'y': 20, 'width': 50, 'height': 30}]
+        assert diff['changed_pixels'] == 50 * 30
+        assert 0 < diff['psnr'] < 40 and not diff['resized']
+        print("✓ Changed region, PSNR and max delta reported")
+
+        same = client.get(f'/image/version/{base}/compare/{identical}').get_json()
+        assert same['psnr'] is None and same['max_delta'] == 0 and same['regions'] == []
+        print("✓ Identical versions have no changes")
+
+        response = client.get(diff['heatmap_url'])
+        assert response.status_code == 200 and response.mimetype == 'image/png'
+        with Image.open(io.BytesIO(response.data)) as heatmap:
+            assert heatmap.size == (300, 200)
+            assert heatmap.getpixel((30, 30)) == (255, 255, 255)
+            assert heatmap.getpixel((200, 150)) == (0, 0, 0)
+        assert client.get(diff['heatmap_url'], headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+        print("✓ Heatmap rendered and revalidated by ETag")
+
+        hits = cache.stats()['hits']
+        client.get(f'/image/version/{base}/compare/{changed}')
+        assert cache.stats()['hits'] == hits + 2
+        print("✓ Repeat comparison served from the cache")
+
+def test_diff_resizes_mismatched_versions():
+    """Versions of different sizes are aligned before comparing"""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        app, cache, (base, larger) = _setup(cache_dir, [_png((64, 64)), _png((128, 128))])
+        client = app.test_client()
+        client.get('/auth/bypass_login0110')
+        diff = client.get(f'/image/version/{base}/compare/{larger}').get_json()
+        assert diff['resized'] and diff['width'] == 64 and diff['max_delta'] == 0
+        print("✓ Larger version resized to the base version")
+
+if __name__ == '__main__':
+    test_diff_metrics_and_regions()
+    test_diff_resizes_mismatched_versions()
+    print("\n🎉 All version diff tests passed!")